@@ -0,0 +1,25 @@
+'''Per-call cost of coup.applyAction versus calling the apply* function directly.
+
+    python bench/bench_apply_action.py
+'''
+import timeit
+
+from coup import coup
+from coup.coup import Role, Action
+
+
+game = coup.GameState(players=[coup.PlayerState(cards=[Role.DUKE], coins=0, agent=None, name='0th'),
+                               coup.PlayerState(cards=[Role.CAPTAIN], coins=0, agent=None, name='1st')],
+                      deck=coup.makeDeck([]))
+
+
+def bench(name, stmt, number=200000):
+    seconds = min(timeit.repeat(stmt, globals=globals(), number=number, repeat=5))
+    print(f"{name:30}{seconds / number * 1e9:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    bench('applyIncome', 'coup.applyIncome(game, 0)')
+    bench('applyAction(INCOME)', 'coup.applyAction(game, 0, Action.INCOME)')
+    bench('applyTax', 'coup.applyTax(game, 0)')
+    bench('applyAction(TAX)', 'coup.applyAction(game, 0, Action.TAX)')
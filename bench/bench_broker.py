@@ -0,0 +1,53 @@
+'''Throughput and latency of coup.broker.InferenceBroker by batch size, with
+concurrent games in threads and on an event loop.
+
+    python bench/bench_broker.py [games]
+'''
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from coup import coup, asyncgame
+from coup.asyncgame import SyncAgentAdapter
+from coup.broker import InferenceBroker, MLPPolicy, PolicyAgent, AsyncPolicyAgent, obsSize
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+hidden = (256, 256)
+
+
+def threaded(broker, nGames, nThreads=64):
+    with ThreadPoolExecutor(nThreads) as pool:
+        list(pool.map(lambda seed: coup.gameLoop([PolicyAgent(broker), MrtBot(), BayBot(), SeanAgent()], seed=seed),
+                      range(nGames)))
+
+def concurrent(broker, nGames):
+    async def games():
+        await asyncio.gather(*(asyncgame.gameLoop([AsyncPolicyAgent(broker), SyncAgentAdapter(MrtBot()),
+                                                   SyncAgentAdapter(BayBot()), SyncAgentAdapter(SeanAgent())],
+                                                  seed=seed)
+                               for seed in range(nGames)))
+    asyncio.run(games())
+
+def report(name, maxBatch, broker, seconds):
+    s = broker.stats()
+    print(f"{name:8}{maxBatch:6}{s['decisions'] / seconds:12,.0f}{s['meanBatch']:8.1f}"
+          f"{s['inferenceMicrosPerDecision']:10.1f}{s['latency']['meanMicros']:12.0f}")
+
+
+def main():
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    policy = MLPPolicy.random(obsSize(3), 3, hidden=hidden, seed=0)
+    print(f"MLP {obsSize(3)}-{'-'.join(map(str, hidden))}-{policy.layers[-1][0].shape[1]}, {nGames} games")
+    print(f"{'games':8}{'batch':>6}{'decisions/s':>12}{'mean':>8}{'infer us':>10}{'latency us':>12}")
+    for run, name in [(threaded, 'threads'), (concurrent, 'asyncio')]:
+        for maxBatch in [1, 8, 32, 128]:
+            with InferenceBroker(policy, maxBatch=maxBatch, maxWait=0.002) as broker:
+                start = time.perf_counter()
+                run(broker, nGames)
+                seconds = time.perf_counter() - start
+            report(name, maxBatch, broker, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+'''Turns/sec of the compact engine versus the namedtuple engine.
+
+    python bench/bench_compact.py [games]
+'''
+import random
+import sys
+import time
+
+from coup import coup, compact
+from coup.agents.bots import RandomAgent, MrtBot, BayBot, SeanAgent
+
+
+def playGame(engine, players, agents):
+    '''The body of gameLoop, written against whichever engine module is given.
+    Returns the number of turns played.
+    '''
+    baseDeck = [coup.Role.DUKE, coup.Role.ASSASSIN, coup.Role.CONTESSA,
+                coup.Role.AMBASSADOR, coup.Role.CAPTAIN] * 3
+    state = engine.dealGame(baseDeck, agents)
+    turns = 0
+    while len(players(state)) > 1 and turns <= 1000:
+        i = turns % len(players(state))
+        action, relativeTarget = players(state)[i].selectAction(engine.getPlayerView(state, i))
+        target = None if relativeTarget is None else (i + relativeTarget + 1) % len(players(state))
+        state, summary = engine.applyAction(state, i, action, target)
+        engine.broadcastRelativeTurnSummaries(summary, state)
+        turns += 1
+    return turns
+
+
+def bench(name, engine, players, nGames, seed):
+    random.seed(seed)
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(nGames):
+        agents = [SeanAgent(), BayBot(), MrtBot(), RandomAgent()]
+        random.shuffle(agents)
+        turns += playGame(engine, players, agents)
+    seconds = time.perf_counter() - start
+    print(f"{name:12}{turns / seconds:12.0f} turns/sec{nGames / seconds:10.0f} games/sec")
+    return turns / seconds
+
+
+def benchTransitions(name, engine, nTurns):
+    '''Agent-free transitions only (income and tax), to isolate the cost of the state update.'''
+    baseDeck = [coup.Role.DUKE, coup.Role.ASSASSIN, coup.Role.CONTESSA,
+                coup.Role.AMBASSADOR, coup.Role.CAPTAIN] * 3
+    state = engine.dealGame(baseDeck, [None] * 4)
+    start = time.perf_counter()
+    for t in range(nTurns):
+        state, _ = engine.applyIncome(state, t % 4)
+        state, _ = engine.applyTax(state, t % 4)
+    seconds = time.perf_counter() - start
+    print(f"{name:12}{2 * nTurns / seconds:12.0f} transitions/sec")
+    return 2 * nTurns / seconds
+
+
+if __name__ == "__main__":
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    base = bench('namedtuple', coup, lambda s: [p.agent for p in s.players], nGames, 0)
+    fast = bench('compact', compact, lambda s: [s.agents[seat] for seat in s.order], nGames, 0)
+    print(f"speedup {fast / base:.2f}x")
+    print()
+    base = benchTransitions('namedtuple', coup, 200000)
+    fast = benchTransitions('compact', compact, 200000)
+    print(f"speedup {fast / base:.2f}x")
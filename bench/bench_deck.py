@@ -0,0 +1,68 @@
+'''Cost of drawing for an exchange, and turns/sec on an exchange-heavy all-MrtBot table.
+
+    python bench/bench_deck.py [games]
+'''
+import random
+import sys
+import timeit
+
+from coup import coup
+from coup.coup import Role
+from coup.agents.bots import MrtBot
+
+
+def listGetCardsFromDeck(deck, nCards, rng):
+    '''The old list deck: a full shuffled copy to pop two cards, and a concatenation to return them.'''
+    deck = rng.sample(deck, len(deck))
+    cards = [deck.pop() for _ in range(nCards)]
+    return cards, deck + cards
+
+
+def countGetCardsFromDeck(deck, nCards, rng):
+    game = coup.GameState(players=[], deck=deck)
+    cards, game = coup.getCardsFromDeck(game, nCards, rng)
+    return cards, coup.returnToDeck(game.deck, cards)
+
+
+class CountingMrtBot(MrtBot):
+    '''MrtBot that exchanges whenever it can, counting its turns and exchanges.'''
+    turns = 0
+    exchanges = 0
+
+    def selectAction(self, playerView):
+        if coup.Action.EXCHANGE in coup.findEligibleActions(playerView.selfstate):
+            return (coup.Action.EXCHANGE, None)
+        return super().selectAction(playerView)
+
+    def turnSummary(self, playerView, summary):
+        if summary.activePlayer == -1:
+            CountingMrtBot.turns += 1
+            CountingMrtBot.exchanges += summary.action == coup.Action.EXCHANGE
+
+
+def benchGames(nGames):
+    rng = random.Random(0)
+    start = timeit.default_timer()
+    for _ in range(nGames):
+        coup.gameLoop([CountingMrtBot() for _ in range(4)], seed=rng.getrandbits(64))
+    seconds = timeit.default_timer() - start
+    print(f"{'4 MrtBots':30}{CountingMrtBot.turns / seconds:8.0f} turns/sec "
+          f"({CountingMrtBot.exchanges / CountingMrtBot.turns:.0%} exchanges)")
+
+
+def bench(name, stmt, number=100000):
+    seconds = min(timeit.repeat(stmt, globals=globals(), number=number, repeat=5))
+    print(f"{name:30}{seconds / number * 1e9:8.0f} ns/exchange draw")
+
+
+if __name__ == "__main__":
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cards = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+    rng = random.Random(0)
+    for nPlayers in [2, 6]:
+        listDeck = cards[2 * nPlayers:]
+        countDeck = coup.makeDeck(listDeck)
+        bench(f"list deck, {nPlayers} players", 'listGetCardsFromDeck(listDeck, 2, rng)')
+        bench(f"count deck, {nPlayers} players", 'countGetCardsFromDeck(countDeck, 2, rng)')
+
+    benchGames(nGames)
@@ -0,0 +1,32 @@
+'''Steps per second of coup.env.VectorEnv, with a random legal action per game.
+
+    python bench/bench_env.py [nEnvs] [steps]
+'''
+import sys
+import time
+
+import numpy as np
+
+from coup.env import VectorEnv
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def main():
+    nEnvs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    env = VectorEnv([MrtBot, BayBot, SeanAgent], nEnvs=nEnvs, seed=0)
+    obs, mask = env.reset()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        # A random legal action per game: the argmax of noise over the legal ones.
+        actions = np.where(mask, rng.random(mask.shape), -1.0).argmax(axis=1)
+        obs, mask, rewards, dones = env.step(actions)
+    seconds = time.perf_counter() - start
+    wins, losses, draws = env.results
+    print(f"{nEnvs} envs x {steps} steps in {seconds:.2f}s: {nEnvs * steps / seconds:,.0f} steps/sec")
+    print(f"{wins + losses + draws} games finished: {wins} wins, {losses} losses, {draws} draws")
+
+
+if __name__ == "__main__":
+    main()
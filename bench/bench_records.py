@@ -0,0 +1,50 @@
+'''Cost of recording games, size on disk, and how fast a record file can be scanned.
+
+    python bench/bench_records.py [games]
+'''
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from coup import coup
+from coup.records import GameRecordWriter, GameRecordReader
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def main():
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    table = lambda: [MrtBot(), BayBot(), SeanAgent()]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games.rec')
+
+        start = time.perf_counter()
+        for seed in range(nGames):
+            coup.gameLoop(table(), seed=seed)
+        plain = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with GameRecordWriter(path) as writer:
+            for seed in range(nGames):
+                coup.gameLoop(table(), seed=seed, recorder=writer)
+        recorded = time.perf_counter() - start
+        print(f"gameLoop:            {nGames / plain:9.0f} games/sec")
+        print(f"gameLoop + recorder: {nGames / recorded:9.0f} games/sec")
+        print(f"{os.path.getsize(path) / nGames:.0f} bytes/game")
+
+        with GameRecordReader(path) as games:
+            start = time.perf_counter()
+            seatWins = Counter(game.winnerSeat for game in games)
+            seconds = time.perf_counter() - start
+            print(f"scan winners:        {nGames / seconds:9.0f} games/sec {dict(seatWins)}")
+
+            start = time.perf_counter()
+            actions = Counter(turn[0] for game in games for turn in game.turns())
+            seconds = time.perf_counter() - start
+            nTurns = sum(actions.values())
+            print(f"scan turns:          {nTurns / seconds:9.0f} turns/sec ({nTurns} turns)")
+
+
+if __name__ == "__main__":
+    main()
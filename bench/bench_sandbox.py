@@ -0,0 +1,49 @@
+'''Cost of running bots in sandbox worker processes: games/sec in-process and
+sandboxed, and the per-call IPC overhead of each callback.
+
+    python bench/bench_sandbox.py [games]
+'''
+import sys
+import time
+
+from coup import coup
+from coup.sandbox import SandboxPool
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def main():
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    table = [MrtBot, BayBot, SeanAgent]
+
+    start = time.perf_counter()
+    for seed in range(nGames):
+        coup.gameLoop([factory() for factory in table], seed=seed)
+    plain = time.perf_counter() - start
+
+    with SandboxPool() as pool:
+        start = time.perf_counter()
+        for seed in range(nGames):
+            agents = [pool.agent(factory) for factory in table]
+            coup.gameLoop(agents, seed=seed)
+            for agent in agents:
+                agent.release()
+            # Fold every game's stats into one agent's, to report them together.
+            if seed == 0:
+                total = agents[0]
+            else:
+                for method, stats in agents[0].stats.items():
+                    totals = total.stats.setdefault(method, [0] * len(stats))
+                    total.stats[method] = [a + b for a, b in zip(totals, stats)]
+        sandboxed = time.perf_counter() - start
+
+    print(f"in-process: {nGames / plain:8.0f} games/sec")
+    print(f"sandboxed:  {nGames / sandboxed:8.0f} games/sec ({sandboxed / plain:.1f}x slower)")
+    print(f"{'':22}{'calls':>8}{'round trip':>12}{'bot':>8}{'overhead':>10}{'bytes out':>11}{'bytes in':>10}")
+    for method, s in sorted(total.ipcStats().items()):
+        print(f"{method:22}{s['calls']:8}{s['roundTripMicros']:10.1f}us{s['botMicros']:6.1f}us"
+              f"{s['overheadMicros']:8.1f}us{s['bytesSent']:11.1f}{s['bytesReceived']:10.1f}")
+    print("(MrtBot's calls, over every game)")
+
+
+if __name__ == "__main__":
+    main()
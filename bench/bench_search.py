@@ -0,0 +1,32 @@
+'''Search speed of SearchAgent (iterations/sec and simulated turns/sec) and its record
+against MrtBot and BayBot.
+
+    python bench/bench_search.py [games] [iterations]
+'''
+import sys
+import time
+from collections import Counter
+
+from coup import coup
+from coup.agents.search import SearchAgent
+from coup.agents.bots import MrtBot, BayBot
+
+
+def main():
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    agent = SearchAgent(iterations=iterations)
+    wins = Counter()
+    start = time.perf_counter()
+    for seed in range(nGames):
+        wins[coup.gameLoop([agent, MrtBot(), BayBot()], seed=seed)] += 1
+    seconds = time.perf_counter() - start
+    print(f"{nGames} games in {seconds:.1f}s: {dict(wins)}")
+    print(f"{agent.searches} searches, {agent.totalIterations / agent.searches:.0f} iterations each")
+    print(f"{agent.totalIterations / agent.searchSeconds:10.0f} iterations/sec")
+    print(f"{agent.totalTurns / agent.searchSeconds:10.0f} simulated turns/sec")
+    print(f"{agent.searchSeconds / agent.searches * 1e3:10.1f} ms/move")
+
+
+if __name__ == "__main__":
+    main()
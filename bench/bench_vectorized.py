@@ -0,0 +1,18 @@
+'''Games/sec of the vectorized simulator versus gameLoop, on a table of MrtBots and BayBots.
+
+    python bench/bench_vectorized.py [games]
+'''
+import sys
+
+from coup import tournament, vectorized
+from coup.agents.bots import MrtBot, BayBot
+
+
+if __name__ == "__main__":
+    nGames = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    table = [MrtBot, BayBot, MrtBot, BayBot]
+    base = tournament.runTournament(table, nGames // 50, seed=0)
+    print(f"{'gameLoop':12}{base.gamesPerSecond:12.0f} games/sec  {dict(base.wins)} draws={base.draws}")
+    fast = vectorized.simulate([agent() for agent in table], nGames, seed=0)
+    print(f"{'vectorized':12}{fast.gamesPerSecond:12.0f} games/sec  {dict(fast.wins)} draws={fast.draws}")
+    print(f"speedup {fast.gamesPerSecond / base.gamesPerSecond:.1f}x")
@@ -0,0 +1,202 @@
+'''Benchmark suite: engine throughput and per-bot decision latency, checked
+against a stored baseline.
+
+    python bench/suite.py                   compare with bench/baseline.json
+    python bench/suite.py --save            run, and store the results as the baseline
+    python bench/suite.py --threshold 0.1   flag anything over 10% slower
+    python bench/suite.py -k apply          only benchmarks with 'apply' in their name
+
+Every result is a time per unit (lower is better): engine functions per call,
+whole games per game for 2 to 6 players, and each bot's mean time per
+callback over a set of seeded games. A result more than threshold slower than
+its baseline is a regression, and the exit code is 1 if there are any, so the
+suite can gate CI.
+
+Changes are measured relative to a calibration loop of plain Python, timed with
+the rest, so a machine that's busier or clocked lower than when the baseline
+was saved doesn't show up as a regression everywhere. Baselines are still best
+compared on the machine they were saved on.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+from coup import coup
+from coup.coup import Role, Action, GameState, PlayerState
+from coup.instrument import Profiler
+from coup.agents.bots import RandomAgent, MrtBot, BayBot, SeanAgent
+
+default_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+latency_bots = [RandomAgent, MrtBot, BayBot, SeanAgent]
+callbacks = ['selectAction', 'selectReaction', 'selectExchangeCards', 'selectKilledCard', 'turnSummary']
+
+
+def agents(n):
+    '''n seeded RandomAgents, so the apply* benchmarks pay for real decisions.'''
+    table = [RandomAgent() for _ in range(n)]
+    coup.newGameRandom(table, 0)
+    return table
+
+def position(nPlayers=3):
+    '''A mid-game position where every action is affordable.'''
+    deck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+    table = agents(nPlayers)
+    return GameState(players=[PlayerState(cards=deck[2 * i:2 * i + 2], coins=7, agent=a, name=f"RandomAgent-{i}")
+                              for i, a in enumerate(table)],
+                     deck=coup.makeDeck(deck[2 * nPlayers:]))
+
+
+def micro(stmt, namespace, number=20000, repeat=5):
+    '''Best of repeat runs of stmt, in ns per call.'''
+    return min(timeit.repeat(stmt, globals=namespace, number=number, repeat=repeat)) / number * 1e9
+
+def calibration(quick):
+    namespace = dict(d={i: i for i in range(8)})
+    return {'calibration': (micro('for i in range(100): d[i & 7]', namespace, 200 if quick else 2000, 15), 'ns/call')}
+
+def engineBenchmarks(quick):
+    game = position()
+    summary = coup.Summary(Action.INCOME, 0, game.players[0].name)
+    rng = random.Random(0)
+    namespace = dict(coup=coup, game=game, player=game.players[0], summary=summary, rng=rng, Action=Action)
+    number = 2000 if quick else 20000
+    stmts = {
+        'findEligibleActions': 'coup.findEligibleActions(player)',
+        'getPlayerView (cached)': 'coup.getPlayerView(game, 0)',
+        'getPlayerView (cold)': 'coup._viewCache.gameState = None; coup._viewCache.states.clear(); '
+                                'coup.getPlayerView(game, 0)',
+        'applyIncome': 'coup.applyIncome(game, 0)',
+        'applyForeignAid': 'coup.applyForeignAid(game, 0)',
+        'applyTax': 'coup.applyTax(game, 0)',
+        'applySteal': 'coup.applySteal(game, 0, 1)',
+        'applyAssassinate': 'coup.applyAssassinate(game, 0, 1)',
+        'applyCoup': 'coup.applyCoup(game, 0, 1)',
+        'applyExchange': 'coup.applyExchange(game, 0, rng)',
+        'broadcastRelativeTurnSummaries': 'coup.broadcastRelativeTurnSummaries(summary, game)',
+    }
+    return {name: (micro(stmt, namespace, number), 'ns/call') for name, stmt in stmts.items()}
+
+def gameBenchmarks(quick):
+    nGames = 20 if quick else 200
+    results = {}
+    for n in range(2, 7):
+        table = [latency_bots[i % len(latency_bots)] for i in range(n)]
+        best = float('inf')
+        for _ in range(1 if quick else 3):
+            start = time.perf_counter()
+            for seed in range(nGames):
+                coup.gameLoop([factory() for factory in table], seed=seed)
+            best = min(best, time.perf_counter() - start)
+        results[f"gameLoop {n} players"] = (best / nGames * 1e6, 'us/game')
+    return results
+
+def latencyBenchmarks(quick):
+    '''Mean latency of every callback of each bot, playing the other bots in 4 player games.'''
+    nGames = 20 if quick else 200
+    results = {}
+    # The same games each time, keeping the best mean.
+    for _ in range(1 if quick else 3):
+        profiler = Profiler()
+        for seed in range(nGames):
+            table = [latency_bots[(seed + i) % len(latency_bots)] for i in range(len(latency_bots))]
+            coup.gameLoop([factory() for factory in table], seed=seed, profiler=profiler)
+        for factory in latency_bots:
+            phases = profiler.stats.get(factory.__name__, {})
+            for method in callbacks:
+                stats = phases.get(method)
+                if stats is not None and stats.count:
+                    name = f"{factory.__name__}.{method}"
+                    mean = stats.seconds / stats.count * 1e9
+                    results[name] = (min(mean, results.get(name, (mean,))[0]), 'ns/call')
+    return results
+
+suites = [calibration, engineBenchmarks, gameBenchmarks, latencyBenchmarks]
+
+
+def runSuite(quick=False, pattern=None):
+    '''{name: (value, unit)} for every benchmark, or those with pattern in their name.'''
+    results = {}
+    for suite in suites:
+        for name, result in suite(quick).items():
+            if pattern is None or pattern in name or name == 'calibration':
+                results[name] = result
+    # Calibrate again at the end, and keep the faster.
+    results['calibration'] = min(results['calibration'], calibration(quick)['calibration'])
+    return results
+
+def compare(results, baseline, threshold):
+    '''Rows of (name, unit, baseline or None, value, change) and the names that regressed.
+    change is relative to the calibration loop, when both sides have one.
+    '''
+    rows, regressions = [], []
+    scale = 1.0
+    if 'calibration' in baseline and 'calibration' in results:
+        scale = baseline['calibration']['value'] / results['calibration'][0]
+    for name, (value, unit) in results.items():
+        old = baseline.get(name)
+        if old is None:
+            rows.append((name, unit, None, value, None))
+            continue
+        if name == 'calibration':
+            change = value / old['value'] - 1
+        else:
+            change = value * scale / old['value'] - 1
+        rows.append((name, unit, old['value'], value, change))
+        if change > threshold and name != 'calibration':
+            regressions.append(name)
+    return rows, regressions
+
+def printReport(rows, regressions, threshold):
+    print(f"{'benchmark':40}{'unit':>9}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, unit, old, value, change in rows:
+        oldText = '-' if old is None else f"{old:.0f}"
+        changeText = '' if change is None else f"{change:+.1%}"
+        flag = '  REGRESSION' if name in regressions else ('  (machine speed)' if name == 'calibration' else '')
+        print(f"{name:40}{unit:>9}{oldText:>12}{value:12.0f}{changeText:>9}{flag}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {threshold:.0%}")
+    else:
+        print(f"No regressions over {threshold:.0%}")
+
+def loadBaseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['results']
+
+def saveBaseline(path, results):
+    '''Store results in the baseline at path, keeping any benchmarks that weren't run.'''
+    stored = loadBaseline(path)
+    stored.update({name: dict(value=value, unit=unit) for name, (value, unit) in results.items()})
+    with open(path, 'w') as f:
+        json.dump(dict(machine=platform.platform(), python=platform.python_version(), results=stored),
+                  f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it with a baseline.")
+    parser.add_argument('--baseline', default=default_baseline, metavar='PATH')
+    parser.add_argument('--save', action='store_true', help="Store the results as the baseline.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown, as a fraction, that counts as a regression.")
+    parser.add_argument('-k', dest='pattern', help="Only run benchmarks with this in their name.")
+    parser.add_argument('--quick', action='store_true', help="Fewer repetitions, for a smoke test.")
+    args = parser.parse_args()
+
+    results = runSuite(args.quick, args.pattern)
+    rows, regressions = compare(results, loadBaseline(args.baseline), args.threshold)
+    printReport(rows, regressions, args.threshold)
+    if args.save:
+        saveBaseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
+import random
+
 # Base Agent.
 # Custom AIs inherent from this and implement methods.
 class BaseAgent:
+    # Source of randomness for the agent's decisions. gameLoop replaces it with
+    # a seeded random.Random per game through newGame.
+    rng = random
+
     def __init__(self, **kwargs):
         pass
 
+    def newGame(self, rng):
+        '''Called before a game starts.
+        rng is a random.Random for this agent, seeded from the game's seed;
+        use it for any random choices so that games can be replayed.
+        '''
+        self.rng = rng
+
     def selectAction(self, playerView):
         '''Select an action on your turn
         playerView is a namedtuple with selfstate and opponents.
@@ -43,6 +56,19 @@ class BaseAgent:
         '''
         pass
 
+    def selectActions(self, batchView):
+        '''Batched selectAction, for playing many games at once in coup.vectorized.
+        Only needed by agents whose policy is a pure function of the view.
+        batchView is a namedtuple of NumPy arrays, one row per game:
+        coins, cards (as Role values, 0 for no card), oppCoins, oppCards
+        (opponents ordered as in playerView.opponents) and an eligible mask
+        indexed by Action value. See coup.vectorized.BatchView.
+
+        Return a tuple of integer arrays: (actions, targets), where actions are
+        Action values and targets are opponent indexes, or -1 for no target.
+        '''
+        pass
+
     def turnSummary(self, playerView, actionInfo):
         '''Summary of the just-occurred turn.
         Any return value will be discarded.
@@ -64,3 +90,32 @@ class BaseAgent:
         '''
         pass
 
+
+
+# Async Base Agent.
+# The same callbacks as BaseAgent, as coroutines, for agents that wait on a
+# remote or slow backend; see coup.asyncgame. newGame stays a plain method.
+# Wrap an ordinary BaseAgent in coup.asyncgame.SyncAgentAdapter to seat it in an async game.
+class AsyncBaseAgent:
+    rng = random
+
+    def __init__(self, **kwargs):
+        pass
+
+    def newGame(self, rng):
+        self.rng = rng
+
+    async def selectAction(self, playerView):
+        pass
+
+    async def selectReaction(self, playerView, actionInfo):
+        pass
+
+    async def selectExchangeCards(self, playerView, cards):
+        pass
+
+    async def selectKilledCard(self, playerView):
+        pass
+
+    async def turnSummary(self, playerView, actionInfo):
+        pass
@@ -0,0 +1,188 @@
+'''Beliefs about opponents' hidden cards, for agents to keep up from turnSummary:
+
+    class WaryBot(RandomAgent):
+        def newGame(self, rng):
+            super().newGame(rng)
+            self.belief = BeliefTracker()
+
+        def turnSummary(self, playerView, actionInfo):
+            self.belief.update(playerView, actionInfo)
+
+        def selectAction(self, playerView):
+            opp = playerView.opponents[0]
+            if self.belief.probability(opp.name, Role.CONTESSA) < 0.2:
+                ...
+
+For each opponent the tracker keeps a distribution over the hands they might
+hold (there are at most 15), starting from the cards dealt: every multiset of
+their size from the cards we can't see, weighted by how many ways it can be dealt.
+Each summary is then evidence:
+
+    an action       TAX, STEAL, ASSASSINATE and EXCHANGE need a DUKE, CAPTAIN,
+                    ASSASSIN and AMBASSADOR
+    a block         a blocked steal needs a CAPTAIN or AMBASSADOR, and a blocked
+                    assassination a CONTESSA; a blocked foreign aid needs a DUKE
+                    in some other hand, weighed across everyone who could have blocked
+    a lost card     seen as a drop in an opponent's cards, and taken to be
+                    either card in their hand with equal chance
+    an exchange     the player's hand is dealt afresh from the unseen cards
+
+The engine doesn't check that players hold the cards for what they do, though
+the bundled bots never bluff. bluffRate is the chance of a claim without the
+card; at 0 a claim is taken as proof.
+
+An update touches only the players in the summary (everyone but the actor for
+a blocked foreign aid), at a few dozen operations per hand. Opponents are
+looked up by name, as in playerView.opponents[i].name.
+'''
+import math
+from collections import Counter
+from itertools import combinations_with_replacement
+
+from coup.coup import Role, Action
+
+# hands[n] is every hand of n cards, as a tuple of roles in Role order.
+hands = {n: tuple(combinations_with_replacement(list(Role), n)) for n in range(3)}
+
+# The cards an action or a block claims; a block claims any one of them.
+action_claims = {Action.TAX: (Role.DUKE,),
+                 Action.STEAL: (Role.CAPTAIN,),
+                 Action.ASSASSINATE: (Role.ASSASSIN,),
+                 Action.EXCHANGE: (Role.AMBASSADOR,)}
+block_claims = {Action.FOREIGN_AID: (Role.DUKE,),
+                Action.STEAL: (Role.CAPTAIN, Role.AMBASSADOR),
+                Action.ASSASSINATE: (Role.CONTESSA,)}
+
+
+def dealWeights(pool, nCards):
+    '''The chance of being dealt each hand of nCards from pool (a Counter of roles).'''
+    weights = {}
+    for hand in hands[nCards]:
+        w = 1
+        for role, count in Counter(hand).items():
+            w *= math.comb(pool[role], count)
+        if w:
+            weights[hand] = w
+    return normalized(weights)
+
+def normalized(weights):
+    total = sum(weights.values())
+    return {hand: w / total for hand, w in weights.items() if w} if total else {}
+
+def holds(hand, claims):
+    return any(role in hand for role in claims)
+
+
+class BeliefTracker:
+    def __init__(self, bluffRate=0.0):
+        self.bluffRate = bluffRate
+        self.reset()
+
+    def reset(self):
+        '''Forget everything, for a new game.'''
+        # name -> {hand: probability}
+        self.beliefs = {}
+        self.name = None
+        self.ownCards = ()
+        # Cards we returned to the deck, until someone else exchanges.
+        self.inDeck = Counter()
+
+    def unseen(self):
+        pool = Counter({role: 3 for role in Role})
+        pool.subtract(self.ownCards)
+        pool.subtract(self.inDeck)
+        return pool
+
+    def see(self, playerView):
+        '''Catch up with playerView: start tracking on the first view, and
+        account for any cards opponents have lost since the last.
+        '''
+        self.ownCards = tuple(playerView.selfstate.cards)
+        if self.name is None:
+            self.name = playerView.selfstate.name
+            pool = self.unseen()
+            self.beliefs = {opp.name: dealWeights(pool, opp.cards) for opp in playerView.opponents}
+            return
+        alive = {opp.name: opp.cards for opp in playerView.opponents}
+        for name in [name for name in self.beliefs if name not in alive]:
+            del self.beliefs[name]
+        for name, nCards in alive.items():
+            belief = self.beliefs[name]
+            while belief and len(next(iter(belief))) > nCards:
+                belief = self.loseCard(belief)
+            self.beliefs[name] = belief
+
+    @staticmethod
+    def loseCard(belief):
+        lost = {}
+        for hand, p in belief.items():
+            for i in range(len(hand)):
+                rest = hand[:i] + hand[i + 1:]
+                lost[rest] = lost.get(rest, 0.0) + p / len(hand)
+        return lost
+
+    def claim(self, name, claims, othersLikelihood=0.0):
+        '''Evidence that name holds one of claims. othersLikelihood is the chance
+        of the evidence if they don't (from a bluff, or someone else's card).
+        '''
+        belief = self.beliefs.get(name)
+        if not belief:
+            return
+        miss = max(self.bluffRate, othersLikelihood)
+        updated = normalized({hand: p if holds(hand, claims) else p * miss for hand, p in belief.items()})
+        # Evidence the model can't explain (a bluff, at bluffRate 0) starts the player afresh.
+        self.beliefs[name] = updated or dealWeights(self.unseen(), len(next(iter(belief))))
+
+    def blockedForeignAid(self, actor):
+        # Anyone but the actor could have blocked, us included.
+        if self.name != actor and Role.DUKE in self.ownCards:
+            return
+        candidates = [name for name in self.beliefs if name != actor]
+        noDuke = {name: 1.0 - self.probability(name, Role.DUKE) for name in candidates}
+        for name in candidates:
+            othersNone = math.prod(q for other, q in noDuke.items() if other != name)
+            self.claim(name, (Role.DUKE,), 1.0 - othersNone)
+
+    def update(self, playerView, actionInfo):
+        '''Take in a turnSummary: its playerView and actionInfo.'''
+        if self.name is None:
+            self.see(playerView)
+        action, actor = actionInfo.action, actionInfo.activeName
+        target = getattr(actionInfo, 'targetName', None)
+        blocked = getattr(actionInfo, 'success', True) is False
+        if actor != self.name and action in action_claims:
+            self.claim(actor, action_claims[action])
+        if blocked:
+            if action == Action.FOREIGN_AID:
+                self.blockedForeignAid(actor)
+            elif target != self.name:
+                self.claim(target, block_claims[action])
+        if action == Action.EXCHANGE and actor != self.name:
+            self.inDeck = Counter()
+            if actor in self.beliefs:
+                self.beliefs[actor] = dealWeights(self.unseen(), len(next(iter(self.beliefs[actor]))))
+        self.see(playerView)
+
+    def exchanged(self, cards, kept):
+        '''Call from selectExchangeCards with the cards offered and those kept,
+        to note the cards going back to the deck.
+        '''
+        returned = Counter(cards)
+        returned.subtract(kept[:len(cards) - 2])
+        self.inDeck = +returned
+
+    def hand(self, name):
+        '''{hand: probability} for an opponent, with hands as tuples of roles in Role order.'''
+        return dict(self.beliefs.get(name, {}))
+
+    def probability(self, name, role):
+        '''The chance an opponent holds at least one role.'''
+        return sum(p for hand, p in self.beliefs.get(name, {}).items() if role in hand)
+
+    def expectedCount(self, name, role):
+        return sum(p * hand.count(role) for hand, p in self.beliefs.get(name, {}).items())
+
+    def mostLikely(self, name):
+        '''The most likely hand of an opponent, or None for one we aren't tracking.'''
+        belief = self.beliefs.get(name)
+        return max(belief, key=belief.get) if belief else None
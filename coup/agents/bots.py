@@ -1,19 +1,19 @@
-from agents.agent import BaseAgent
-import coup
+from coup.agents.agent import BaseAgent
+from coup import coup
 
-import random
 
 class RandomAgent(BaseAgent):
     # Returns a random eligible action.
     def selectAction(self, playerView):
         action_list = coup.findEligibleActions(playerView.selfstate)
-        action = random.sample(action_list, 1)[0]
+        # Sets can't be sampled directly, so order them first.
+        action = self.rng.choice(sorted(action_list, key=lambda x: x.value))
 
         if action in [coup.Action.ASSASSINATE, coup.Action.COUP]:
-            target = random.randint(0, (len(playerView.opponents)) - 1)
+            target = self.rng.randint(0, (len(playerView.opponents)) - 1)
         elif action == coup.Action.STEAL:
             try:
-                target = random.choice([i for i, opp in enumerate(playerView.opponents) if opp.coins >= 2])
+                target = self.rng.choice([i for i, opp in enumerate(playerView.opponents) if opp.coins >= 2])
             except IndexError:
                 # No opponents, retry
                 return self.selectAction(playerView)
@@ -23,8 +23,7 @@ class RandomAgent(BaseAgent):
 
     # Returns a blocking reaction if possible.
     def selectReaction(self, playerView, actionInfo):
-        reactions = set([act for card in playerView.selfstate.cards for act in coup.available_actions[coup.Role[card.name]]
-                        if isinstance(act, coup.Reaction)])
+        reactions = coup.findEligibleReactions(playerView.selfstate)
 
         if actionInfo[0].name == "STEAL":
             if coup.Reaction.BLOCK_STEAL in reactions:
@@ -35,17 +34,17 @@ class RandomAgent(BaseAgent):
                 return True
             return None
         elif actionInfo[0].name == "FOREIGN_AID":
-            if len(list(filter(lambda x: x.name == 'BLOCK_FOREIGN_AID', reactions))):
+            if coup.Reaction.BLOCK_FOREIGN_AID in reactions:
                 return True
             return None
 
     # Returns a random selection of cards.
     def selectExchangeCards(self, playerView, cards):
-        return random.sample(cards, len(playerView.selfstate.cards))
+        return self.rng.sample(cards, len(playerView.selfstate.cards))
 
     # Returns a random card from hand.
     def selectKilledCard(self, playerView):
-        return random.choice(playerView.selfstate.cards)
+        return self.rng.choice(playerView.selfstate.cards)
 
 
 class MrtBot(RandomAgent):
@@ -87,6 +86,26 @@ class MrtBot(RandomAgent):
             return (coup.Action.EXCHANGE, None)
         return (coup.Action.INCOME, None)
 
+    # Cards in the order they're kept by selectKilledCard, for the vectorized simulator.
+    card_preferences = ["CONTESSA", "ASSASSIN", "DUKE", "CAPTAIN", "AMBASSADOR"]
+
+    def selectActions(self, batchView):
+        import numpy as np
+        from coup.vectorized import firstIndex, NO_TARGET
+
+        eligible = batchView.eligible
+        actions = np.full(len(eligible), coup.Action.INCOME.value)
+        # Later choices take priority, as the early returns do in selectAction.
+        for action in [coup.Action.EXCHANGE, coup.Action.TAX, coup.Action.ASSASSINATE, coup.Action.COUP]:
+            actions = np.where(eligible[:, action.value], action.value, actions)
+
+        cards, coins = batchView.oppCards, batchView.oppCoins
+        targets = firstIndex(cards == 2, 0)
+        targets = np.where((coins >= 6).any(axis=1), firstIndex(coins >= 6), targets)
+        targets = np.where(((cards == 2) & (coins >= 7)).any(axis=1), firstIndex((cards == 2) & (coins >= 7)), targets)
+        attacking = (actions == coup.Action.COUP.value) | (actions == coup.Action.ASSASSINATE.value)
+        return actions, np.where(attacking, targets, NO_TARGET)
+
 
     def selectExchangeCards(self, playerView, cards):
         cardnames = list(map(lambda x: x.name, cards))
@@ -112,7 +131,6 @@ class MrtBot(RandomAgent):
                 selects.append(coup.Role.CAPTAIN)
         if "AMBASSADOR" in cardnames:
                 selects.append(coup.Role.AMBASSADOR)
-        print(selects[:n_to_select])
         return selects[:n_to_select]
 
     def selectKilledCard(self, playerView):
@@ -184,10 +202,25 @@ class BayBot(BaseAgent):
 
         return (action, target)
 
+    def selectActions(self, batchView):
+        import numpy as np
+        from coup.vectorized import NO_TARGET
+
+        eligible = batchView.eligible
+        actions = np.zeros(len(eligible), dtype=int)
+        for name in reversed(self.action_preferences):
+            action = coup.Action[name]
+            actions = np.where(eligible[:, action.value], action.value, actions)
+
+        # Strongest live opponent, breaking ties towards the last, as the reversed sort does.
+        strength = np.where(batchView.oppCards > 0, batchView.oppCards * 10 + batchView.oppCoins, -1)
+        targets = strength.shape[1] - 1 - strength[:, ::-1].argmax(axis=1)
+        targeted = np.isin(actions, [coup.Action[name].value for name in ["ASSASSINATE", "COUP", "STEAL"]])
+        return actions, np.where(targeted, targets, NO_TARGET)
+
 
     def selectReaction(self, playerView, actionInfo):
-        reactions = set([act for card in playerView.selfstate.cards for act in coup.available_actions[coup.Role[card.name]]
-                        if isinstance(act, coup.Reaction)])
+        reactions = coup.findEligibleReactions(playerView.selfstate)
 
         if actionInfo[0].name == "STEAL":
             if coup.Reaction.BLOCK_STEAL in reactions:
@@ -198,7 +231,7 @@ class BayBot(BaseAgent):
                 return True
             return None
         elif actionInfo[0].name == "FOREIGN_AID":
-            if len(list(filter(lambda x: x.name == 'BLOCK_FOREIGN_AID', reactions))):
+            if coup.Reaction.BLOCK_FOREIGN_AID in reactions:
                 return True
             return None
 
@@ -236,14 +269,14 @@ class SeanAgent(RandomAgent):
 
         if action.value == coup.Action.INCOME.value:
             # Choose foreign aid once in a while randomly
-            if random.random() > 0.5:
+            if self.rng.random() > 0.5:
                 action = coup.Action.FOREIGN_AID
 
         if action in [coup.Action.ASSASSINATE, coup.Action.COUP]:
-            target = random.randint(0, (len(playerView.opponents)) - 1)
+            target = self.rng.randint(0, (len(playerView.opponents)) - 1)
         elif action == coup.Action.STEAL:
             try:
-                target = random.choice([i for i, opp in enumerate(playerView.opponents) if opp.coins >= 2])
+                target = self.rng.choice([i for i, opp in enumerate(playerView.opponents) if opp.coins >= 2])
             except IndexError:
                 action = coup.Action.INCOME
                 if coup.Action.TAX in action_list:
@@ -267,7 +300,7 @@ class SeanAgent(RandomAgent):
                 return [coup.Role.AMBASSADOR]
             if coup.Role.ASSASSIN.value in card_nums:
                 return [coup.Role.ASSASSIN]
-            return random.sample(cards, len(playerView.selfstate.cards))
+            return self.rng.sample(cards, len(playerView.selfstate.cards))
 
         # Ordering of best
         if coup.Role.DUKE.value in card_nums and coup.Role.CONTESSA.value in card_nums:
@@ -280,7 +313,7 @@ class SeanAgent(RandomAgent):
             return [coup.Role.DUKE, coup.Role.ASSASSIN]
         if coup.Role.DUKE.value in card_nums and coup.Role.AMBASSADOR.value in card_nums:
             return [coup.Role.DUKE, coup.Role.AMBASSADOR]
-        return random.sample(cards, len(playerView.selfstate.cards))
+        return self.rng.sample(cards, len(playerView.selfstate.cards))
 
     def selectKilledCard(self, playerView):
         og_cards = playerView.selfstate.cards
@@ -303,7 +336,7 @@ class SeanAgent(RandomAgent):
         if i >= 0:
             return og_cards[i]
 
-        return random.choice(playerView.selfstate.cards)
+        return self.rng.choice(playerView.selfstate.cards)
 
     def _save_role(self, role, cards):
         try:
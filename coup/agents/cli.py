@@ -1,4 +1,4 @@
-import coup
+from coup import coup
 
 moneyEmoji = "💰"
 cardEmoji = "🃏"
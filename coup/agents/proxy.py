@@ -0,0 +1,36 @@
+from coup.agents.agent import BaseAgent
+
+# Agent proxies wrap another agent and stand in for it in a game, e.g. to time,
+# record or sandbox its decisions. The wrapped agent is kept as .wrapped, so
+# the engine can still name players after the real agent (see coup.agentTypeName).
+class AgentProxy(BaseAgent):
+    def __init__(self, wrapped, **kwargs):
+        self.wrapped = wrapped
+
+    def call(self, method, *args):
+        '''Every callback goes through here. Subclasses override this to
+        wrap the call to the real agent's method.
+        '''
+        return getattr(self.wrapped, method)(*args)
+
+    def newGame(self, rng):
+        if hasattr(self.wrapped, 'newGame'):
+            return self.call('newGame', rng)
+
+    def selectAction(self, playerView):
+        return self.call('selectAction', playerView)
+
+    def selectReaction(self, playerView, actionInfo):
+        return self.call('selectReaction', playerView, actionInfo)
+
+    def selectExchangeCards(self, playerView, cards):
+        return self.call('selectExchangeCards', playerView, cards)
+
+    def selectKilledCard(self, playerView):
+        return self.call('selectKilledCard', playerView)
+
+    def selectActions(self, batchView):
+        return self.call('selectActions', batchView)
+
+    def turnSummary(self, playerView, actionInfo):
+        return self.call('turnSummary', playerView, actionInfo)
@@ -0,0 +1,255 @@
+'''Search-based agent: information set Monte Carlo tree search over the engine.
+Each iteration deals the unseen cards at random (a determinization: the
+opponents' hands and the deck drawn from the cards not in our hand, in the
+right numbers), then walks a tree of positions with UCB, playing moves through
+the engine's pure transitions (coup.resolveX), and finishes the game with a
+random rollout.
+
+Statistics for our own move are shared by every determinization. Below that,
+nodes are information sets, kept in a transposition table keyed on the infoset
+hash of the player to move (see coup.zobrist): everyone's coins and card
+counts, seated from the mover, and the mover's own hand, but not the other
+hands or the deck. So determinizations that differ only in what the mover
+can't see share a node, as do move orders that reach the same one. The table
+is LRU, and is kept between moves of a game. Moves are stored relative to the
+player to move, as selectAction returns them.
+
+Only actions are searched. Reactions, lost cards and exchanges follow
+RandomAgent's rules (block whenever possible, otherwise random) during search,
+and the agent itself plays them by card_preferences.
+'''
+import math
+import time
+from collections import Counter, OrderedDict
+
+from coup import coup
+from coup.coup import Role, Action, Reaction, GameState, PlayerState, targeted_actions
+from coup.agents.agent import BaseAgent
+from coup.agents.bots import RandomAgent
+from coup.zobrist import infosetHash
+
+deck_size = 15
+
+# The reaction that blocks each action, for actions that can be blocked.
+blocking_reactions = {Action.FOREIGN_AID: Reaction.BLOCK_FOREIGN_AID,
+                      Action.STEAL: Reaction.BLOCK_STEAL,
+                      Action.ASSASSINATE: Reaction.BLOCK_ASSASSINATION}
+
+
+# legal_moves[eligible actions, number of players] is built the first time it's needed.
+legal_moves = {}
+
+def legalMoves(gameState, mover):
+    '''Every (action, target) open to players[mover], with target relative to
+    the mover, as an index into their playerView.opponents.
+    '''
+    key = coup.findEligibleActions(gameState.players[mover]), len(gameState.players)
+    moves = legal_moves.get(key)
+    if moves is None:
+        moves = []
+        for action in sorted(key[0], key=lambda a: a.value):
+            if action in targeted_actions:
+                moves.extend((action, t) for t in range(key[1] - 1))
+            else:
+                moves.append((action, None))
+        moves = legal_moves[key] = tuple(moves)
+    return moves
+
+
+def simulateAction(gameState, mover, action, target, rng):
+    '''applyAction without agents: every player blocks whenever they can, and
+    lost and exchanged cards are picked at random, as RandomAgent does.
+    target is an index into players.
+    '''
+    players = gameState.players
+    if action == Action.FOREIGN_AID:
+        blocked = any(Reaction.BLOCK_FOREIGN_AID in coup.findEligibleReactions(p)
+                      for i, p in enumerate(players) if i != mover)
+        return coup.resolveForeignAid(gameState, mover, blocked)
+    elif action == Action.STEAL:
+        blocked = Reaction.BLOCK_STEAL in coup.findEligibleReactions(players[target])
+        return coup.resolveSteal(gameState, mover, target, blocked)
+    elif action == Action.ASSASSINATE:
+        blocked = Reaction.BLOCK_ASSASSINATION in coup.findEligibleReactions(players[target])
+        killedCard = None if blocked else rng.choice(players[target].cards)
+        return coup.resolveAssassinate(gameState, mover, target, blocked, killedCard)
+    elif action == Action.COUP:
+        return coup.resolveCoup(gameState, mover, target, rng.choice(players[target].cards))
+    elif action == Action.EXCHANGE:
+        hand = players[mover].cards
+        drawn, _ = coup.getCardsFromDeck(gameState, 2, rng)
+        return coup.resolveExchange(gameState, mover, drawn, rng.sample(drawn + hand, len(hand)))
+    return coup.resolveAction(gameState, mover, action)
+
+
+class TranspositionTable:
+    '''Move statistics per position, evicting the least recently used beyond maxSize.
+    A node is a dict of move -> [visits, wins for the player to move], with the
+    node's total visits under None.
+    '''
+    def __init__(self, maxSize=100000):
+        self.maxSize = maxSize
+        self.nodes = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key):
+        node = self.nodes.get(key)
+        if node is not None:
+            self.nodes.move_to_end(key)
+        return node
+
+    def add(self, key):
+        node = self.nodes[key] = {None: 0}
+        if len(self.nodes) > self.maxSize:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+        return node
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def selectMove(node, moves, exploration, rng):
+    '''An untried move if there is one, otherwise the move with the best UCB score.'''
+    untried = [m for m in moves if m not in node]
+    if untried:
+        return rng.choice(untried)
+    logTotal = math.log(node[None])
+    best, bestScore = None, -1.0
+    for move in moves:
+        visits, wins = node[move]
+        score = wins / visits + exploration * math.sqrt(logTotal / visits)
+        if score > bestScore:
+            best, bestScore = move, score
+    return best
+
+def update(node, move, won):
+    stats = node.get(move)
+    if stats is None:
+        stats = node[move] = [0, 0.0]
+    stats[0] += 1
+    stats[1] += won
+    node[None] += 1
+
+
+class SearchAgent(BaseAgent):
+    '''ISMCTS agent. Each move gets iterations iterations, or as many as fit in
+    seconds if that's set (whichever runs out first), and always at least one.
+    '''
+    card_preferences = ["CONTESSA", "ASSASSIN", "DUKE", "CAPTAIN", "AMBASSADOR"]
+
+    def __init__(self, iterations=200, seconds=None, tableSize=100000, exploration=0.7,
+                 rolloutTurns=200, **kwargs):
+        self.iterations = iterations
+        self.seconds = seconds
+        self.exploration = exploration
+        self.rolloutTurns = rolloutTurns
+        self.table = TranspositionTable(tableSize)
+        self.startPlayers = None
+        # Totals over every search, for benchmarking.
+        self.searches = 0
+        self.totalIterations = 0
+        self.totalTurns = 0
+        self.searchSeconds = 0.0
+
+    def newGame(self, rng):
+        super().newGame(rng)
+        self.table = TranspositionTable(self.table.maxSize)
+        self.startPlayers = None
+
+    def seeTable(self, playerView):
+        # Nobody can be knocked out before the first turn ends, so the first view shows every player.
+        if self.startPlayers is None:
+            self.startPlayers = len(playerView.opponents) + 1
+
+    def determinize(self, playerView, rng):
+        '''A random GameState consistent with playerView, with us as player 0.'''
+        self.seeTable(playerView)
+        unseen = Counter({role: 3 for role in Role})
+        unseen.subtract(playerView.selfstate.cards)
+        pool = sorted(unseen.elements(), key=lambda c: c.value)
+        rng.shuffle(pool)
+        players = [PlayerState(list(playerView.selfstate.cards), playerView.selfstate.coins,
+                               None, playerView.selfstate.name)]
+        for opp in playerView.opponents:
+            players.append(PlayerState(pool[:opp.cards], opp.coins, None, opp.name))
+            del pool[:opp.cards]
+        return GameState(players=players, deck=coup.makeDeck(pool[:deck_size - 2 * self.startPlayers]))
+
+    def iterate(self, root, rootMoves, playerView, rng):
+        gameState = self.determinize(playerView, rng)
+        turns = 0
+        path = [(root, selectMove(root, rootMoves, self.exploration, rng), gameState.players[0].name)]
+        move = path[0][1]
+        expanding = True
+        while True:
+            n = len(gameState.players)
+            mover = turns % n
+            action, target = move
+            gameState, _ = simulateAction(gameState, mover, action,
+                                          None if target is None else (mover + target + 1) % n, rng)
+            turns += 1
+            if len(gameState.players) == 1 or turns > self.rolloutTurns:
+                break
+            mover = turns % len(gameState.players)
+            moves = legalMoves(gameState, mover)
+            if expanding:
+                key = infosetHash(gameState, mover)
+                node = self.table.get(key)
+                if node is None:
+                    node = self.table.add(key)
+                    expanding = False
+                move = selectMove(node, moves, self.exploration, rng)
+                path.append((node, move, gameState.players[mover].name))
+            else:
+                move = rng.choice(moves)
+        self.totalTurns += turns
+
+        if len(gameState.players) == 1:
+            winners = {gameState.players[0].name: 1.0}
+        else:
+            # Out of turns: share the win between the players left.
+            winners = {p.name: 1.0 / len(gameState.players) for p in gameState.players}
+        for node, move, name in path:
+            update(node, move, winners.get(name, 0.0))
+
+    def search(self, playerView):
+        '''Move statistics for our turn: a dict of (action, target) -> [visits, wins].'''
+        rng = self.rng
+        start = time.perf_counter()
+        root = {None: 0}
+        rootMoves = legalMoves(self.determinize(playerView, rng), 0)
+        iterations = 0
+        # The clock is checked after an iteration, so the root always has a move to pick.
+        while True:
+            self.iterate(root, rootMoves, playerView, rng)
+            iterations += 1
+            if iterations >= self.iterations:
+                break
+            if self.seconds is not None and time.perf_counter() - start > self.seconds:
+                break
+        self.searches += 1
+        self.totalIterations += iterations
+        self.searchSeconds += time.perf_counter() - start
+        return root
+
+    def selectAction(self, playerView):
+        root = self.search(playerView)
+        # The most visited move.
+        return max((m for m in root if m is not None), key=lambda m: root[m][0])
+
+    def selectReaction(self, playerView, actionInfo):
+        # There's no challenging, so blocking is free.
+        return RandomAgent.selectReaction(self, playerView, actionInfo)
+
+    def rank(self, card):
+        return self.card_preferences.index(card.name)
+
+    def selectExchangeCards(self, playerView, cards):
+        return sorted(cards, key=self.rank)[:len(playerView.selfstate.cards)]
+
+    def selectKilledCard(self, playerView):
+        return max(playerView.selfstate.cards, key=self.rank)
+
+    def turnSummary(self, playerView, actionInfo):
+        self.seeTable(playerView)
@@ -0,0 +1,66 @@
+'''Bots that play policies saved by coup.selfplay.
+A snapshot is an .npz file of an MLP's layers (w0, b0, w1, b1, ...), and plays
+the legal action with the highest logit, with RandomAgent's rules for
+everything else. At a table with more opponents than the policy was trained
+for, it only sees (and targets) the first of them.
+
+snapshotBots finds the snapshots in a directory, as bots named after their
+files. cligame adds those in $COUP_SNAPSHOTS to its bots, so they can be picked
+for games, tournaments and leagues like any other. NumPy is only needed once
+one is played.
+'''
+import functools
+import os
+
+from coup.agents.bots import RandomAgent
+
+_policies = {}
+
+def loadPolicy(path):
+    '''The MLPPolicy saved at path, loaded once per process.'''
+    policy = _policies.get(path)
+    if policy is None:
+        import numpy as np
+        from coup.broker import MLPPolicy
+
+        with np.load(path) as f:
+            policy = _policies[path] = MLPPolicy([(f[f'w{i}'], f[f'b{i}']) for i in range(len(f.files) // 2)])
+    return policy
+
+def snapshotName(path):
+    # Player names are split on '-' to get the bot's name, so it can't have one.
+    return os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+
+
+class SnapshotAgent(RandomAgent):
+    def __init__(self, path):
+        import numpy as np
+
+        self.policy = loadPolicy(path)
+        self.typeName = snapshotName(path)
+        self.nOpponents = self.policy.nOpponents
+        self.obs = np.zeros((1, self.policy.layers[0][0].shape[0]), dtype=np.float32)
+        self.masks = {}
+
+    def selectAction(self, playerView):
+        from coup.env import encodeView, actionMask, decodeAction
+
+        playerView = playerView._replace(opponents=playerView.opponents[:self.nOpponents])
+        encodeView(playerView, self.obs[0])
+        mask = actionMask(playerView, self.nOpponents, self.masks)
+        return decodeAction(int(self.policy.act(self.obs, mask[None])[0]), self.nOpponents)
+
+
+def snapshotBot(path):
+    '''A picklable factory for the snapshot at path, named like an agent class.'''
+    factory = functools.partial(SnapshotAgent, os.path.abspath(path))
+    factory.__name__ = snapshotName(path)
+    return factory
+
+def snapshotBots(directory):
+    '''{name: factory} for every snapshot in directory, oldest first.'''
+    if not directory or not os.path.isdir(directory):
+        return {}
+    paths = sorted((os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.npz')),
+                   key=os.path.getmtime)
+    return {snapshotName(path): snapshotBot(path) for path in paths}
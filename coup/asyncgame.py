@@ -0,0 +1,148 @@
+'''Async variant of the engine, for agents that call out to remote or slow backends.
+Agents implement coup.agents.agent.AsyncBaseAgent, so a game waiting on one of
+them yields to the event loop, and thousands of games can interleave on one thread:
+
+    agents = lambda: [SyncAgentAdapter(MrtBot()), RemoteBot(url)]
+    winners = await asyncio.gather(*(gameLoop(agents(), seed=s) for s in range(1000)))
+
+Reactions to foreign aid and turn summaries don't depend on each other, so
+they're gathered concurrently. Otherwise the rules are those of coup.py, and with
+the same seed and (sync-wrapped) agents a game plays exactly as coup.gameLoop does.
+'''
+import asyncio
+import random
+
+from coup import coup
+from coup.coup import Action, getPlayerView
+from coup.agents.agent import AsyncBaseAgent
+
+
+class SyncAgentAdapter(AsyncBaseAgent):
+    '''Seats an ordinary BaseAgent in an async game.
+    Calls run inline, which suits bots that decide in microseconds. Pass an
+    executor (e.g. a ThreadPoolExecutor) for a bot that blocks, such as
+    CLInteractiveAgent, to run its calls off the event loop.
+    '''
+    def __init__(self, wrapped, executor=None, **kwargs):
+        self.wrapped = wrapped
+        self.executor = executor
+
+    async def call(self, method, *args):
+        if self.executor is None:
+            return getattr(self.wrapped, method)(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+                self.executor, getattr(self.wrapped, method), *args)
+
+    def newGame(self, rng):
+        if hasattr(self.wrapped, 'newGame'):
+            self.wrapped.newGame(rng)
+
+    async def selectAction(self, playerView):
+        return await self.call('selectAction', playerView)
+
+    async def selectReaction(self, playerView, actionInfo):
+        return await self.call('selectReaction', playerView, actionInfo)
+
+    async def selectExchangeCards(self, playerView, cards):
+        return await self.call('selectExchangeCards', playerView, cards)
+
+    async def selectKilledCard(self, playerView):
+        return await self.call('selectKilledCard', playerView)
+
+    async def turnSummary(self, playerView, actionInfo):
+        return await self.call('turnSummary', playerView, actionInfo)
+
+
+# Like coup's applyX functions, these gather the decisions from the agents and
+# leave the rules to coup's resolveX transitions.
+
+async def applyForeignAid(gameState, activePlayer):
+    playerList = gameState.players
+    player = playerList[activePlayer]
+    # All opponents get the opporunity to block, at the same time.
+    blockAttempt = await asyncio.gather(*(opp.agent.selectReaction(getPlayerView(gameState, i),
+                                    (Action.FOREIGN_AID, (activePlayer - i - 1) % len(playerList)))
+                        for i, opp in enumerate(playerList) if opp is not player))
+    return coup.resolveForeignAid(gameState, activePlayer, any(blockAttempt))
+
+async def applySteal(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    blockAttempt = await target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
+                                    (Action.STEAL, (activePlayer - targetPlayer - 1) % len(gameState.players)))
+    return coup.resolveSteal(gameState, activePlayer, targetPlayer, bool(blockAttempt))
+
+async def applyAssassinate(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    blockAttempt = await target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
+                                (Action.ASSASSINATE, (activePlayer - targetPlayer - 1) % len(gameState.players)))
+    killedCard = None
+    if not blockAttempt:
+        killedCard = await target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer))
+    return coup.resolveAssassinate(gameState, activePlayer, targetPlayer, bool(blockAttempt), killedCard)
+
+async def applyCoup(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    killedCard = await target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer))
+    return coup.resolveCoup(gameState, activePlayer, targetPlayer, killedCard)
+
+async def applyExchange(gameState, activePlayer, rng=random):
+    player = gameState.players[activePlayer]
+    drawn, drawnState = coup.getCardsFromDeck(gameState, 2, rng)
+    selected = await player.agent.selectExchangeCards(getPlayerView(drawnState, activePlayer), drawn + player.cards)
+    return coup.resolveExchange(gameState, activePlayer, drawn, selected)
+
+async def applyAction(gameState, activePlayer, action, targetPlayer=None, rng=random):
+    player = gameState.players[activePlayer]
+    assert coup.canAffordAction(player, action)
+
+    if action == Action.INCOME:
+        return coup.resolveIncome(gameState, activePlayer)
+
+    elif action == Action.FOREIGN_AID:
+        return await applyForeignAid(gameState, activePlayer)
+
+    elif action == Action.TAX:
+        return coup.resolveTax(gameState, activePlayer)
+
+    elif action == Action.STEAL:
+        return await applySteal(gameState, activePlayer, targetPlayer)
+
+    elif action == Action.EXCHANGE:
+        return await applyExchange(gameState, activePlayer, rng)
+
+    elif action == Action.ASSASSINATE:
+        return await applyAssassinate(gameState, activePlayer, targetPlayer)
+
+    elif action == Action.COUP:
+        return await applyCoup(gameState, activePlayer, targetPlayer)
+
+async def broadcastRelativeTurnSummaries(turnSummary, gameState):
+    nPlayers = len(gameState.players)
+    await asyncio.gather(*(player.agent.turnSummary(getPlayerView(gameState, i),
+                                                    coup.relativeTurnSummary(turnSummary, i, nPlayers))
+                           for i, player in enumerate(gameState.players)))
+
+# Play a game between AsyncBaseAgents, returning the name of the winner (or None if it hit the turn limit).
+async def gameLoop(agents, seed=None):
+    baseDeck = [coup.Role.DUKE, coup.Role.ASSASSIN, coup.Role.CONTESSA, coup.Role.AMBASSADOR, coup.Role.CAPTAIN] * 3
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = coup.newGameRandom(agents, seed)
+
+    gameState = coup.dealGame(baseDeck, agents, rng)
+    turns = 0
+    while len(gameState.players) > 1:
+        if (turns > 1000):
+            return None
+        i = turns % len(gameState.players)
+        player = gameState.players[i].agent
+        action, relativeTarget = await player.selectAction(getPlayerView(gameState, i))
+        if relativeTarget is not None:
+            target = (i + relativeTarget + 1) % len(gameState.players)
+        else:
+            target = None
+        gameState, turnSummary = await applyAction(gameState, i, action, target, rng)
+        await broadcastRelativeTurnSummaries(turnSummary, gameState)
+        turns += 1
+    winner_name = gameState.players[0].name
+    return(winner_name.split('-')[0])
@@ -0,0 +1,124 @@
+'''Per-call time budgets for agents.
+BudgetedAgent runs an agent's callbacks on a worker thread and, when a call
+overruns its budget, plays a fallback move for it instead:
+
+    selectAction         income (or a coup on the next player, when forced to coup)
+    selectReaction       don't block
+    selectExchangeCards  keep the current hand
+    selectKilledCard     lose the last card in hand
+    turnSummary          ignored
+
+A thread can't be killed, so an overrunning call is left to finish on its own
+(daemon) thread and its result is thrown away. As it's still using the agent
+(and maybe the game's rng), the agent isn't called again for the rest of the
+game: every later callback plays its fallback, and is counted as skipped. The
+agent is used again from the next newGame, if the stuck call has finished by then.
+'''
+import threading
+import time
+import queue
+from collections import Counter
+from concurrent import futures
+
+from coup import coup
+from coup.coup import Action
+from coup.agents.proxy import AgentProxy
+
+budgeted_methods = ['selectAction', 'selectReaction', 'selectExchangeCards',
+                    'selectKilledCard', 'turnSummary']
+
+
+def fallbackAction(playerView):
+    if Action.INCOME in coup.findEligibleActions(playerView.selfstate):
+        return (Action.INCOME, None)
+    return (Action.COUP, 0)
+
+fallbacks = dict(
+    selectAction=fallbackAction,
+    selectReaction=lambda playerView, actionInfo: False,
+    selectExchangeCards=lambda playerView, cards: list(playerView.selfstate.cards),
+    selectKilledCard=lambda playerView: playerView.selfstate.cards[-1],
+    turnSummary=lambda playerView, actionInfo: None,
+)
+
+
+class _Worker:
+    '''A daemon thread running calls from a queue, one at a time.'''
+    def __init__(self):
+        self.calls = queue.SimpleQueue()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while True:
+            future, fn, args = self.calls.get()
+            if future is None:
+                return
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args):
+        future = futures.Future()
+        self.calls.put((future, fn, args))
+        return future
+
+    def stop(self):
+        self.calls.put((None, None, None))
+
+
+class BudgetedAgent(AgentProxy):
+    '''Wraps an agent so that each callback gets at most timeout seconds.
+    budgets maps callback names to their own limits, overriding timeout
+    (None means no limit for that callback).
+    '''
+    def __init__(self, wrapped, timeout=1.0, budgets=None, **kwargs):
+        super().__init__(wrapped)
+        self.budgets = {method: timeout for method in budgeted_methods}
+        self.budgets.update(budgets or {})
+        self.calls = Counter()
+        self.timeouts = Counter()
+        self.skipped = Counter()
+        self.maxSeconds = {}
+        self.worker = None
+        # The call that overran, while the agent is given up on.
+        self.stuck = None
+
+    def call(self, method, *args):
+        if self.stuck is not None:
+            if method == 'newGame' and self.stuck.done():
+                self.stuck = None
+            else:
+                self.skipped[method] += 1
+                return fallbacks[method](*args) if method in fallbacks else None
+        budget = self.budgets.get(method)
+        if budget is None:
+            return getattr(self.wrapped, method)(*args)
+        if self.worker is None:
+            self.worker = _Worker()
+        start = time.perf_counter()
+        future = self.worker.submit(getattr(self.wrapped, method), *args)
+        self.calls[method] += 1
+        try:
+            result = future.result(timeout=budget)
+        except futures.TimeoutError:
+            # Leave the stuck thread behind, and start a fresh one for the next call.
+            self.worker.stop()
+            self.worker = None
+            self.stuck = future
+            self.timeouts[method] += 1
+            result = fallbacks[method](*args)
+        seconds = time.perf_counter() - start
+        self.maxSeconds[method] = max(self.maxSeconds.get(method, 0.0), seconds)
+        return result
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def timeoutStats(self):
+        '''Calls, timeouts and calls skipped after a timeout per callback.'''
+        return {method: dict(calls=self.calls[method], timeouts=self.timeouts[method],
+                             skipped=self.skipped[method], maxSeconds=self.maxSeconds.get(method, 0.0))
+                for method in budgeted_methods if self.calls[method] or self.skipped[method]}
@@ -1,15 +1,21 @@
-import coup
-from agents.bots import *
-from agents.cli import CLInteractiveAgent
+from coup import coup
+from coup.agents.bots import *
+from coup.agents.cli import CLInteractiveAgent
+from coup.agents.search import SearchAgent
+from coup.agents.snapshot import snapshotBots
 
+import os
 import sys
 
 bots = dict(
     random=RandomAgent,
     bay=BayBot,
     sean=SeanAgent,
-    mikayla=MrtBot
+    mikayla=MrtBot,
+    search=SearchAgent
 )
+# Policies saved by coup.selfplay, named after their files.
+bots.update(snapshotBots(os.environ.get('COUP_SNAPSHOTS')))
 
 
 def selectOpponents():
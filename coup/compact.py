@@ -0,0 +1,294 @@
+'''Compact integer-encoded game engine.
+A drop-in alternative to the namedtuple engine in coup.py: the same
+dealGame/getPlayerView/applyAction/broadcastRelativeTurnSummaries/gameLoop
+interface, and the same PlayerView and Summary tuples are handed to agents,
+so any BaseAgent bot runs unchanged. Internally a game is a flat list of ints
+that actions update in place, instead of a new players list and new
+PlayerStates on every turn.
+'''
+import random
+
+from coup import coup
+from coup.coup import Role, Action, PlayerState, PlayerView, \
+        Summary, SummaryWTarget, SummaryWSuccess, SummaryWTargetSuccess
+
+# Cards are stored as their Role value, with 0 for an empty slot.
+ROLES = (None,) + tuple(Role)
+NUM_ROLES = len(Role)
+
+# Layout of CompactState.data:
+#   data[0:5] is the deck, as in coup.makeDeck
+#   data[SEAT + 3*s : SEAT + 3*s + 3] is (coins, card0, card1) for seat s.
+SEAT = NUM_ROLES
+COINS, CARD0, CARD1 = 0, 1, 2
+SEAT_WIDTH = 3
+
+
+class CompactState:
+    '''The state of a game as a flat list of ints.
+    Seats are fixed for the whole game; order is the tuple of live seats in turn
+    order, so a player index (as used by applyAction and the agents) is a
+    position in order. Agents and names never change and are shared by copies.
+    '''
+    __slots__ = ('data', 'order', 'agents', 'names')
+
+    def __init__(self, data, order, agents, names):
+        self.data = data
+        self.order = order
+        self.agents = agents
+        self.names = names
+
+    def copy(self):
+        # order is a tuple and only ever replaced, so it can be shared.
+        return CompactState(self.data[:], self.order, self.agents, self.names)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactState) and self.data == other.data \
+                and self.order == other.order and self.names == other.names
+
+    def __repr__(self):
+        return f"CompactState(data={self.data}, order={self.order}, names={self.names})"
+
+
+def fromGameState(gameState):
+    '''Encode a coup.GameState as a CompactState.'''
+    data = list(gameState.deck) + [0] * (SEAT_WIDTH * len(gameState.players))
+    for s, player in enumerate(gameState.players):
+        base = SEAT + SEAT_WIDTH * s
+        data[base + COINS] = player.coins
+        for i, card in enumerate(player.cards):
+            data[base + CARD0 + i] = card.value
+    return CompactState(data, tuple(range(len(gameState.players))),
+                        tuple(p.agent for p in gameState.players),
+                        tuple(p.name for p in gameState.players))
+
+
+def toGameState(state):
+    '''Decode a CompactState as a coup.GameState.'''
+    return coup.GameState(players=[getPlayerState(state, s) for s in state.order],
+                          deck=tuple(state.data[:NUM_ROLES]))
+
+
+def getPlayerState(state, seat, cardType=list):
+    base = SEAT + SEAT_WIDTH * seat
+    data = state.data
+    cards = cardType(ROLES[v] for v in data[base + CARD0:base + CARD1 + 1] if v)
+    return PlayerState(cards=cards, coins=data[base + COINS],
+                       agent=state.agents[seat], name=state.names[seat])
+
+
+def getPlayerView(state, activePlayer):
+    data = state.data
+    order = state.order
+    opponents = []
+    for seat in order[activePlayer+1:] + order[:activePlayer]:
+        base = SEAT + SEAT_WIDTH * seat
+        opponents.append(PlayerState((data[base + CARD0] != 0) + (data[base + CARD1] != 0),
+                                     data[base + COINS], None, state.names[seat]))
+    return PlayerView(getPlayerState(state, order[activePlayer], tuple), tuple(opponents))
+
+
+def removeCard(state, seat, card):
+    '''Remove a card from a seat's hand, in place.
+    As in coup.removeCard, a card that isn't in the hand costs the player their last card.
+    Returns True if the player still has cards left.
+    '''
+    base = SEAT + SEAT_WIDTH * seat
+    data = state.data
+    value = card.value if card is not None else 0
+    if data[base + CARD0] == value and data[base + CARD1]:
+        data[base + CARD0] = data[base + CARD1]
+        data[base + CARD1] = 0
+    elif data[base + CARD1]:
+        data[base + CARD1] = 0
+    else:
+        data[base + CARD0] = 0
+    return data[base + CARD0] != 0
+
+
+def eliminate(state, player):
+    state.order = state.order[:player] + state.order[player+1:]
+
+
+def drawCard(state, rng=random):
+    '''Draw a uniformly random card from the deck counts, in place.'''
+    data = state.data
+    r = rng.randrange(sum(data[:NUM_ROLES]))
+    for v in range(NUM_ROLES):
+        r -= data[v]
+        if r < 0:
+            data[v] -= 1
+            return ROLES[v + 1]
+
+
+def applyIncome(state, activePlayer):
+    seat = state.order[activePlayer]
+    state.data[SEAT + SEAT_WIDTH * seat + COINS] += 1
+    return state, Summary(Action.INCOME, activePlayer, state.names[seat])
+
+
+def applyForeignAid(state, activePlayer):
+    order = state.order
+    seat = order[activePlayer]
+    # All opponents get the opportunity to block
+    blocked = False
+    for i, opp in enumerate(order):
+        if opp != seat and state.agents[opp].selectReaction(getPlayerView(state, i),
+                                (Action.FOREIGN_AID, (activePlayer - i - 1) % len(order))):
+            blocked = True
+    if not blocked:
+        state.data[SEAT + SEAT_WIDTH * seat + COINS] += 2
+    return state, SummaryWSuccess(Action.FOREIGN_AID, activePlayer, state.names[seat], not blocked)
+
+
+def applyTax(state, activePlayer):
+    seat = state.order[activePlayer]
+    state.data[SEAT + SEAT_WIDTH * seat + COINS] += 3
+    return state, Summary(Action.TAX, activePlayer, state.names[seat])
+
+
+def applySteal(state, activePlayer, targetPlayer):
+    order = state.order
+    seat, targetSeat = order[activePlayer], order[targetPlayer]
+    # Target gets the opportunity to block:
+    blockAttempt = state.agents[targetSeat].selectReaction(getPlayerView(state, targetPlayer),
+                                (Action.STEAL, (activePlayer - targetPlayer - 1) % len(order)))
+    if not blockAttempt:
+        data = state.data
+        targetCoins = SEAT + SEAT_WIDTH * targetSeat + COINS
+        delta = min(data[targetCoins], 2) # target cannot have negative coins.
+        data[targetCoins] -= delta
+        data[SEAT + SEAT_WIDTH * seat + COINS] += delta
+    return state, SummaryWTargetSuccess(Action.STEAL, activePlayer, state.names[seat],
+                                        targetPlayer, state.names[targetSeat], not blockAttempt)
+
+
+def applyAssassinate(state, activePlayer, targetPlayer):
+    order = state.order
+    seat, targetSeat = order[activePlayer], order[targetPlayer]
+    # The player pays before the target decides whether to block, but the
+    # target's view is of the state before the action, as in coup.py.
+    targetView = getPlayerView(state, targetPlayer)
+    state.data[SEAT + SEAT_WIDTH * seat + COINS] -= 3
+    target = state.agents[targetSeat]
+    blockAttempt = target.selectReaction(targetView,
+                                (Action.ASSASSINATE, (activePlayer - targetPlayer - 1) % len(order)))
+    if not blockAttempt:
+        if not removeCard(state, targetSeat, target.selectKilledCard(targetView)):
+            eliminate(state, targetPlayer)
+    return state, SummaryWTargetSuccess(Action.ASSASSINATE, activePlayer, state.names[seat],
+                                        targetPlayer, state.names[targetSeat], not blockAttempt)
+
+
+def applyCoup(state, activePlayer, targetPlayer):
+    order = state.order
+    seat, targetSeat = order[activePlayer], order[targetPlayer]
+    killed = state.agents[targetSeat].selectKilledCard(getPlayerView(state, targetPlayer))
+    state.data[SEAT + SEAT_WIDTH * seat + COINS] -= 7
+    if not removeCard(state, targetSeat, killed):
+        eliminate(state, targetPlayer)
+    return state, SummaryWTarget(Action.COUP, activePlayer, state.names[seat],
+                                 targetPlayer, state.names[targetSeat])
+
+
+def applyExchange(state, activePlayer, rng=random):
+    seat = state.order[activePlayer]
+    base = SEAT + SEAT_WIDTH * seat
+    data = state.data
+    hand = [ROLES[v] for v in data[base + CARD0:base + CARD1 + 1] if v]
+    offers = [drawCard(state, rng), drawCard(state, rng)] + hand
+    selected = state.agents[seat].selectExchangeCards(getPlayerView(state, activePlayer), offers[:])
+    selected = list(selected[:len(hand)])
+    for i, card in enumerate(selected):
+        if card in offers:
+            offers.remove(card)
+            selected[i] = card
+        else:
+            # The player selected a card they weren't offered, so they get an arbitrary one.
+            selected[i] = offers.pop()
+
+    data[base + CARD0:base + CARD1 + 1] = [card.value for card in selected] + [0] * (2 - len(selected))
+    for card in offers:
+        data[card.value - 1] += 1
+    return state, Summary(Action.EXCHANGE, activePlayer, state.names[seat])
+
+
+def applyAction(state, activePlayer, action, targetPlayer=None, rng=random):
+    '''Apply an action to the state in place.
+    Returns (state, summary) like coup.applyAction; copy() the state first to keep the old one.
+    '''
+    coins = state.data[SEAT + SEAT_WIDTH * state.order[activePlayer] + COINS]
+    assert action in coup.affordable_actions[min(coins, coup.max_coins)]
+
+    if action == Action.INCOME:
+        return applyIncome(state, activePlayer)
+
+    elif action == Action.FOREIGN_AID:
+        return applyForeignAid(state, activePlayer)
+
+    elif action == Action.TAX:
+        return applyTax(state, activePlayer)
+
+    elif action == Action.STEAL:
+        return applySteal(state, activePlayer, targetPlayer)
+
+    elif action == Action.EXCHANGE:
+        return applyExchange(state, activePlayer, rng)
+
+    elif action == Action.ASSASSINATE:
+        return applyAssassinate(state, activePlayer, targetPlayer)
+
+    elif action == Action.COUP:
+        return applyCoup(state, activePlayer, targetPlayer)
+
+
+def dealGame(deck, agents, rng=random):
+    return fromGameState(coup.dealGame(deck, agents, rng))
+
+
+def broadcastRelativeTurnSummaries(turnSummary, state):
+    n = len(state.order)
+    for i, seat in enumerate(state.order):
+        if turnSummary.activePlayer == i:
+            rt = turnSummary._replace(activePlayer=-1)
+        else:
+            rt = turnSummary._replace(activePlayer=(turnSummary.activePlayer - i - 1) % n)
+        if 'targetPlayer' in rt._fields:
+            if rt.targetPlayer == i:
+                rt = rt._replace(targetPlayer=-1)
+            else:
+                rt = rt._replace(targetPlayer=(rt.targetPlayer - i - 1) % n)
+        state.agents[seat].turnSummary(getPlayerView(state, i), rt)
+
+
+def gameLoop(agents, humanInput=False, seed=None):
+    baseDeck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = coup.newGameRandom(agents, seed)
+
+    state = dealGame(baseDeck, agents, rng)
+    turns = 0
+    while len(state.order) > 1:
+        if (turns > 1000):
+            return None
+        if humanInput:
+            coup.printState(toGameState(state))
+        i = turns % len(state.order)
+        player = state.agents[state.order[i]]
+        action, relativeTarget = player.selectAction(getPlayerView(state, i))
+        if relativeTarget is not None:
+            target = (i + relativeTarget + 1) % len(state.order)
+        else:
+            target = None
+        if humanInput:
+            print(f"Action: {action} directed at target {target} by Player {state.names[state.order[i]]}")
+        state, turnSummary = applyAction(state, i, action, target, rng)
+        broadcastRelativeTurnSummaries(turnSummary, state)
+        turns += 1
+        if humanInput:
+            x = input().strip()
+            if x == 'q':
+                return
+    winner_name = state.names[state.order[0]]
+    return(winner_name.split('-')[0])
@@ -1,27 +1,8 @@
-from enum import Enum, auto
 from collections import namedtuple
 import random
+import threading
 
-class Role(Enum):
-    DUKE = auto()
-    ASSASSIN = auto()
-    CONTESSA = auto()
-    AMBASSADOR = auto()
-    CAPTAIN = auto()
-
-class Action(Enum):
-    INCOME = auto()
-    FOREIGN_AID = auto()
-    TAX = auto()
-    ASSASSINATE = auto()
-    STEAL = auto()
-    EXCHANGE = auto()
-    COUP = auto()
-
-class Reaction(Enum):
-    BLOCK_FOREIGN_AID = auto()
-    BLOCK_ASSASSINATION = auto()
-    BLOCK_STEAL = auto()
+from coup.enums import Role, Action, Reaction
 
 
 universal_actions = [Action.INCOME, Action.FOREIGN_AID, Action.COUP]
@@ -44,18 +25,22 @@ action_expense = {
         Action.COUP: 7
 }
 
+# Actions that take a target.
+targeted_actions = frozenset([Action.STEAL, Action.ASSASSINATE, Action.COUP])
+
 # PlayerState is the description of a particular player's state at a given time.
 # Cards is a list of roles, coins is an integer number of coins.
 PlayerState = namedtuple('PlayerState', ['cards', 'coins', 'agent', 'name'])
 
 # GameState is the state of an entire game.
 # Players is a list of PlayerStates for all active players (dead players are dropped)
-# Deck is the shuffled list of roles remaining in the deck.
+# Deck is the multiset of roles remaining in the deck (see makeDeck).
 GameState = namedtuple('GameState', ['players', 'deck'])
 
 # PlayerView is a the view of a game from a single players perspective.
-# Selfstate is the PlayerState of the active player.
-# Oppenent is a list of PlayerStates of the other players, but cards is an int, not a list.
+# Selfstate is the PlayerState of the active player, with cards as a tuple.
+# Oppenent is a tuple of PlayerStates of the other players, but cards is an int, not a list.
+# Views are read-only, since the same view is shared by every callback on a gameState.
 PlayerView = namedtuple('PlayerView', ['selfstate', 'opponents'])
 
 Summary = namedtuple('Summary', ['action', 'activePlayer', 'activeName'])
@@ -63,32 +48,82 @@ SummaryWTarget = namedtuple('Summary', Summary._fields + ('targetPlayer', 'targe
 SummaryWSuccess = namedtuple('Summary', Summary._fields + ('success',))
 SummaryWTargetSuccess = namedtuple('Summary', SummaryWTarget._fields + ('success',))
 
+# Every hand a player can hold, as a tuple of roles in hand order.
+all_hands = [()] + [(a,) for a in Role] + [(a, b) for a in Role for b in Role]
+
+# Coin counts above this are treated the same (you must coup).
+max_coins = 10
+
+def _eligibleActions(hand, coins):
+    if coins >= max_coins:
+        return frozenset([Action.COUP])
+    return frozenset([act for card in hand for act in available_actions[card]
+                      if (isinstance(act, Action) and action_expense[act] <= coins)])
+
+# eligible_actions[hand, coins] is the set of actions open to a player holding hand,
+# with coins clamped to max_coins.
+eligible_actions = {(hand, coins): _eligibleActions(hand, coins)
+                        for hand in all_hands for coins in range(max_coins + 1)}
+
+# eligible_reactions[hand] is the set of reactions open to a player holding hand.
+eligible_reactions = {hand: frozenset([act for card in hand for act in available_actions[card]
+                                       if isinstance(act, Reaction)])
+                        for hand in all_hands}
+
+# affordable_actions[coins] is the set of actions a player can pay for, with coins clamped to max_coins.
+affordable_actions = [frozenset([act for act in Action if action_expense[act] <= coins and
+                                 (act == Action.COUP if coins >= max_coins else True)])
+                        for coins in range(max_coins + 1)]
+
 def findEligibleActions(playerState):
-    if playerState.coins >= 10:
-        return set([Action.COUP])
-    try:
-        cards = playerState.cards
-        return set([act for card in cards for act in available_actions[card]
-                    if (isinstance(act, Action) and action_expense[act] <= playerState.coins)])
-    except KeyError:
-        # Who knows why I have to do this???
-        cards = list(map(lambda x: Role[x.name], playerState.cards))
-        return set([act for card in cards for act in available_actions[card]
-                    if (isinstance(act, Action) and action_expense[act] <= playerState.coins)])
+    return eligible_actions[tuple(playerState.cards), min(playerState.coins, max_coins)]
+
+def findEligibleReactions(playerState):
+    return eligible_reactions[tuple(playerState.cards)]
+
+# The number of gameStates each thread keeps views for: enough for the games
+# interleaved on an event loop (see coup.asyncgame) to keep theirs.
+view_cache_states = 256
+
+class _ViewCache(threading.local):
+    '''The views built for recent gameStates, per thread, by id(gameState).
+    gameStates are never modified, so a view stays valid as long as it's the same
+    gameState object; holding a reference to it means the identity can't be reused.
+    The most recent gameState is kept apart, as it's asked for again and again.
+    '''
+    def __init__(self):
+        self.gameState = None
+        self.views = {}
+        # id(gameState) -> (gameState, views), cleared when full.
+        self.states = {}
+
+_viewCache = _ViewCache()
 
 def getPlayerView(gameState, activePlayer):
-    return PlayerView(selfstate=gameState.players[activePlayer],
-            opponents = list(map(lambda x: x._replace(cards=len(x.cards), agent=None),
-                    gameState.players[activePlayer+1:] + gameState.players[:activePlayer])))
+    cache = _viewCache
+    if cache.gameState is not gameState:
+        states = cache.states
+        entry = states.get(id(gameState))
+        if entry is None:
+            if len(states) >= view_cache_states:
+                states.clear()
+            entry = states[id(gameState)] = (gameState, {})
+        cache.gameState, cache.views = entry
+    view = cache.views.get(activePlayer)
+    if view is None:
+        player = gameState.players[activePlayer]
+        view = PlayerView(selfstate=player._replace(cards=tuple(player.cards)),
+                opponents = tuple(PlayerState(len(x.cards), x.coins, None, x.name)
+                        for x in gameState.players[activePlayer+1:] + gameState.players[:activePlayer]))
+        cache.views[activePlayer] = view
+    return view
 
 def canAffordAction(playerState, action):
     '''Returns true if a player can afford an action.
     Additionally, returns false if a player has more than 10 coins
         and the action is not coup.
     '''
-    return playerState.coins >= action_expense[action] and \
-                (action == Action.COUP if playerState.coins >= 10 else True)
-                # Wooo! Unit tests caught their first bug!!
+    return action in affordable_actions[min(playerState.coins, max_coins)]
 
 def removeCard(playerState, card, replacement=None):
     ''' Remove a card from a players hand, and (possibly) replace it with a new one.
@@ -108,53 +143,85 @@ def removeCard(playerState, card, replacement=None):
         return None
     return playerState._replace(cards=cards)
 
-def getCardsFromDeck(gameState, nCards):
+# A deck is a tuple with the number of cards of each role, indexed by Role.value - 1.
+# The deck is never looked at in order, and every card left in it is equally
+# likely to be drawn next, so drawing from the counts is the same as drawing
+# from a shuffled list, without having to shuffle or copy one.
+deck_roles = tuple(Role)
+
+def makeDeck(cards):
+    counts = [0] * len(deck_roles)
+    for card in cards:
+        counts[card.value - 1] += 1
+    return tuple(counts)
+
+def deckCards(deck):
+    '''The cards in a deck as a list, grouped by role.'''
+    return [role for role, count in zip(deck_roles, deck) for _ in range(count)]
+
+def drawFromDeck(deck, rng=random):
+    '''Draw one card uniformly at random. Returns the card and the new deck.'''
+    r = rng.randrange(sum(deck))
+    for i, count in enumerate(deck):
+        r -= count
+        if r < 0:
+            return deck_roles[i], deck[:i] + (count - 1,) + deck[i+1:]
+
+def returnToDeck(deck, cards):
+    counts = list(deck)
+    for card in cards:
+        counts[card.value - 1] += 1
+    return tuple(counts)
+
+def getCardsFromDeck(gameState, nCards, rng=random):
     '''Basically, sample without replacement from the game deck.
     Returns the cards, and the updated gameState.
+    rng is the game's random.Random (or the random module).
     '''
-    deck = random.sample(gameState.deck, len(gameState.deck))
+    deck = gameState.deck
     cards = []
     for _ in range(nCards):
-        cards.append(deck.pop())
+        card, deck = drawFromDeck(deck, rng)
+        cards.append(card)
     return cards, gameState._replace(deck=deck)
 
-def applyIncome(gameState, activePlayer):
+# The resolveX functions are the rules of each action as pure transitions: every
+# decision (blocks, the card lost, the cards kept in an exchange, and the cards
+# drawn for it) is passed in, and agents are never called, so they can be used
+# to simulate games without agent objects in the state. The applyX functions
+# are the drivers gameLoop uses: they ask the agents for the decisions and
+# then resolve the action.
+
+def resolveIncome(gameState, activePlayer):
     playerList = gameState.players[:]
     player = playerList[activePlayer]
     playerList[activePlayer] = player._replace(coins = player.coins + 1)
     return gameState._replace(players=playerList),\
             Summary(Action.INCOME, activePlayer, player.name)
 
-def applyForeignAid(gameState, activePlayer):
+def resolveForeignAid(gameState, activePlayer, blocked):
     playerList = gameState.players[:]
     player = playerList[activePlayer]
-    # All opponents get the opporunity to block
-    blockAttempt = [opp.agent.selectReaction(getPlayerView(gameState, i),
-                                    (Action.FOREIGN_AID, (activePlayer - i - 1) % len(playerList)))
-                        for i, opp in enumerate(playerList) if opp is not player]
-    if not any(blockAttempt):
+    if not blocked:
         player = player._replace(coins = player.coins + 2)
 
     playerList[activePlayer] = player
     return gameState._replace(players=playerList),\
             SummaryWSuccess(Action.FOREIGN_AID, activePlayer, player.name,
-                    not any(blockAttempt))
+                    not blocked)
 
-def applyTax(gameState, activePlayer):
+def resolveTax(gameState, activePlayer):
     playerList = gameState.players[:]
     player = playerList[activePlayer]
     playerList[activePlayer] = player._replace(coins = player.coins + 3)
     return gameState._replace(players=playerList),\
             Summary(Action.TAX, activePlayer, player.name)
 
-def applySteal(gameState, activePlayer, targetPlayer):
+def resolveSteal(gameState, activePlayer, targetPlayer, blocked):
     playerList = gameState.players[:]
     player = playerList[activePlayer]
     target = playerList[targetPlayer]
-    # Target gets the opportunity to block:
-    blockAttempt = target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
-                                    (Action.STEAL, (activePlayer - targetPlayer - 1) % len(playerList)))
-    if not blockAttempt:
+    if not blocked:
         targetCoins = max(target.coins - 2, 0) # target cannot have negative coins.
         delta = target.coins - targetCoins
         playerList[activePlayer] = player._replace(coins = player.coins + delta)
@@ -162,9 +229,10 @@ def applySteal(gameState, activePlayer, targetPlayer):
     return gameState._replace(players=playerList),\
             SummaryWTargetSuccess(Action.STEAL, activePlayer, player.name,
                     targetPlayer, target.name,
-                    not blockAttempt)
+                    not blocked)
 
-def applyAssassinate(gameState, activePlayer, targetPlayer):
+def resolveAssassinate(gameState, activePlayer, targetPlayer, blocked, killedCard=None):
+    '''killedCard is only used if the assassination isn't blocked.'''
     playerList = gameState.players[:]
     player = playerList[activePlayer]
     target = playerList[targetPlayer]
@@ -172,13 +240,8 @@ def applyAssassinate(gameState, activePlayer, targetPlayer):
     # Player must pay for assassination
     playerList[activePlayer] = player._replace(coins = player.coins - 3)
 
-    # Target gets the opportunity to block:
-    blockAttempt = target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
-                                (Action.ASSASSINATE, (activePlayer - targetPlayer - 1) % len(playerList)))
-    if not blockAttempt:
-        # Target gets opportunity to select which card is killed.
-        target = removeCard(target,
-                            target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer)))
+    if not blocked:
+        target = removeCard(target, killedCard)
         if target:
             playerList[targetPlayer] = target
         else:
@@ -188,16 +251,15 @@ def applyAssassinate(gameState, activePlayer, targetPlayer):
             SummaryWTargetSuccess(Action.ASSASSINATE,
                     activePlayer, player.name,
                     targetPlayer, targetName,
-                    not blockAttempt)
+                    not blocked)
 
-def applyCoup(gameState, activePlayer, targetPlayer):
+def resolveCoup(gameState, activePlayer, targetPlayer, killedCard):
     playerList = gameState.players[:]
     player = playerList[activePlayer]
     target = playerList[targetPlayer]
     # Player must pay for assassination
     playerList[activePlayer] = player._replace(coins = player.coins - 7)
-    target = removeCard(target,
-                        target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer)))
+    target = removeCard(target, killedCard)
     if target:
         playerList[targetPlayer] = target
         targetName = target.name
@@ -207,35 +269,96 @@ def applyCoup(gameState, activePlayer, targetPlayer):
             SummaryWTarget(Action.COUP, activePlayer, player.name,
                     targetPlayer, targetName)
 
-def applyExchange(gameState, activePlayer):
-    # Select two cards from deck.
-    # Offer agent these two + their current cards.
+def resolveExchange(gameState, activePlayer, drawn, selected):
+    '''drawn is the cards drawn from gameState's deck, and selected the cards
+    the player keeps, from drawn and their hand.
+    '''
     playerList = gameState.players[:]
     player = playerList[activePlayer]
-    offers, gameState = getCardsFromDeck(gameState, 2)
-    offers += player.cards
-    selected = player.agent.selectExchangeCards(getPlayerView(gameState, activePlayer), offers)
-    selected = selected[:len(player.cards)]
+    offers = list(drawn) + player.cards
+    selected = list(selected[:len(player.cards)])
     # Set hand to selected cards, and return remaining to deck.
     for i, card in enumerate(selected):
-        # re-cast card to a Role in case enums are being absurd.
-        card = Role[card.name]
         try:
             offers.remove(card)
-        except:
+        except ValueError:
             # If this failed, its because the player selected a card they don't have.
             # So I'm going to give them an arbitrary card from the ones they were offered.
             selected[i] = offers.pop()
 
+    counts = list(gameState.deck)
+    for card in drawn:
+        counts[card.value - 1] -= 1
     playerList[activePlayer] = player._replace(cards=selected)
-    return gameState._replace(players=playerList, deck=gameState.deck + offers),\
+    return gameState._replace(players=playerList, deck=returnToDeck(tuple(counts), offers)),\
             Summary(Action.EXCHANGE, activePlayer, player.name)
 
-# Return the new gameState after a player takes an action
-def applyAction(gameState, activePlayer, action, targetPlayer=None):
-    # WHY DO I HAVE TO DO THIS?!?!
-    action = Action[action.name]
+def resolveAction(gameState, activePlayer, action, targetPlayer=None,
+                  blocked=False, killedCard=None, drawn=(), selected=()):
+    '''resolveX for any action, taking every decision it might need.'''
+    if action == Action.INCOME:
+        return resolveIncome(gameState, activePlayer)
+    elif action == Action.FOREIGN_AID:
+        return resolveForeignAid(gameState, activePlayer, blocked)
+    elif action == Action.TAX:
+        return resolveTax(gameState, activePlayer)
+    elif action == Action.STEAL:
+        return resolveSteal(gameState, activePlayer, targetPlayer, blocked)
+    elif action == Action.EXCHANGE:
+        return resolveExchange(gameState, activePlayer, drawn, selected)
+    elif action == Action.ASSASSINATE:
+        return resolveAssassinate(gameState, activePlayer, targetPlayer, blocked, killedCard)
+    elif action == Action.COUP:
+        return resolveCoup(gameState, activePlayer, targetPlayer, killedCard)
+
+def applyIncome(gameState, activePlayer):
+    return resolveIncome(gameState, activePlayer)
+
+def applyForeignAid(gameState, activePlayer):
+    playerList = gameState.players
+    player = playerList[activePlayer]
+    # All opponents get the opporunity to block
+    blockAttempt = [opp.agent.selectReaction(getPlayerView(gameState, i),
+                                    (Action.FOREIGN_AID, (activePlayer - i - 1) % len(playerList)))
+                        for i, opp in enumerate(playerList) if opp is not player]
+    return resolveForeignAid(gameState, activePlayer, any(blockAttempt))
 
+def applyTax(gameState, activePlayer):
+    return resolveTax(gameState, activePlayer)
+
+def applySteal(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    # Target gets the opportunity to block:
+    blockAttempt = target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
+                                    (Action.STEAL, (activePlayer - targetPlayer - 1) % len(gameState.players)))
+    return resolveSteal(gameState, activePlayer, targetPlayer, bool(blockAttempt))
+
+def applyAssassinate(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    # Target gets the opportunity to block:
+    blockAttempt = target.agent.selectReaction(getPlayerView(gameState, targetPlayer),
+                                (Action.ASSASSINATE, (activePlayer - targetPlayer - 1) % len(gameState.players)))
+    killedCard = None
+    if not blockAttempt:
+        # Target gets opportunity to select which card is killed.
+        killedCard = target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer))
+    return resolveAssassinate(gameState, activePlayer, targetPlayer, bool(blockAttempt), killedCard)
+
+def applyCoup(gameState, activePlayer, targetPlayer):
+    target = gameState.players[targetPlayer]
+    killedCard = target.agent.selectKilledCard(getPlayerView(gameState, targetPlayer))
+    return resolveCoup(gameState, activePlayer, targetPlayer, killedCard)
+
+def applyExchange(gameState, activePlayer, rng=random):
+    # Select two cards from deck.
+    # Offer agent these two + their current cards.
+    player = gameState.players[activePlayer]
+    drawn, drawnState = getCardsFromDeck(gameState, 2, rng)
+    selected = player.agent.selectExchangeCards(getPlayerView(drawnState, activePlayer), drawn + player.cards)
+    return resolveExchange(gameState, activePlayer, drawn, selected)
+
+# Return the new gameState after a player takes an action
+def applyAction(gameState, activePlayer, action, targetPlayer=None, rng=random):
     player = gameState.players[activePlayer]
     assert canAffordAction(player, action)
 
@@ -252,7 +375,7 @@ def applyAction(gameState, activePlayer, action, targetPlayer=None):
         return applySteal(gameState, activePlayer, targetPlayer)
 
     elif action == Action.EXCHANGE:
-        return applyExchange(gameState, activePlayer)
+        return applyExchange(gameState, activePlayer, rng)
 
     elif action == Action.ASSASSINATE:
         return applyAssassinate(gameState, activePlayer, targetPlayer)
@@ -261,15 +384,23 @@ def applyAction(gameState, activePlayer, action, targetPlayer=None):
         return applyCoup(gameState, activePlayer, targetPlayer)
 
 
+def agentTypeName(agent):
+    '''The class name of an agent, looking through any proxies wrapped around it.
+    An agent that stands in for one in another process names it as typeName.
+    '''
+    while hasattr(agent, 'wrapped'):
+        agent = agent.wrapped
+    return getattr(agent, 'typeName', type(agent).__name__)
+
 # Set up an initial gameState for the list of agents.
-def dealGame(deck, agents):
-    random.shuffle(deck)
+def dealGame(deck, agents, rng=random):
+    rng.shuffle(deck)
     return GameState(players=[PlayerState(coins=2,
                                           cards=deck[i*2:i*2+2],
                                           agent=a,
-                                          name="{name}-{i}".format(name=str(type(a)).split("'")[1].split(".")[-1], i=i))
+                                          name="{name}-{i}".format(name=agentTypeName(a), i=i))
                                     for i, a in enumerate(agents)],
-                    deck=deck[len(agents)+2:])
+                    deck=makeDeck(deck[len(agents)*2:]))
 
 def printState(gameState):
     for i, player in enumerate(gameState.players):
@@ -277,31 +408,68 @@ def printState(gameState):
         print()
     print()
 
+def relativeTurnSummary(turnSummary, i, nPlayers):
+    '''The turnSummary as seen by player i, with players as indexes into their opponents.'''
+    if turnSummary.activePlayer == i:
+        rt = turnSummary._replace(activePlayer=-1)
+    else:
+        rt = turnSummary._replace(activePlayer=(turnSummary.activePlayer - i - 1) % nPlayers)
+    if 'targetPlayer' in rt._fields:
+        if rt.targetPlayer == i:
+            rt = rt._replace(targetPlayer=-1)
+        else:
+            rt = rt._replace(targetPlayer=(rt.targetPlayer - i - 1) % nPlayers)
+    return rt
+
 def broadcastRelativeTurnSummaries(turnSummary, gameState):
     for i, player in enumerate(gameState.players):
-        if turnSummary.activePlayer == i:
-            rt = turnSummary._replace(activePlayer=-1)
-        else:
-            rt = turnSummary._replace(activePlayer=
-                    (turnSummary.activePlayer - i - 1) % len(gameState.players))
-        if 'targetPlayer' in rt._fields:
-            if rt.targetPlayer == i:
-                rt = rt._replace(targetPlayer=-1)
-            else:
-                rt = rt._replace(targetPlayer=(rt.targetPlayer - i - 1) % len(gameState.players))
-        player.agent.turnSummary(getPlayerView(gameState, i), rt)
-
-def gameLoop(agents, humanInput=False):
-    baseDeck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+        player.agent.turnSummary(getPlayerView(gameState, i),
+                                 relativeTurnSummary(turnSummary, i, len(gameState.players)))
 
-    initalState = dealGame(baseDeck, agents)
+def newGameRandom(agents, seed):
+    '''Make the random.Random for a game, and offer each agent its own stream.
+    Agents get independent streams so that their choices don't change the
+    cards the engine draws, and a game is reproducible from its seed.
+    '''
+    rng = random.Random(seed)
+    for agent in agents:
+        agentRng = random.Random(rng.getrandbits(64))
+        if hasattr(agent, 'newGame'):
+            agent.newGame(agentRng)
+    return rng
+
+# Play a game, returning the name of the winner (or None if it hit the turn limit).
+# The same seed and agents replay the same game; without a seed, one is drawn from
+# the random module, so random.seed() still makes a series of games reproducible.
+# Pass a coup.instrument.Profiler as profiler to time the agents and the engine,
+# and a recorder (coup.records.GameRecordWriter or coup.replay.DecisionLog) to record the game.
+# Pass a coup.stalemate.StalemateDetector as stalemate to end stuck games early, as draws.
+def gameLoop(agents, humanInput=False, seed=None, profiler=None, recorder=None, stalemate=None):
+    baseDeck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+    if seed is None:
+        seed = random.getrandbits(64)
+    if profiler is not None:
+        agents = [profiler.wrap(a) for a in agents]
+    if recorder is not None:
+        agents = [recorder.wrap(a) for a in agents]
+    rng = newGameRandom(agents, seed)
+
+    initalState = dealGame(baseDeck, agents, rng)
     gameState = initalState
+    if recorder is not None:
+        recorder.startGame(seed, gameState, rng)
+    if stalemate is not None:
+        stalemate.startGame(gameState)
     turns = 0
     while len(gameState.players) > 1:
         if (turns > 1000):
+            if recorder is not None:
+                recorder.endGame(gameState, None)
             return None
         if humanInput:
             printState(gameState)
+        if profiler is not None:
+            turnStart = profiler.startTurn()
         i = turns % len(gameState.players)
         # print(turns, gameState.players[i].name)
         player = gameState.players[i].agent
@@ -312,20 +480,36 @@ def gameLoop(agents, humanInput=False):
             target = None
         if humanInput:
             print(f"Action: {action} directed at target {target} by Player {gameState.players[i].name}")
-        gameState, turnSummary = applyAction(gameState, i, action, target)
-        broadcastRelativeTurnSummaries(turnSummary, gameState)
+        before = gameState
+        if profiler is None:
+            gameState, turnSummary = applyAction(gameState, i, action, target, rng)
+            broadcastRelativeTurnSummaries(turnSummary, gameState)
+        else:
+            with profiler.phase('applyAction'):
+                gameState, turnSummary = applyAction(gameState, i, action, target, rng)
+            with profiler.phase('broadcastRelativeTurnSummaries'):
+                broadcastRelativeTurnSummaries(turnSummary, gameState)
+            profiler.endTurn(turnStart)
+        if recorder is not None:
+            recorder.recordTurn(before, gameState, turnSummary, rng)
         turns += 1
+        if stalemate is not None and len(gameState.players) > 1 and stalemate.stuck(gameState, turns):
+            if recorder is not None:
+                recorder.endGame(gameState, None)
+            return None
         if humanInput:
             x = input().strip()
             if x == 'q':
                 return
     winner_name = gameState.players[0].name
+    if recorder is not None:
+        recorder.endGame(gameState, winner_name)
     return(winner_name.split('-')[0])
 
 
 if __name__ == "__main__":
-    from agents.bots import *
-    from agents.cli import CLInteractiveAgent
+    from coup.agents.bots import *
+    from coup.agents.cli import CLInteractiveAgent
     from statistics import mean
     from collections import Counter
 
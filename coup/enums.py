@@ -0,0 +1,25 @@
+from enum import Enum, auto
+
+# The one definition of the game's enums. Import them from here (or from
+# coup.coup, which re-exports them) so every module shares the same classes.
+
+class Role(Enum):
+    DUKE = auto()
+    ASSASSIN = auto()
+    CONTESSA = auto()
+    AMBASSADOR = auto()
+    CAPTAIN = auto()
+
+class Action(Enum):
+    INCOME = auto()
+    FOREIGN_AID = auto()
+    TAX = auto()
+    ASSASSINATE = auto()
+    STEAL = auto()
+    EXCHANGE = auto()
+    COUP = auto()
+
+class Reaction(Enum):
+    BLOCK_FOREIGN_AID = auto()
+    BLOCK_ASSASSINATION = auto()
+    BLOCK_STEAL = auto()
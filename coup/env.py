@@ -0,0 +1,203 @@
+'''Vectorized environment for training a policy against the bots.
+A VectorEnv runs nEnvs games through the engine, each with the learner in one
+seat and fresh opponents from the factories in the others, and steps them all
+with one action per game:
+
+    env = VectorEnv([MrtBot, BayBot, SeanAgent], nEnvs=64, seed=0)
+    obs, mask = env.reset()
+    while training:
+        obs, mask, rewards, dones = env.step(policy(obs, mask))
+
+Each step plays the learner's action, then the opponents' turns (with their own
+agents, through coup.applyAction) until it's the learner's turn again. A game
+that ends pays out 1 for a win, -1 for a loss and 0 for a draw at the turn
+limit, and is replaced by a new one straight away, so obs and mask always
+describe a game waiting on the learner.
+
+obs, mask, rewards and dones are buffers allocated once and overwritten by
+every step; copy them to keep them. An observation is OBS_SIZE + 3 per
+opponent floats:
+
+    0           own coins / 10
+    1..5        own cards, 0.5 per copy, indexed by Role value
+    6           own number of cards / 2
+    then per opponent, in playerView.opponents order and padded with zeros:
+                alive, coins / 10, number of cards / 2
+
+Actions are flat indexes, (action.value - 1) * nOpponents + target, with
+target 0 for actions without one (see actionIndex). mask is True for the
+legal ones, from findEligibleActions. The learner's other decisions (blocks,
+lost cards and exchanges) are made by an agent from the learner factory.
+'''
+import random
+
+import numpy as np
+
+from coup import coup
+from coup.coup import Role, Action, targeted_actions
+from coup.agents.bots import RandomAgent
+from coup.agents.proxy import AgentProxy
+
+OBS_SIZE = 7
+OPP_SIZE = 3
+NUM_ACTIONS = len(Action)
+base_deck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+turn_limit = 1000
+
+
+def actionIndex(action, target, nOpponents):
+    return (action.value - 1) * nOpponents + (target or 0)
+
+def decodeAction(index, nOpponents):
+    '''The (action, target) for a flat action index, as selectAction returns them.'''
+    action = Action(index // nOpponents + 1)
+    return action, (index % nOpponents if action in targeted_actions else None)
+
+
+def encodeView(view, row):
+    '''Write the observation for a PlayerView into row, a zeroed or reused float array.'''
+    row[:] = 0.0
+    selfstate = view.selfstate
+    row[0] = selfstate.coins / 10
+    for card in selfstate.cards:
+        row[card.value] += 0.5
+    row[6] = len(selfstate.cards) / 2
+    base = OBS_SIZE
+    for opp in view.opponents:
+        row[base] = 1.0
+        row[base + 1] = opp.coins / 10
+        row[base + 2] = opp.cards / 2
+        base += OPP_SIZE
+
+def actionMask(view, nOpponents, cache):
+    '''The legal action mask for a PlayerView, from cache (a dict) once it's been built.
+    Masks are shared, so don't modify them.
+    '''
+    key = coup.findEligibleActions(view.selfstate), len(view.opponents)
+    mask = cache.get(key)
+    if mask is None:
+        mask = np.zeros(NUM_ACTIONS * nOpponents, dtype=bool)
+        for action in key[0]:
+            for target in (range(key[1]) if action in targeted_actions else (0,)):
+                mask[actionIndex(action, target, nOpponents)] = True
+        cache[key] = mask
+    return mask
+
+
+class _Learner(AgentProxy):
+    '''The learner's seat: actions come from step, everything else from the wrapped agent.'''
+
+
+class VectorEnv:
+    def __init__(self, opponents, nEnvs=16, seed=None, learner=RandomAgent):
+        self.opponents = list(opponents)
+        self.learner = learner
+        self.nEnvs = nEnvs
+        self.nOpponents = len(self.opponents)
+        self.nActions = NUM_ACTIONS * self.nOpponents
+        self.obsSize = OBS_SIZE + OPP_SIZE * self.nOpponents
+        self.rng = random.Random(seed)
+        self.obs = np.zeros((nEnvs, self.obsSize), dtype=np.float32)
+        self.mask = np.zeros((nEnvs, self.nActions), dtype=bool)
+        self.rewards = np.zeros(nEnvs, dtype=np.float32)
+        self.dones = np.zeros(nEnvs, dtype=bool)
+        # Per game: its state, random.Random, turns played and learner agent.
+        self.states = [None] * nEnvs
+        self.gameRngs = [None] * nEnvs
+        self.turns = [0] * nEnvs
+        self.seats = [None] * nEnvs
+        # Finished games: wins, losses and draws.
+        self.results = [0, 0, 0]
+        # mask rows by (eligible actions, live opponents).
+        self.masks = {}
+
+    def reset(self):
+        for k in range(self.nEnvs):
+            self.newGame(k)
+        return self.obs, self.mask
+
+    def newGame(self, k):
+        while True:
+            seat = _Learner(self.learner())
+            agents = [factory() for factory in self.opponents] + [seat]
+            self.rng.shuffle(agents)
+            rng = coup.newGameRandom(agents, self.rng.getrandbits(64))
+            self.states[k] = coup.dealGame(list(base_deck), agents, rng)
+            self.gameRngs[k] = rng
+            self.turns[k] = 0
+            self.seats[k] = seat
+            if self.advance(k) is None:
+                break
+        self.encode(k)
+
+    def learnerIndex(self, k):
+        seat = self.seats[k]
+        for i, player in enumerate(self.states[k].players):
+            if player.agent is seat:
+                return i
+        return None
+
+    def playTurn(self, k, action, target):
+        gameState = self.states[k]
+        i = self.turns[k] % len(gameState.players)
+        if target is not None:
+            target = (i + target + 1) % len(gameState.players)
+        gameState, turnSummary = coup.applyAction(gameState, i, action, target, self.gameRngs[k])
+        coup.broadcastRelativeTurnSummaries(turnSummary, gameState)
+        self.states[k] = gameState
+        self.turns[k] += 1
+
+    def outcome(self, k):
+        '''The learner's reward if game k is over, otherwise None.'''
+        players = self.states[k].players
+        if self.learnerIndex(k) is None:
+            return -1.0
+        if len(players) == 1:
+            return 1.0
+        if self.turns[k] > turn_limit:
+            return 0.0
+        return None
+
+    def advance(self, k):
+        '''Play the opponents' turns until it's the learner's, or the game ends.
+        Returns the learner's reward if it did.
+        '''
+        while True:
+            reward = self.outcome(k)
+            if reward is not None:
+                return reward
+            gameState = self.states[k]
+            i = self.turns[k] % len(gameState.players)
+            agent = gameState.players[i].agent
+            if agent is self.seats[k]:
+                return None
+            action, target = agent.selectAction(coup.getPlayerView(gameState, i))
+            self.playTurn(k, action, target)
+
+    def encode(self, k):
+        view = coup.getPlayerView(self.states[k], self.learnerIndex(k))
+        encodeView(view, self.obs[k])
+        self.mask[k] = actionMask(view, self.nOpponents, self.masks)
+
+    def step(self, actions):
+        '''Play one action per game (flat indexes, see actionIndex).
+        Returns the obs, mask, rewards and dones buffers.
+        '''
+        # Check them all first, so a bad action doesn't leave some games stepped and some not.
+        indexes = [int(actions[k]) for k in range(self.nEnvs)]
+        for k, index in enumerate(indexes):
+            if not self.mask[k, index]:
+                raise ValueError(f"Action {decodeAction(index, self.nOpponents)} isn't legal in game {k}")
+        for k, index in enumerate(indexes):
+            self.playTurn(k, *decodeAction(index, self.nOpponents))
+            reward = self.advance(k)
+            if reward is None:
+                self.rewards[k] = 0.0
+                self.dones[k] = False
+                self.encode(k)
+            else:
+                self.rewards[k] = reward
+                self.dones[k] = True
+                self.results[(1.0, -1.0, 0.0).index(reward)] += 1
+                self.newGame(k)
+        return self.obs, self.mask, self.rewards, self.dones
@@ -0,0 +1,145 @@
+'''Profiling hooks for gameLoop.
+Pass a Profiler to gameLoop to record call counts and latency histograms for
+every agent callback (per agent type) and for the engine's phases:
+
+    turn            a whole turn, including every agent callback in it
+    applyAction     applying the action, including reactions and card choices
+    broadcastRelativeTurnSummaries
+                    building views and calling every agent's turnSummary
+    bookkeeping     the time in a turn not spent inside agent callbacks
+
+Without a profiler gameLoop does a single None check per turn.
+'''
+import json
+import time
+from contextlib import contextmanager
+
+from coup import coup
+from coup.agents.proxy import AgentProxy
+
+# Latencies are bucketed by powers of two microseconds: bucket 0 is under 1us,
+# and bucket i (i >= 1) is from 2**(i-1) up to 2**i us.
+NUM_BUCKETS = 32
+ENGINE = 'engine'
+
+
+class LatencyStats:
+    __slots__ = ('count', 'seconds', 'minSeconds', 'maxSeconds', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.minSeconds = float('inf')
+        self.maxSeconds = 0.0
+        self.histogram = [0] * NUM_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds < self.minSeconds:
+            self.minSeconds = seconds
+        if seconds > self.maxSeconds:
+            self.maxSeconds = seconds
+        self.histogram[min(int(seconds * 1e6).bit_length(), NUM_BUCKETS - 1)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.seconds += other.seconds
+        self.minSeconds = min(self.minSeconds, other.minSeconds)
+        self.maxSeconds = max(self.maxSeconds, other.maxSeconds)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    def toDict(self):
+        return dict(count=self.count,
+                    totalSeconds=self.seconds,
+                    meanMicros=self.seconds / self.count * 1e6 if self.count else 0.0,
+                    minMicros=self.minSeconds * 1e6 if self.count else 0.0,
+                    maxMicros=self.maxSeconds * 1e6,
+                    histogram={f"<{2 ** i}us": n for i, n in enumerate(self.histogram) if n})
+
+    @classmethod
+    def fromDict(cls, d):
+        stats = cls()
+        stats.count = d['count']
+        stats.seconds = d['totalSeconds']
+        stats.minSeconds = d['minMicros'] / 1e6 if d['count'] else float('inf')
+        stats.maxSeconds = d['maxMicros'] / 1e6
+        for bucket, n in d['histogram'].items():
+            stats.histogram[int(bucket[1:-2]).bit_length() - 1] = n
+        return stats
+
+
+class Profiler:
+    '''Latency stats keyed by agent type name (or 'engine') and then by phase.'''
+    def __init__(self):
+        self.stats = {}
+        # Running total of time spent inside agent callbacks, to separate out the engine's own time.
+        self.agentSeconds = 0.0
+
+    def record(self, name, phase, seconds):
+        phases = self.stats.setdefault(name, {})
+        if phase not in phases:
+            phases[phase] = LatencyStats()
+        phases[phase].add(seconds)
+
+    @contextmanager
+    def phase(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(ENGINE, phase, time.perf_counter() - start)
+
+    def startTurn(self):
+        return time.perf_counter(), self.agentSeconds
+
+    def endTurn(self, turnStart):
+        start, agentSeconds = turnStart
+        seconds = time.perf_counter() - start
+        self.record(ENGINE, 'turn', seconds)
+        self.record(ENGINE, 'bookkeeping', seconds - (self.agentSeconds - agentSeconds))
+
+    def wrap(self, agent):
+        return ProfiledAgent(agent, self)
+
+    def merge(self, other):
+        for name, phases in other.stats.items():
+            for phase, stats in phases.items():
+                mine = self.stats.setdefault(name, {})
+                if phase not in mine:
+                    mine[phase] = LatencyStats()
+                mine[phase].merge(stats)
+        self.agentSeconds += other.agentSeconds
+
+    def toDict(self):
+        return {'agentSeconds': self.agentSeconds,
+                'stats': {name: {phase: stats.toDict() for phase, stats in phases.items()}
+                          for name, phases in self.stats.items()}}
+
+    @classmethod
+    def fromDict(cls, d):
+        profiler = cls()
+        profiler.stats = {name: {phase: LatencyStats.fromDict(stats) for phase, stats in phases.items()}
+                          for name, phases in d['stats'].items()}
+        profiler.agentSeconds = d['agentSeconds']
+        return profiler
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+
+
+class ProfiledAgent(AgentProxy):
+    def __init__(self, wrapped, profiler):
+        super().__init__(wrapped)
+        self.profiler = profiler
+        self.name = coup.agentTypeName(wrapped)
+
+    def call(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self.wrapped, method)(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            self.profiler.agentSeconds += seconds
+            self.profiler.record(self.name, method, seconds)
@@ -0,0 +1,205 @@
+'''Bot league: seat-balanced tables, a parallel runner and Glicko ratings.
+Given a registry of bots (like coup.cligame.bots), the league seats them at
+tables of tableSize and plays each table in blocks of one game per seating
+permutation, so no bot is favoured by its seat. Ratings are updated after every
+game with Glicko-1, where the winner beats everyone else at the table (and a
+draw is a draw between everyone), and come with a 95% confidence interval.
+
+Two schedules:
+    round-robin  every combination of tableSize bots is a table, and keeps
+                 playing blocks until its bots' ratings have converged
+    swiss        each round, bots are sorted by rating and seated at tables
+                 with their neighbours
+
+A table stops early once every pair of bots at it is settled: their intervals
+don't overlap, or both are narrower than precision. For example,
+
+    python -m coup.league --table-size 3 --workers 4 sean bay mikayla random
+'''
+import argparse
+import itertools
+import math
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from coup import coup
+
+# Rating is a bot's Glicko rating and rating deviation, with its games and wins.
+class Rating(namedtuple('Rating', ['rating', 'deviation', 'games', 'wins'])):
+    @property
+    def interval(self):
+        '''The 95% confidence interval of the rating.'''
+        return (self.rating - 1.96 * self.deviation, self.rating + 1.96 * self.deviation)
+
+# LeagueResult is the final standings: ratings maps bot name -> Rating,
+# and blocks maps each table (a tuple of bot names) to the blocks it played.
+LeagueResult = namedtuple('LeagueResult', ['ratings', 'games', 'seconds', 'blocks'])
+
+initial_rating = Rating(1500.0, 350.0, 0, 0)
+min_deviation = 30.0
+Q = math.log(10) / 400
+
+
+def glickoG(deviation):
+    return 1 / math.sqrt(1 + 3 * Q ** 2 * deviation ** 2 / math.pi ** 2)
+
+def updateRatings(ratings, table, winner):
+    '''Update ratings (a dict of name -> Rating) in place for one game.
+    table is the names at the table, and winner the index of the winner, or None for a draw.
+    '''
+    before = {name: ratings[name] for name in table}
+    for i, name in enumerate(table):
+        r = before[name]
+        if winner is None:
+            results = [(before[other], 0.5) for j, other in enumerate(table) if j != i]
+        elif i == winner:
+            results = [(before[other], 1.0) for j, other in enumerate(table) if j != i]
+        else:
+            results = [(before[table[winner]], 0.0)]
+        dInverse = 0.0
+        delta = 0.0
+        for opp, score in results:
+            g = glickoG(opp.deviation)
+            expected = 1 / (1 + 10 ** (-g * (r.rating - opp.rating) / 400))
+            dInverse += Q ** 2 * g ** 2 * expected * (1 - expected)
+            delta += g * (score - expected)
+        precision = 1 / r.deviation ** 2 + dInverse
+        ratings[name] = Rating(rating=r.rating + Q / precision * delta,
+                               deviation=max(math.sqrt(1 / precision), min_deviation),
+                               games=r.games + 1,
+                               wins=r.wins + (i == winner))
+
+def settled(ratings, table, precision):
+    '''True once every pair at the table is either ordered or both narrow.'''
+    for a, b in itertools.combinations(table, 2):
+        (aLow, aHigh), (bLow, bHigh) = ratings[a].interval, ratings[b].interval
+        if aHigh < bLow or bHigh < aLow:
+            continue
+        if max(ratings[a].deviation, ratings[b].deviation) * 1.96 > precision:
+            return False
+    return True
+
+
+class _WinnerSeat:
+    '''A gameLoop recorder that just notes the seat of the winner.'''
+    def wrap(self, agent):
+        return agent
+
+    def startGame(self, seed, gameState, rng):
+        self.seats = {p.name: seat for seat, p in enumerate(gameState.players)}
+
+    def recordTurn(self, before, after, turnSummary, rng):
+        pass
+
+    def endGame(self, gameState, winner):
+        self.seat = None if winner is None else self.seats[winner]
+
+
+def playBlock(factories, seed):
+    '''Play one game per seating of factories (a tuple of agent factories).
+    Returns the index in factories of each game's winner, or None for a draw.
+    '''
+    rng = random.Random(seed)
+    recorder = _WinnerSeat()
+    winners = []
+    for order in itertools.permutations(range(len(factories))):
+        coup.gameLoop([factories[i]() for i in order], seed=rng.getrandbits(64), recorder=recorder)
+        winners.append(None if recorder.seat is None else order[recorder.seat])
+    return winners
+
+
+def swissTables(ratings, names, tableSize):
+    '''Bots seated with their neighbours by rating. The last table is topped up
+    from the ones above it, so every bot plays at least once.
+    '''
+    ranked = sorted(names, key=lambda name: -ratings[name].rating)
+    tables = [tuple(ranked[i:i + tableSize]) for i in range(0, len(ranked), tableSize)]
+    if len(tables[-1]) < tableSize:
+        tables[-1] = tuple(ranked[-tableSize:])
+    return tables
+
+
+def runLeague(registry, tableSize=2, nWorkers=1, seed=None, schedule='round-robin',
+              precision=100.0, maxBlocks=50, rounds=20):
+    '''Play a league between the bots in registry (a dict of name -> factory).
+    Blocks run on a process pool with nWorkers > 1, and their results are
+    applied in a fixed order, so a seeded league gives the same standings on any pool size.
+    maxBlocks caps the blocks per round-robin table, and rounds the rounds of a swiss league.
+    '''
+    names = sorted(registry)
+    if not 2 <= tableSize <= min(6, len(names)):
+        raise ValueError(f"Table size must be from 2 to 6, and at most the {len(names)} bots")
+    rng = random.Random(seed)
+    ratings = {name: initial_rating for name in names}
+    blocks = {}
+    games = 0
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=nWorkers) if nWorkers > 1 else None
+    try:
+        if schedule == 'round-robin':
+            active = list(itertools.combinations(names, tableSize))
+            nRounds = maxBlocks
+        elif schedule == 'swiss':
+            nRounds = rounds
+        else:
+            raise ValueError(f"Unknown schedule {schedule!r}")
+        for _ in range(nRounds):
+            if schedule == 'swiss':
+                active = swissTables(ratings, names, tableSize)
+            if not active:
+                break
+            jobs = [(tuple(registry[name] for name in table), rng.getrandbits(64)) for table in active]
+            if pool is not None:
+                results = list(pool.map(playBlock, *zip(*jobs)))
+            else:
+                results = [playBlock(*job) for job in jobs]
+            for table, winners in zip(active, results):
+                blocks[table] = blocks.get(table, 0) + 1
+                for winner in winners:
+                    updateRatings(ratings, table, winner)
+                games += len(winners)
+            if schedule == 'round-robin':
+                active = [table for table in active if not settled(ratings, table, precision)]
+            elif all(settled(ratings, table, precision) for table in active):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return LeagueResult(ratings=ratings, games=games, seconds=time.perf_counter() - start, blocks=blocks)
+
+
+def printStandings(result):
+    print(f"{'bot':12}{'rating':>8}{'95% interval':>20}{'games':>8}{'wins':>8}")
+    for name, r in sorted(result.ratings.items(), key=lambda item: -item[1].rating):
+        low, high = r.interval
+        print(f"{name:12}{r.rating:8.0f}{f'{low:.0f} to {high:.0f}':>20}{r.games:8}{r.wins:8}")
+    print(f"{result.games} games, {sum(result.blocks.values())} blocks over {len(result.blocks)} tables"
+          f" in {result.seconds:.1f}s")
+
+
+def main():
+    from coup.cligame import bots
+
+    parser = argparse.ArgumentParser(description="Rate bots in a league of seat-balanced tables.")
+    parser.add_argument('bots', nargs='*', choices=sorted(bots), default=sorted(bots),
+                        help="Bots in the league (default: every registered bot).")
+    parser.add_argument('-t', '--table-size', type=int, default=2)
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('--schedule', choices=['round-robin', 'swiss'], default='round-robin')
+    parser.add_argument('--precision', type=float, default=100.0,
+                        help="Stop a table once its bots' 95%% intervals are this wide, or don't overlap.")
+    parser.add_argument('--max-blocks', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    result = runLeague({name: bots[name] for name in args.bots}, tableSize=args.table_size,
+                       nWorkers=args.workers, seed=args.seed, schedule=args.schedule,
+                       precision=args.precision, maxBlocks=args.max_blocks, rounds=args.rounds)
+    printStandings(result)
+
+
+if __name__ == "__main__":
+    main()
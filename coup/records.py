@@ -0,0 +1,211 @@
+'''Compact binary game records.
+Pass a GameRecordWriter to gameLoop as recorder to append each game to a file,
+and read them back with GameRecordReader, which memory-maps the file and decodes
+fields on demand, so a file of millions of games can be scanned without
+building a GameState (or even a tuple) per turn:
+
+    with GameRecordReader('games.rec') as games:
+        seatWins = Counter(game.winnerSeat for game in games)
+
+Players are identified by seat, their index in the deal, which doesn't change
+as players are knocked out (unlike the indexes in a GameState). Cards are Role
+values, with 0 for no card, and a hand is packed into one byte as card0 | card1 << 4.
+
+A file is a sequence of frames, one per game, all little-endian:
+
+    u32  frame length, not counting these 4 bytes
+    game header: u64 seed, u8 players, u16 turns, u8 winner seat (255 for a draw)
+    per seat: u8 dealt hand
+    per seat: u8 name length, then the name in UTF-8
+    per turn, 5 + 2 * players bytes:
+        u8 action, u8 active seat, u8 target seat (255 for none),
+        u8 success (1 or 0, 255 if the action can't fail),
+        u8 cards drawn for an exchange (as a hand, 0 otherwise),
+        per seat: u8 hand after the turn
+        per seat: u8 coins after the turn
+'''
+import mmap
+import struct
+
+from coup import coup
+from coup.agents.proxy import AgentProxy
+
+FRAME = struct.Struct('<I')
+HEADER = struct.Struct('<QBHB')
+TURN = struct.Struct('<BBBBB')
+NONE = 255
+
+
+def packHand(cards):
+    packed = 0
+    for i, card in enumerate(cards):
+        packed |= card.value << (4 * i)
+    return packed
+
+def unpackHand(packed):
+    return tuple(coup.Role(v) for v in (packed & 15, packed >> 4) if v)
+
+def turnSize(nPlayers):
+    return TURN.size + 2 * nPlayers
+
+
+class _DrawRecordingAgent(AgentProxy):
+    '''Passes the cards drawn for an exchange to the writer.
+    applyExchange offers the two drawn cards first, then the hand.
+    '''
+    def __init__(self, wrapped, writer, **kwargs):
+        super().__init__(wrapped)
+        self.writer = writer
+
+    def selectExchangeCards(self, playerView, cards):
+        self.writer.drawn = packHand(cards[:2])
+        return self.call('selectExchangeCards', playerView, cards)
+
+
+class GameRecordWriter:
+    '''Appends a frame to path for every game it records.
+    A game's turns are buffered and written in a single call when it ends,
+    so an unfinished game never leaves a partial frame in the file.
+    '''
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+        self.buffer = None
+        self.drawn = 0
+
+    def wrap(self, agent):
+        return _DrawRecordingAgent(agent, self)
+
+    def startGame(self, seed, gameState, rng=None):
+        players = gameState.players
+        self.nPlayers = len(players)
+        self.seed = seed
+        self.seats = {p.name: seat for seat, p in enumerate(players)}
+        self.turns = 0
+        # Draws from a game that was abandoned part way through don't count.
+        self.drawn = 0
+        self.buffer = bytearray(bytes(packHand(p.cards) for p in players))
+        for p in players:
+            name = p.name.encode()
+            self.buffer.append(len(name))
+            self.buffer += name
+
+    def recordTurn(self, before, after, turnSummary, rng=None):
+        seats = self.seats
+        target = getattr(turnSummary, 'targetPlayer', None)
+        success = getattr(turnSummary, 'success', None)
+        self.buffer += TURN.pack(turnSummary.action.value,
+                                 seats[before.players[turnSummary.activePlayer].name],
+                                 NONE if target is None else seats[before.players[target].name],
+                                 NONE if success is None else int(success),
+                                 self.drawn)
+        self.drawn = 0
+        hands = bytearray(self.nPlayers)
+        coins = bytearray(self.nPlayers)
+        for p in after.players:
+            seat = seats[p.name]
+            hands[seat] = packHand(p.cards)
+            coins[seat] = min(p.coins, 255)
+        self.buffer += hands
+        self.buffer += coins
+        self.turns += 1
+
+    def endGame(self, gameState, winner):
+        '''winner is the name of the winner, or None for a draw.'''
+        header = HEADER.pack(self.seed, self.nPlayers, self.turns,
+                             NONE if winner is None else self.seats[gameState.players[0].name])
+        self.file.write(FRAME.pack(len(header) + len(self.buffer)) + header + self.buffer)
+        self.buffer = None
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord:
+    '''One game in a mapped file. Fields are decoded from the buffer when read.'''
+    __slots__ = ('buffer', 'offset', 'seed', 'nPlayers', 'nTurns', 'winnerSeat', 'turnsOffset')
+
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.offset = offset
+        self.seed, self.nPlayers, self.nTurns, self.winnerSeat = HEADER.unpack_from(buffer, offset)
+        # Skip the deal and the names to find the turns.
+        pos = offset + HEADER.size + self.nPlayers
+        for _ in range(self.nPlayers):
+            pos += 1 + buffer[pos]
+        self.turnsOffset = pos
+
+    def deal(self):
+        start = self.offset + HEADER.size
+        return [unpackHand(h) for h in self.buffer[start:start + self.nPlayers]]
+
+    def names(self):
+        names = []
+        pos = self.offset + HEADER.size + self.nPlayers
+        for _ in range(self.nPlayers):
+            n = self.buffer[pos]
+            names.append(bytes(self.buffer[pos + 1:pos + 1 + n]).decode())
+            pos += 1 + n
+        return names
+
+    def winner(self):
+        return None if self.winnerSeat == NONE else self.names()[self.winnerSeat]
+
+    def turns(self):
+        '''The raw turn records, as memoryviews of turnSize(nPlayers) bytes:
+        [action, active, target, success, drawn, *hands, *coins].
+        '''
+        size = turnSize(self.nPlayers)
+        start = self.turnsOffset
+        for i in range(self.nTurns):
+            yield self.buffer[start + i * size:start + (i + 1) * size]
+
+    def turn(self, k):
+        size = turnSize(self.nPlayers)
+        start = self.turnsOffset + k * size
+        return self.buffer[start:start + size]
+
+
+class GameRecordReader:
+    '''Memory-maps a file written by GameRecordWriter. Iterating it yields a GameRecord per game.'''
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size() else None
+        self.buffer = memoryview(self.map) if self.map is not None else memoryview(b'')
+
+    def size(self):
+        self.file.seek(0, 2)
+        return self.file.tell()
+
+    def offsets(self):
+        '''The offset of each game's header.'''
+        pos, end = 0, len(self.buffer)
+        while pos < end:
+            (length,) = FRAME.unpack_from(self.buffer, pos)
+            yield pos + FRAME.size
+            pos += FRAME.size + length
+
+    def __iter__(self):
+        for offset in self.offsets():
+            yield GameRecord(self.buffer, offset)
+
+    def close(self):
+        self.buffer.release()
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # Records still hold views of the map; it's unmapped once they're gone.
+                pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
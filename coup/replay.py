@@ -0,0 +1,202 @@
+'''Deterministic replay of recorded games.
+Pass a DecisionLog to gameLoop as recorder to log the seed, the deal and every
+decision the agents make. replay then re-executes the game through applyAction
+and broadcastRelativeTurnSummaries with scripted agents in place of the real
+ones, checking every turn against the state the log saw:
+
+    log = DecisionLog(snapshotEvery=50)
+    coup.gameLoop(agents, seed=7, recorder=log)
+    gameState = replay(log, toTurn=120)
+    for turn, gameState, turnSummary in replayTurns(log, fromTurn=120):
+        ...
+
+Replaying to turn K starts from the last snapshot at or before K (the state,
+the game's random state and the position in the log), rather than from the deal,
+so only the turns after the snapshot are checked; replayTurns(log) checks them all.
+A log is plain namedtuples and enums, so it can be pickled.
+'''
+import random
+from collections import namedtuple
+
+from coup import coup
+from coup.coup import GameState, PlayerState, getPlayerView
+from coup.agents.agent import BaseAgent
+from coup.agents.proxy import AgentProxy
+
+# Decision is one agent callback: the seat (index in the deal) of the agent,
+# the method called and what it returned.
+Decision = namedtuple('Decision', ['seat', 'method', 'result'])
+
+# Snapshot is the game after turn turns: players as (cards, coins, name) tuples,
+# the deck, the state of the game's random.Random, and the number of decisions made.
+Snapshot = namedtuple('Snapshot', ['turn', 'players', 'deck', 'rngState', 'cursor'])
+
+logged_methods = ('selectAction', 'selectReaction', 'selectExchangeCards', 'selectKilledCard')
+
+
+class ReplayDivergence(Exception):
+    pass
+
+
+def stateKey(gameState):
+    '''Everything in a gameState except the agents, for comparing states.'''
+    return tuple((tuple(p.cards), p.coins, p.name) for p in gameState.players), gameState.deck
+
+
+class _LoggingAgent(AgentProxy):
+    def __init__(self, wrapped, log, seat, **kwargs):
+        super().__init__(wrapped)
+        self.log = log
+        self.seat = seat
+
+    def call(self, method, *args):
+        result = getattr(self.wrapped, method)(*args)
+        if method in logged_methods:
+            # Log exchanges as tuples, so the log is immutable whatever the agent returns.
+            self.log.decisions.append(Decision(self.seat, method,
+                                               tuple(result) if isinstance(result, list) else result))
+        return result
+
+
+class DecisionLog:
+    '''Records one game (the last one, if it's reused) for replay.
+    states[k] is the stateKey after k turns, so states[0] is the deal.
+    '''
+    def __init__(self, snapshotEvery=50):
+        self.snapshotEvery = snapshotEvery
+        self.seated = 0
+        self.seed = None
+        self.decisions = []
+        self.states = []
+        self.snapshots = []
+        self.winner = None
+
+    def wrap(self, agent):
+        self.seated += 1
+        return _LoggingAgent(agent, self, self.seated - 1)
+
+    def snapshot(self, gameState, rng):
+        players, deck = stateKey(gameState)
+        self.snapshots.append(Snapshot(len(self.states) - 1, players, deck, rng.getstate(), len(self.decisions)))
+
+    def startGame(self, seed, gameState, rng):
+        # The agents are wrapped by now; count seats from 0 again for the next game,
+        # even if this one ends in an exception rather than at endGame.
+        self.seated = 0
+        self.seed = seed
+        self.names = [p.name for p in gameState.players]
+        self.decisions = []
+        self.states = [stateKey(gameState)]
+        self.snapshots = []
+        self.winner = None
+        self.snapshot(gameState, rng)
+
+    def recordTurn(self, before, after, turnSummary, rng):
+        self.states.append(stateKey(after))
+        if (len(self.states) - 1) % self.snapshotEvery == 0:
+            self.snapshot(after, rng)
+
+    def endGame(self, gameState, winner):
+        self.winner = winner
+        self.seated = 0
+
+    @property
+    def turns(self):
+        return len(self.states) - 1
+
+
+class Script:
+    '''The logged decisions, handed out in order.'''
+    def __init__(self, decisions, cursor=0):
+        self.decisions = decisions
+        self.cursor = cursor
+
+    def next(self, seat, method):
+        if self.cursor >= len(self.decisions):
+            raise ReplayDivergence(f"Seat {seat} called {method} after the last logged decision")
+        decision = self.decisions[self.cursor]
+        if decision.seat != seat or decision.method != method:
+            raise ReplayDivergence(f"Seat {seat} called {method}, but the log has seat {decision.seat} "
+                                   f"calling {decision.method} (decision {self.cursor})")
+        self.cursor += 1
+        return decision.result
+
+
+class ScriptedAgent(BaseAgent):
+    '''Plays back one seat's decisions from a Script.'''
+    def __init__(self, script, seat, **kwargs):
+        self.script = script
+        self.seat = seat
+
+    def selectAction(self, playerView):
+        return self.script.next(self.seat, 'selectAction')
+
+    def selectReaction(self, playerView, actionInfo):
+        return self.script.next(self.seat, 'selectReaction')
+
+    def selectExchangeCards(self, playerView, cards):
+        return list(self.script.next(self.seat, 'selectExchangeCards'))
+
+    def selectKilledCard(self, playerView):
+        return self.script.next(self.seat, 'selectKilledCard')
+
+    def turnSummary(self, playerView, actionInfo):
+        pass
+
+
+def restore(log, turn=0):
+    '''The game from the last snapshot at or before turn.
+    Returns the gameState (with ScriptedAgents), the game's random.Random and the turn.
+    '''
+    snapshot = max((s for s in log.snapshots if s.turn <= turn), key=lambda s: s.turn)
+    script = Script(log.decisions, snapshot.cursor)
+    agents = {name: ScriptedAgent(script, seat) for seat, name in enumerate(log.names)}
+    gameState = GameState(players=[PlayerState(list(cards), coins, agents[name], name)
+                                   for cards, coins, name in snapshot.players],
+                          deck=snapshot.deck)
+    rng = random.Random()
+    rng.setstate(snapshot.rngState)
+    return gameState, rng, snapshot.turn
+
+def playTurn(gameState, turns, rng):
+    '''One turn of gameLoop.'''
+    i = turns % len(gameState.players)
+    action, relativeTarget = gameState.players[i].agent.selectAction(getPlayerView(gameState, i))
+    if relativeTarget is not None:
+        target = (i + relativeTarget + 1) % len(gameState.players)
+    else:
+        target = None
+    gameState, turnSummary = coup.applyAction(gameState, i, action, target, rng)
+    coup.broadcastRelativeTurnSummaries(turnSummary, gameState)
+    return gameState, turnSummary
+
+def checkState(log, turns, gameState):
+    if stateKey(gameState) != log.states[turns]:
+        raise ReplayDivergence(f"Turn {turns}: replayed {stateKey(gameState)}, logged {log.states[turns]}")
+
+def replayTurns(log, fromTurn=0, verify=True):
+    '''Replay the turns after fromTurn, yielding (turn, gameState, turnSummary) after each.
+    With verify, raises ReplayDivergence as soon as a state differs from the log.
+    '''
+    gameState, rng, turns = restore(log, fromTurn)
+    while turns < log.turns:
+        gameState, turnSummary = playTurn(gameState, turns, rng)
+        turns += 1
+        if verify:
+            checkState(log, turns, gameState)
+        if turns > fromTurn:
+            yield turns, gameState, turnSummary
+
+def replay(log, toTurn=None, verify=True):
+    '''The gameState after toTurn turns (by default, at the end of the game).'''
+    if toTurn is None:
+        toTurn = log.turns
+    if not 0 <= toTurn <= log.turns:
+        raise ValueError(f"The log has turns 0 to {log.turns}, not {toTurn}")
+    gameState, rng, turns = restore(log, toTurn)
+    while turns < toTurn:
+        gameState, _ = playTurn(gameState, turns, rng)
+        turns += 1
+        if verify:
+            checkState(log, turns, gameState)
+    return gameState
@@ -0,0 +1,337 @@
+'''Process-isolated agents.
+A SandboxPool hosts bots in long-lived worker processes, one bot per worker,
+and hands out SandboxedAgents that stand in for them in the engine. A bot that
+crashes, hangs (with a timeout) or tampers with its memory can't take the
+engine down with it, and a worker is reused for game after game, getting a
+fresh bot from its factory at the start of each:
+
+    with SandboxPool() as pool:
+        for seed in range(1000):
+            agents = [pool.agent(MrtBot), pool.agent(CommunityBot)]
+            coup.gameLoop(agents, seed=seed)
+            for agent in agents:
+                agent.release()
+
+Calls travel over a pipe as arrays of 16-bit ints: an opcode, then views,
+actions and cards as small ints (Role and Action values), with player names
+sent once and then referred to by number. Each reply carries the time the bot
+took, so ipcStats can separate the bot's time from the cost of the round trip.
+At the start of a game the worker is sent the state of the bot's random.Random,
+so a sandboxed bot plays exactly as it would in-process.
+'''
+import multiprocessing
+import pickle
+import random
+import struct
+import time
+from array import array
+
+from coup.coup import Role, Action, PlayerState, PlayerView, Summary, SummaryWTarget, \
+        SummaryWSuccess, SummaryWTargetSuccess
+from coup.agents.agent import BaseAgent
+
+NEW_GAME = 1
+NAMES = 2
+SELECT_ACTION = 3
+SELECT_REACTION = 4
+SELECT_EXCHANGE_CARDS = 5
+SELECT_KILLED_CARD = 6
+TURN_SUMMARY = 7
+CLOSE = 8
+
+methods = {SELECT_ACTION: 'selectAction', SELECT_REACTION: 'selectReaction',
+           SELECT_EXCHANGE_CARDS: 'selectExchangeCards', SELECT_KILLED_CARD: 'selectKilledCard',
+           TURN_SUMMARY: 'turnSummary'}
+
+# A reply starts with the bot's time in seconds, or ERROR if it raised.
+REPLY = struct.Struct('<d')
+ERROR = -1.0
+
+# Summaries are sent as their kind, by index in this list.
+summary_types = [Summary, SummaryWTarget, SummaryWSuccess, SummaryWTargetSuccess]
+
+
+class SandboxError(Exception):
+    '''The bot raised, hung, or its worker died. typeName is the bot's.'''
+    def __init__(self, message, typeName=None):
+        super().__init__(message)
+        self.typeName = typeName
+
+
+def encodeView(view, nameIds, out):
+    selfstate = view.selfstate
+    out += (selfstate.coins, nameIds[selfstate.name], len(selfstate.cards))
+    out += (card.value for card in selfstate.cards)
+    out.append(len(view.opponents))
+    for opp in view.opponents:
+        out += (opp.cards, opp.coins, nameIds[opp.name])
+
+def decodeView(ints, pos, names):
+    coins, name, nCards = ints[pos:pos + 3]
+    pos += 3
+    selfstate = PlayerState(tuple(Role(v) for v in ints[pos:pos + nCards]), coins, None, names[name])
+    pos += nCards
+    nOpps = ints[pos]
+    pos += 1
+    opponents = tuple(PlayerState(ints[i], ints[i + 1], None, names[ints[i + 2]])
+                      for i in range(pos, pos + 3 * nOpps, 3))
+    return PlayerView(selfstate, opponents), pos + 3 * nOpps
+
+def encodeSummary(summary, nameIds, out):
+    # Relative indexes can be -1 (you), so they're sent off by one.
+    out += (summary_types.index(type(summary)), summary.action.value,
+            summary.activePlayer + 1, nameIds[summary.activeName])
+    if 'targetPlayer' in summary._fields:
+        out += (summary.targetPlayer + 1, nameIds[summary.targetName])
+    if 'success' in summary._fields:
+        out.append(int(summary.success))
+
+def decodeSummary(ints, pos, names):
+    summaryType = summary_types[ints[pos]]
+    fields = [Action(ints[pos + 1]), ints[pos + 2] - 1, names[ints[pos + 3]]]
+    pos += 4
+    if 'targetPlayer' in summaryType._fields:
+        fields += [ints[pos] - 1, names[ints[pos + 1]]]
+        pos += 2
+    if 'success' in summaryType._fields:
+        fields.append(bool(ints[pos]))
+        pos += 1
+    return summaryType(*fields), pos
+
+
+def serve(conn, factory):
+    '''A worker's loop: host a bot from factory and answer calls until CLOSE.'''
+    agent = factory()
+    names = []
+    while True:
+        try:
+            message = conn.recv_bytes()
+        except EOFError:
+            return
+        op = message[0]
+        if op == TURN_SUMMARY:
+            # One way: nothing is sent back, and as its return value is
+            # thrown away anyway, neither is an exception.
+            ints = array('H')
+            ints.frombytes(message[2:])
+            try:
+                view, pos = decodeView(ints, 0, names)
+                agent.turnSummary(view, decodeSummary(ints, pos, names)[0])
+            except Exception:
+                pass
+            continue
+        if op == CLOSE:
+            return
+        if op == NAMES:
+            names.extend(message[1:].decode().split('\n'))
+            continue
+        if op == NEW_GAME:
+            rng = random.Random()
+            rng.setstate(pickle.loads(message[1:]))
+            agent = factory()
+            agent.newGame(rng)
+            continue
+
+        ints = array('H')
+        ints.frombytes(message[2:])
+        start = time.perf_counter()
+        try:
+            view, pos = decodeView(ints, 0, names)
+            if op == SELECT_ACTION:
+                action, target = agent.selectAction(view)
+                reply = (action.value, 0 if target is None else target + 1)
+            elif op == SELECT_REACTION:
+                reply = (int(bool(agent.selectReaction(view, (Action(ints[pos]), ints[pos + 1])))),)
+            elif op == SELECT_EXCHANGE_CARDS:
+                cards = [Role(v) for v in ints[pos + 1:pos + 1 + ints[pos]]]
+                reply = tuple(card.value for card in agent.selectExchangeCards(view, cards))
+            elif op == SELECT_KILLED_CARD:
+                reply = (agent.selectKilledCard(view).value,)
+        except Exception as e:
+            conn.send_bytes(REPLY.pack(ERROR) + f"{type(e).__name__}: {e}".encode())
+            continue
+        conn.send_bytes(REPLY.pack(time.perf_counter() - start) + array('H', reply).tobytes())
+
+
+class _Worker:
+    def __init__(self, factory, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=serve, args=(child, factory), daemon=True)
+        self.process.start()
+        child.close()
+        # Names the worker knows, and their numbers.
+        self.nameIds = {}
+
+    def stop(self):
+        try:
+            self.conn.send_bytes(bytes([CLOSE]))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SandboxedAgent(BaseAgent):
+    '''Stands in for a bot running in a worker process. See SandboxPool.agent.
+    With timeout, a call that takes longer kills the worker and raises SandboxError.
+    '''
+    def __init__(self, pool, factory, worker, timeout=None, **kwargs):
+        self.pool = pool
+        self.factory = factory
+        self.worker = worker
+        self.timeout = timeout
+        self.typeName = getattr(factory, '__name__', type(factory).__name__)
+        # method -> [calls, round trip seconds, bot seconds, bytes sent, bytes received]
+        self.stats = {}
+
+    def send(self, message):
+        try:
+            self.worker.conn.send_bytes(message)
+        except (BrokenPipeError, OSError) as e:
+            self.pool.discard(self.worker)
+            self.worker = self.pool.lease(self.factory)
+            raise SandboxError(f"{self.typeName} worker is gone", self.typeName) from e
+
+    def encode(self, view, extra=()):
+        '''The message for a call, after sending the worker any names it hasn't seen.'''
+        nameIds = self.worker.nameIds
+        new = [p.name for p in (view.selfstate,) + view.opponents if p.name not in nameIds]
+        new += [name for name in extra if isinstance(name, str) and name not in nameIds and name not in new]
+        if new:
+            for name in new:
+                nameIds[name] = len(nameIds)
+            self.send(bytes([NAMES]) + '\n'.join(new).encode())
+        ints = []
+        encodeView(view, nameIds, ints)
+        return ints
+
+    def call(self, op, ints):
+        message = bytes([op, 0]) + array('H', ints).tobytes()
+        stats = self.stats.setdefault(methods[op], [0, 0.0, 0.0, 0, 0])
+        start = time.perf_counter()
+        self.send(message)
+        if op == TURN_SUMMARY:
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+            stats[3] += len(message)
+            return None
+        conn = self.worker.conn
+        if self.timeout is not None and not conn.poll(self.timeout):
+            self.pool.discard(self.worker)
+            self.worker = self.pool.lease(self.factory)
+            raise SandboxError(f"{self.typeName} took longer than {self.timeout}s on {methods[op]}", self.typeName)
+        try:
+            reply = conn.recv_bytes()
+        except (EOFError, OSError) as e:
+            self.pool.discard(self.worker)
+            self.worker = self.pool.lease(self.factory)
+            raise SandboxError(f"{self.typeName} worker died during {methods[op]}", self.typeName) from e
+        seconds = time.perf_counter() - start
+        (botSeconds,) = REPLY.unpack_from(reply)
+        if botSeconds == ERROR:
+            raise SandboxError(f"{self.typeName}.{methods[op]} raised {reply[REPLY.size:].decode()}",
+                               self.typeName)
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += botSeconds
+        stats[3] += len(message)
+        stats[4] += len(reply)
+        result = array('H')
+        result.frombytes(reply[REPLY.size:])
+        return result
+
+    def newGame(self, rng):
+        self.send(bytes([NEW_GAME]) + pickle.dumps(rng.getstate()))
+
+    def selectAction(self, playerView):
+        action, target = self.call(SELECT_ACTION, self.encode(playerView))
+        return (Action(action), None if target == 0 else target - 1)
+
+    def selectReaction(self, playerView, actionInfo):
+        ints = self.encode(playerView)
+        ints += (actionInfo[0].value, actionInfo[1])
+        return bool(self.call(SELECT_REACTION, ints)[0])
+
+    def selectExchangeCards(self, playerView, cards):
+        ints = self.encode(playerView)
+        ints.append(len(cards))
+        ints += (card.value for card in cards)
+        return [Role(v) for v in self.call(SELECT_EXCHANGE_CARDS, ints)]
+
+    def selectKilledCard(self, playerView):
+        return Role(self.call(SELECT_KILLED_CARD, self.encode(playerView))[0])
+
+    def turnSummary(self, playerView, actionInfo):
+        names = [actionInfo.activeName, getattr(actionInfo, 'targetName', None)]
+        ints = self.encode(playerView, names)
+        encodeSummary(actionInfo, self.worker.nameIds, ints)
+        self.call(TURN_SUMMARY, ints)
+
+    def release(self):
+        '''Hand the worker back to the pool for another game.'''
+        if self.worker is not None:
+            self.pool.giveBack(self.factory, self.worker)
+            self.worker = None
+
+    def ipcStats(self):
+        '''Per method: calls, mean round trip, mean time in the bot, and the
+        difference (the cost of the sandbox), in microseconds, and bytes per call.
+        turnSummary is one way, so its round trip is just the send.
+        '''
+        result = {}
+        for method, (calls, seconds, botSeconds, sent, received) in self.stats.items():
+            result[method] = dict(calls=calls,
+                                  roundTripMicros=seconds / calls * 1e6,
+                                  botMicros=botSeconds / calls * 1e6,
+                                  overheadMicros=(seconds - botSeconds) / calls * 1e6,
+                                  bytesSent=sent / calls,
+                                  bytesReceived=received / calls)
+        return result
+
+
+class SandboxPool:
+    '''Worker processes, kept idle between games per bot factory.
+    Factories must be picklable (e.g. agent classes) if the start method is spawn.
+    '''
+    def __init__(self, context=None):
+        self.context = context or multiprocessing.get_context()
+        self.idle = {}
+        self.workers = []
+
+    def lease(self, factory):
+        idle = self.idle.get(factory)
+        if idle:
+            return idle.pop()
+        worker = _Worker(factory, self.context)
+        self.workers.append(worker)
+        return worker
+
+    def giveBack(self, factory, worker):
+        self.idle.setdefault(factory, []).append(worker)
+
+    def discard(self, worker):
+        worker.kill()
+        self.workers.remove(worker)
+
+    def agent(self, factory, timeout=None):
+        '''A SandboxedAgent for a bot built by factory, on an idle worker for it if there is one.'''
+        return SandboxedAgent(self, factory, self.lease(factory), timeout)
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+        self.idle = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,404 @@
+'''Self-play training of a policy for coup.broker.MLPPolicy.
+Actor processes play games with gameLoop, seating the current policy in the
+'self' seats of the table (and bots from coup.cligame.bots in any others).
+Every decision the policy makes is a transition (observation, legal mask,
+action), and when the game ends each gets the game's reward for that seat:
+1 for a win, -1 for a loss and 0 for a draw. The actors push them into a
+RingBuffer in shared memory.
+
+The learner, in the main process, reads the buffer in order, in minibatches
+that are views of the shared arrays rather than copies, and takes a
+REINFORCE step on each (with a running mean of rewards as the baseline). It
+publishes its weights to the actors through shared memory after every step,
+and every snapshotEvery steps saves them as a snapshot, which is registered
+as a bot in coup.cligame.bots and can be played like any other (see
+coup.agents.snapshot):
+
+    python -m coup.selfplay --actors 4 --updates 500 --snapshot-dir snapshots
+    COUP_SNAPSHOTS=snapshots python -m coup.tournament selfplay_500 mikayla random
+
+The actors are a step or two behind the learner's weights, which is fine for
+a policy that moves as slowly as this one. The buffer must be big enough that
+the actors don't lap the learner: a lapped learner skips ahead, counting the
+transitions it missed in overruns, and a step whose batch was written over
+while it was being computed is dropped, and counted in torn.
+'''
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from coup import coup
+from coup.broker import MLPPolicy, obsSize
+from coup.env import NUM_ACTIONS, encodeView, actionMask, decodeAction
+from coup.agents.bots import RandomAgent
+from coup.agents.snapshot import snapshotBot, snapshotName
+
+# Transitions is a minibatch: obs (B, inputs), mask (B, actions), action (B,) and reward (B,).
+Transitions = namedtuple('Transitions', ['obs', 'mask', 'action', 'reward'])
+
+
+class SharedArrays:
+    '''Arrays laid out one after another in a block of shared memory, created
+    by the learner and attached to by name in the actors.
+    '''
+    def __init__(self, layout, name=None):
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in layout)
+        self.layout = layout
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.arrays = []
+        offset = 0
+        for shape, dtype in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=offset)
+            offset += array.nbytes
+            self.arrays.append(array)
+        if self.owner:
+            for array in self.arrays:
+                array.fill(0)
+
+    def spec(self):
+        return self.layout, self.memory.name
+
+    def close(self):
+        self.arrays = []
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class RingBuffer:
+    '''A fixed number of transitions in shared memory, with the count written so far.'''
+    def __init__(self, capacity, nInputs, nActions, lock, name=None):
+        self.capacity = capacity
+        self.lock = lock
+        self.shared = SharedArrays([((1,), np.int64), ((capacity, nInputs), np.float32),
+                                    ((capacity, nActions), np.bool_), ((capacity,), np.int32),
+                                    ((capacity,), np.float32)], name)
+        self.written, self.obs, self.mask, self.action, self.reward = self.shared.arrays
+        # The learner's place, where its last batch started, and the
+        # transitions it missed by being lapped.
+        self.read = 0
+        self.batchStart = 0
+        self.overruns = 0
+
+    @classmethod
+    def attach(cls, spec, lock):
+        layout, name = spec
+        (capacity, nInputs), (_, nActions) = layout[1][0], layout[2][0]
+        return cls(capacity, nInputs, nActions, lock, name)
+
+    def spec(self):
+        return self.shared.spec()
+
+    def push(self, obs, mask, action, reward):
+        '''Append n transitions, overwriting the oldest once the buffer is full.'''
+        n = len(action)
+        # Of more than capacity, only the last capacity would survive.
+        skip = max(0, n - self.capacity)
+        with self.lock:
+            i = (int(self.written[0]) + skip) % self.capacity
+            first = min(n - skip, self.capacity - i)
+            for array, rows in zip((self.obs, self.mask, self.action, self.reward), (obs, mask, action, reward)):
+                array[i:i + first] = rows[skip:skip + first]
+                array[:n - skip - first] = rows[skip + first:]
+            self.written[0] += n
+
+    def consume(self, batchSize):
+        '''The next batchSize transitions, as views into the buffer, or None if
+        they haven't all been written yet. A batch stops short at the end of
+        the buffer rather than copy across it.
+        '''
+        with self.lock:
+            written = int(self.written[0])
+        if written - self.read > self.capacity:
+            self.overruns += written - self.capacity - self.read
+            self.read = written - self.capacity
+        if written - self.read < batchSize:
+            return None
+        i = self.read % self.capacity
+        j = min(i + batchSize, self.capacity)
+        self.batchStart = self.read
+        self.read += j - i
+        return Transitions(self.obs[i:j], self.mask[i:j], self.action[i:j], self.reward[i:j])
+
+    def intact(self):
+        '''Whether the last batch consume returned is still as it was: the
+        actors could have written over it since, as it's a view of the buffer.
+        '''
+        with self.lock:
+            return int(self.written[0]) - self.capacity <= self.batchStart
+
+    def close(self):
+        self.written = self.obs = self.mask = self.action = self.reward = None
+        self.shared.close()
+
+
+class SharedWeights:
+    '''The learner's policy weights, with a version that goes up with every publish.'''
+    def __init__(self, shapes, lock, name=None):
+        self.lock = lock
+        self.shared = SharedArrays([((1,), np.int64)] + [(shape, np.float32) for shape in shapes], name)
+        self.version = self.shared.arrays[0]
+        self.params = self.shared.arrays[1:]
+        self.seen = -1
+
+    @classmethod
+    def attach(cls, spec, lock):
+        layout, name = spec
+        return cls([shape for shape, _ in layout[1:]], lock, name)
+
+    def spec(self):
+        return self.shared.spec()
+
+    def publish(self, policy):
+        with self.lock:
+            for param, array in zip(self.params, flatLayers(policy)):
+                param[...] = array
+            self.version[0] += 1
+
+    def refresh(self, policy):
+        '''Copy the weights into policy, if they've changed since the last refresh.'''
+        if int(self.version[0]) == self.seen:
+            return
+        with self.lock:
+            for param, array in zip(self.params, flatLayers(policy)):
+                array[...] = param
+            self.seen = int(self.version[0])
+
+    def close(self):
+        self.params = self.version = None
+        self.shared.close()
+
+
+def flatLayers(policy):
+    return [array for layer in policy.layers for array in layer]
+
+def layerShapes(sizes):
+    return [shape for n, m in zip(sizes, sizes[1:]) for shape in ((n, m), (m,))]
+
+
+class SelfPlayAgent(RandomAgent):
+    '''Samples actions from the policy's softmax over the legal actions, and keeps them as transitions.
+    typeName tells the seats apart when the table is all the same policy.
+    '''
+    def __init__(self, policy, rng, typeName='self'):
+        self.policy = policy
+        self.npRng = rng
+        self.typeName = typeName
+        self.nOpponents = policy.nOpponents
+        self.masks = {}
+        self.obs, self.mask, self.action = [], [], []
+
+    def selectAction(self, playerView):
+        obs = np.zeros((1, self.policy.layers[0][0].shape[0]), dtype=np.float32)
+        encodeView(playerView, obs[0])
+        mask = actionMask(playerView, self.nOpponents, self.masks)
+        logits = np.where(mask, self.policy.logits(obs)[0], -np.inf)
+        p = np.exp(logits - logits.max())
+        action = int(self.npRng.choice(len(p), p=p / p.sum()))
+        self.obs.append(obs[0])
+        self.mask.append(mask)
+        self.action.append(action)
+        return decodeAction(action, self.nOpponents)
+
+
+def act(bufferSpec, weightsSpec, lock, sizes, table, seed, stop):
+    '''An actor process: play games with the latest weights until stop is set.'''
+    from coup.cligame import bots
+
+    buffer = RingBuffer.attach(bufferSpec, lock)
+    weights = SharedWeights.attach(weightsSpec, lock)
+    policy = MLPPolicy([(np.zeros(n * m, dtype=np.float32).reshape(n, m), np.zeros(m, dtype=np.float32))
+                        for n, m in zip(sizes, sizes[1:])])
+    rng = random.Random(seed)
+    npRng = np.random.default_rng(seed)
+    try:
+        while not stop.is_set():
+            weights.refresh(policy)
+            agents = [SelfPlayAgent(policy, npRng, f"self{i}") if name == 'self' else bots[name]()
+                      for i, name in enumerate(table)]
+            learners = [a for a in agents if isinstance(a, SelfPlayAgent)]
+            rng.shuffle(agents)
+            winner = coup.gameLoop(agents, seed=rng.getrandbits(64))
+            for agent in learners:
+                if agent.action:
+                    reward = 0.0 if winner is None else (1.0 if winner == agent.typeName else -1.0)
+                    buffer.push(np.array(agent.obs), np.array(agent.mask), np.array(agent.action),
+                                np.full(len(agent.action), reward, dtype=np.float32))
+    finally:
+        buffer.close()
+        weights.close()
+
+
+class SelfPlay:
+    '''The learner, and the actor processes feeding it.'''
+    def __init__(self, nActors=2, table=('self', 'self', 'self'), hidden=(64,), capacity=1 << 16,
+                 lr=0.01, batchSize=256, snapshotDir='snapshots', snapshotEvery=100, seed=None):
+        self.table = list(table)
+        self.nActors = nActors
+        self.lr = lr
+        self.batchSize = batchSize
+        self.snapshotDir = snapshotDir
+        self.snapshotEvery = snapshotEvery
+        self.seed = seed
+        nOpponents = len(self.table) - 1
+        self.policy = MLPPolicy.random(obsSize(nOpponents), nOpponents, hidden=hidden, seed=seed)
+        self.sizes = [obsSize(nOpponents)] + list(hidden) + [NUM_ACTIONS * nOpponents]
+        self.context = multiprocessing.get_context()
+        self.lock = self.context.Lock()
+        self.buffer = RingBuffer(capacity, self.sizes[0], self.sizes[-1], self.lock)
+        self.weights = SharedWeights(layerShapes(self.sizes), self.lock)
+        self.weights.publish(self.policy)
+        self.stop = self.context.Event()
+        self.actors = []
+        self.updates = 0
+        # Steps dropped because the actors wrote over their batch mid-step.
+        self.torn = 0
+        self.baseline = 0.0
+        self.snapshots = []
+
+    def start(self):
+        seeds = random.Random(self.seed)
+        for _ in range(self.nActors):
+            actor = self.context.Process(target=act, daemon=True,
+                                         args=(self.buffer.spec(), self.weights.spec(), self.lock, self.sizes,
+                                               self.table, seeds.getrandbits(64), self.stop))
+            actor.start()
+            self.actors.append(actor)
+
+    def gradients(self, batch):
+        '''The REINFORCE gradients for a minibatch, as (weights, bias) per layer.'''
+        n = len(batch.action)
+        activations = [batch.obs]
+        x = batch.obs
+        for i, (w, b) in enumerate(self.policy.layers):
+            x = x @ w + b
+            if i < len(self.policy.layers) - 1:
+                x = np.maximum(x, 0)
+                activations.append(x)
+        logits = np.where(batch.mask, x, -np.inf)
+        p = np.exp(logits - logits.max(axis=1, keepdims=True))
+        p /= p.sum(axis=1, keepdims=True)
+        advantage = batch.reward - self.baseline
+        # d(-advantage * log p[action]) / d logits
+        grad = p
+        grad[np.arange(n), batch.action] -= 1.0
+        grad *= (advantage / n)[:, None]
+        grads = []
+        for i in reversed(range(len(self.policy.layers))):
+            w, b = self.policy.layers[i]
+            grads.append((activations[i].T @ grad, grad.sum(axis=0)))
+            if i:
+                grad = (grad @ w.T) * (activations[i] > 0)
+        return grads[::-1]
+
+    def update(self, batch):
+        '''One REINFORCE step on a minibatch from the buffer. Returns its mean
+        reward, or None if the actors wrote over the batch before the step was
+        done, in which case it's dropped (and counted in torn).
+        '''
+        grads = self.gradients(batch)
+        reward = float(batch.reward.mean())
+        if not self.buffer.intact():
+            self.torn += 1
+            return None
+        for (w, b), (dw, db) in zip(self.policy.layers, grads):
+            w -= self.lr * dw
+            b -= self.lr * db
+        self.baseline += 0.05 * (reward - self.baseline)
+        return reward
+
+    def snapshot(self):
+        '''Save the policy, and register it as a bot.'''
+        from coup.cligame import bots
+
+        os.makedirs(self.snapshotDir, exist_ok=True)
+        path = os.path.join(self.snapshotDir, f"selfplay_{self.updates}.npz")
+        np.savez(path, **{f"{kind}{i}": array for i, layer in enumerate(self.policy.layers)
+                          for kind, array in zip('wb', layer)})
+        bots[snapshotName(path)] = snapshotBot(path)
+        self.snapshots.append(path)
+        return path
+
+    def train(self, nUpdates, log=None):
+        '''Take nUpdates learner steps, as fast as the actors fill the buffer.'''
+        target = self.updates + nUpdates
+        while self.updates < target:
+            batch = self.buffer.consume(self.batchSize)
+            while batch is None:
+                if self.actors and not any(actor.is_alive() for actor in self.actors):
+                    raise RuntimeError("The actors have all stopped")
+                time.sleep(0.001)
+                batch = self.buffer.consume(self.batchSize)
+            reward = self.update(batch)
+            del batch
+            if reward is None:
+                continue
+            self.weights.publish(self.policy)
+            self.updates += 1
+            if self.updates % self.snapshotEvery == 0:
+                path = self.snapshot()
+                if log is not None:
+                    log(f"update {self.updates}: mean reward {reward:+.3f}, saved {path}")
+
+    def close(self):
+        self.stop.set()
+        for actor in self.actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.kill()
+        self.buffer.close()
+        self.weights.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    from coup.cligame import bots
+    from coup.tournament import runTournament, printResult
+
+    parser = argparse.ArgumentParser(description="Train a policy by self-play, saving snapshots as bots.")
+    parser.add_argument('table', nargs='*', default=['self', 'self', 'self'],
+                        help="Seats: 'self' for the policy, or a bot name (default: three 'self').")
+    parser.add_argument('-a', '--actors', type=int, default=2)
+    parser.add_argument('-u', '--updates', type=int, default=500)
+    parser.add_argument('--hidden', type=int, nargs='*', default=[64])
+    parser.add_argument('--lr', type=float, default=0.01)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--capacity', type=int, default=1 << 16)
+    parser.add_argument('--snapshot-dir', default='snapshots')
+    parser.add_argument('--snapshot-every', type=int, default=100)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('--eval-games', type=int, default=500,
+                        help="Games of the final snapshot against random bots in the other seats.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with SelfPlay(nActors=args.actors, table=args.table, hidden=args.hidden, capacity=args.capacity,
+                  lr=args.lr, batchSize=args.batch_size, snapshotDir=args.snapshot_dir,
+                  snapshotEvery=args.snapshot_every, seed=args.seed) as selfplay:
+        selfplay.start()
+        selfplay.train(args.updates, log=print)
+        path = selfplay.snapshots[-1] if selfplay.updates % args.snapshot_every == 0 else selfplay.snapshot()
+        transitions = int(selfplay.buffer.written[0])
+        overruns = selfplay.buffer.overruns
+        torn = selfplay.torn
+    print(f"{args.updates} updates on {transitions} transitions ({overruns} overrun, {torn} steps dropped)"
+          f" in {time.perf_counter() - start:.1f}s")
+    if args.eval_games:
+        printResult(runTournament([bots[snapshotName(path)]] + [RandomAgent] * (len(args.table) - 1),
+                                  args.eval_games, seed=0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+'''Head-to-head bot comparison with a sequential probability ratio test.
+A candidate bot plays a baseline in batches of seat-balanced pairs of games
+(one with each bot moving first), and after every game the log likelihood
+ratio of
+
+    H1: the candidate is elo1 stronger    against    H0: it's elo0 stronger
+
+is checked against Wald's bounds for error rates alpha and beta, so the test
+stops as soon as the games so far are conclusive instead of after a fixed
+number. Draws (games that hit the turn limit) are counted but don't move the
+test. For CI, the exit code is 0 if H1 is accepted, 1 if H0 is, and 2 if
+maxGames ran out first:
+
+    python -m coup.sprt sean mypackage.bots:TweakedSean --elo1 30
+
+Bots are names from coup.cligame.bots, or module:Class for a bot that isn't
+registered.
+'''
+import argparse
+import importlib
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from coup.league import playBlock
+
+ACCEPT_H1 = 'H1'
+ACCEPT_H0 = 'H0'
+INCONCLUSIVE = None
+
+# SPRTResult is the outcome of a test: decision is ACCEPT_H1, ACCEPT_H0 or
+# INCONCLUSIVE, llr the final log likelihood ratio and bounds Wald's (lower, upper).
+SPRTResult = namedtuple('SPRTResult', ['decision', 'wins', 'losses', 'draws', 'llr', 'bounds', 'seconds'])
+
+
+def eloToScore(elo):
+    '''The expected score against an opponent elo points weaker.'''
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def waldBounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+def winRateInterval(wins, games, z=1.96):
+    '''Wilson score interval of the win rate, 95% by default.'''
+    if games == 0:
+        return (0.0, 1.0)
+    p = wins / games
+    centre = (p + z * z / (2 * games)) / (1 + z * z / games)
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return (centre - half, centre + half)
+
+
+def runSPRT(candidate, baseline, elo0=0.0, elo1=20.0, alpha=0.05, beta=0.05,
+            batchSize=100, maxGames=20000, nWorkers=1, seed=None):
+    '''Test candidate against baseline (agent factories). Games are played
+    batchSize at a time, across nWorkers processes, and checked one by one in
+    a fixed order, so a seeded test stops at the same game on any pool size.
+    '''
+    if elo1 <= elo0:
+        raise ValueError("elo1 must be greater than elo0")
+    p0, p1 = eloToScore(elo0), eloToScore(elo1)
+    winLLR, lossLLR = math.log(p1 / p0), math.log((1 - p1) / (1 - p0))
+    lower, upper = waldBounds(alpha, beta)
+    rng = random.Random(seed)
+    wins = losses = draws = 0
+    llr = 0.0
+    decision = INCONCLUSIVE
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=nWorkers) if nWorkers > 1 else None
+    try:
+        while decision is INCONCLUSIVE and wins + losses + draws < maxGames:
+            # Each block is two games, one with each bot in seat 0.
+            seeds = [rng.getrandbits(64) for _ in range(max(1, batchSize // 2))]
+            factories = [(candidate, baseline)] * len(seeds)
+            if pool is not None:
+                blocks = pool.map(playBlock, factories, seeds)
+            else:
+                blocks = map(playBlock, factories, seeds)
+            for winner in (w for block in blocks for w in block):
+                if winner is None:
+                    draws += 1
+                elif winner == 0:
+                    wins += 1
+                    llr += winLLR
+                else:
+                    losses += 1
+                    llr += lossLLR
+                if llr >= upper:
+                    decision = ACCEPT_H1
+                elif llr <= lower:
+                    decision = ACCEPT_H0
+                if decision is not INCONCLUSIVE or wins + losses + draws >= maxGames:
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return SPRTResult(decision=decision, wins=wins, losses=losses, draws=draws, llr=llr,
+                      bounds=(lower, upper), seconds=time.perf_counter() - start)
+
+
+def printResult(result, candidateName='candidate', baselineName='baseline'):
+    games = result.wins + result.losses + result.draws
+    decided = result.wins + result.losses
+    low, high = winRateInterval(result.wins, decided)
+    rate = result.wins / decided if decided else 0.0
+    print(f"{candidateName} vs {baselineName}: {result.wins} wins, {result.losses} losses,"
+          f" {result.draws} draws in {games} games ({result.seconds:.1f}s)")
+    print(f"win rate {rate:.3f} (95% interval {low:.3f} to {high:.3f})")
+    print(f"LLR {result.llr:.2f} (bounds {result.bounds[0]:.2f}, {result.bounds[1]:.2f})")
+    if result.decision == ACCEPT_H1:
+        print(f"H1 accepted: {candidateName} is stronger")
+    elif result.decision == ACCEPT_H0:
+        print(f"H0 accepted: {candidateName} is not stronger")
+    else:
+        print("Inconclusive: out of games")
+
+
+def loadBot(spec):
+    '''A registered bot name, or module:Class.'''
+    from coup.cligame import bots
+
+    if spec in bots:
+        return bots[spec]
+    moduleName, sep, className = spec.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"{spec!r} isn't a registered bot ({', '.join(sorted(bots))}) or module:Class")
+    return getattr(importlib.import_module(moduleName), className)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test whether a bot is stronger than another, in as few games as it takes.")
+    parser.add_argument('candidate', type=loadBot)
+    parser.add_argument('baseline', type=loadBot)
+    parser.add_argument('--elo0', type=float, default=0.0, help="Elo difference under H0.")
+    parser.add_argument('--elo1', type=float, default=20.0, help="Elo difference under H1.")
+    parser.add_argument('--alpha', type=float, default=0.05, help="False positive rate.")
+    parser.add_argument('--beta', type=float, default=0.05, help="False negative rate.")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--max-games', type=int, default=20000)
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    result = runSPRT(args.candidate, args.baseline, elo0=args.elo0, elo1=args.elo1,
+                     alpha=args.alpha, beta=args.beta, batchSize=args.batch_size,
+                     maxGames=args.max_games, nWorkers=args.workers, seed=args.seed)
+    printResult(result, args.candidate.__name__, args.baseline.__name__)
+    sys.exit({ACCEPT_H1: 0, ACCEPT_H0: 1}.get(result.decision, 2))
+
+
+if __name__ == "__main__":
+    main()
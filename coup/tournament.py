@@ -0,0 +1,219 @@
+'''Headless tournament runner.
+Plays a large number of games across a pool of worker processes and merges
+the results, e.g.
+
+    python -m coup.tournament --games 100000 --workers 8 sean bay mikayla random
+'''
+import argparse
+import os
+import random
+import shutil
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from coup import coup
+from coup.instrument import Profiler
+from coup.budget import BudgetedAgent
+from coup.records import GameRecordWriter
+from coup.sandbox import SandboxPool, SandboxError
+from coup.stalemate import StalemateDetector
+
+
+# TournamentResult is the merged outcome of a batch of games.
+# Wins is a Counter of winner name -> games won, draws is the number of games
+# that hit the turn limit, and seconds is the wall-clock duration of the batch.
+# Profile is the merged coup.instrument.Profiler, if the games were profiled.
+# Timeouts maps agent type name -> Counter of callback -> calls that overran
+# their budget, if the agents had one (see coup.budget).
+# Stalemates is the StalemateDetector.stats() totals, if stuck games were ended early.
+# Forfeits is a Counter of agent type name -> games it crashed or hung in, if the
+# bots were sandboxed; those games are scored as draws.
+class TournamentResult(namedtuple('TournamentResult', ['wins', 'draws', 'games', 'seconds', 'profile', 'timeouts',
+                                                       'stalemates', 'forfeits'],
+                                  defaults=(None, None, None, None))):
+    @property
+    def gamesPerSecond(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+def playGames(agentFactories, nGames, seed, profile=False, timeout=None, record=None, sandbox=False,
+              stalemate=False):
+    '''Play nGames with fresh agents from agentFactories, shuffling the seating every game.
+    Every game gets its own seed, drawn from seed.
+    With timeout, every agent callback is limited to that many seconds.
+    With record, the games are appended to that path (see coup.records).
+    With sandbox, every bot runs in its own worker process, reused from game to game,
+    and a bot that raises (or, with timeout, overruns) forfeits the game, which
+    is scored as a draw.
+    With stalemate, stuck games end early as draws (see coup.stalemate).
+    Returns a Counter of winners, where a None winner is a draw, the
+    profile of the games as a dict (or None, without profile), the
+    timeouts per agent type (or None, without timeout or with sandbox), the
+    stalemate stats (or None, without stalemate) and the forfeits per agent
+    type (or None, without sandbox).
+    '''
+    rng = random.Random(seed)
+    profiler = Profiler() if profile else None
+    timeouts = {} if timeout is not None and not sandbox else None
+    forfeits = Counter() if sandbox else None
+    recorder = GameRecordWriter(record) if record is not None else None
+    pool = SandboxPool() if sandbox else None
+    detector = StalemateDetector() if stalemate else None
+    winners = Counter()
+    try:
+        for _ in range(nGames):
+            if sandbox:
+                # The sandbox enforces the timeout itself, by replacing a hung worker.
+                agents = [pool.agent(factory, timeout) for factory in agentFactories]
+            else:
+                agents = [factory() for factory in agentFactories]
+                if timeout is not None:
+                    agents = [BudgetedAgent(a, timeout) for a in agents]
+            rng.shuffle(agents)
+            gameSeed = rng.getrandbits(64)
+            try:
+                winners[coup.gameLoop(agents, seed=gameSeed, profiler=profiler, recorder=recorder,
+                                      stalemate=detector)] += 1
+            except SandboxError as e:
+                forfeits[e.typeName] += 1
+                winners[None] += 1
+            finally:
+                for agent in agents:
+                    if sandbox:
+                        agent.release()
+                    elif timeout is not None:
+                        agent.close()
+                        timeouts.setdefault(coup.agentTypeName(agent), Counter()).update(agent.timeouts)
+    finally:
+        if pool is not None:
+            pool.close()
+        if recorder is not None:
+            recorder.close()
+    return (winners, profiler.toDict() if profile else None, timeouts,
+            detector.stats() if stalemate else None, forfeits)
+
+
+def chunkSeeds(nGames, chunkSize, seed):
+    '''Split nGames into chunks of at most chunkSize games, each with its own seed.
+    The split only depends on the arguments, not on the number of workers,
+    so a seeded tournament gives the same results on any pool size.
+    '''
+    rng = random.Random(seed)
+    chunks = []
+    while nGames > 0:
+        n = min(chunkSize, nGames)
+        chunks.append((n, rng.getrandbits(64)))
+        nGames -= n
+    return chunks
+
+
+def runTournament(agentFactories, nGames, nWorkers=1, seed=None, chunkSize=1000, profile=False, timeout=None,
+                  record=None, sandbox=False, stalemate=False):
+    '''Play nGames between agents built by agentFactories and merge the results.
+    agentFactories is a list of picklable callables (usually agent classes),
+    each called once per game to seat a fresh agent.
+    With nWorkers > 1 the games are fanned out across a process pool.
+    With profile, every game is profiled and the merged Profiler is returned in the result.
+    With timeout, every agent callback gets that many seconds before a fallback
+    move is played for it, and the timeouts per agent are returned in the result
+    (with sandbox, overrunning is a forfeit instead).
+    With record, every game is appended to that path as a coup.records game record,
+    in the same order whatever the number of workers.
+    With sandbox, the bots run in worker processes of their own (see coup.sandbox),
+    a bot that crashes or overruns the timeout forfeits the game as a draw, and
+    the forfeits per agent are returned in the result.
+    With stalemate, stuck games are ended early as draws, and the turns that
+    saved are returned in the result (see coup.stalemate).
+    '''
+    chunks = chunkSeeds(nGames, chunkSize, seed)
+    # Each chunk records to its own file, and they're joined in order at the end.
+    parts = [f"{record}.part{k}" if record is not None else None for k in range(len(chunks))]
+    start = time.perf_counter()
+    if nWorkers > 1:
+        with ProcessPoolExecutor(max_workers=nWorkers) as pool:
+            futures = [pool.submit(playGames, agentFactories, n, s, profile, timeout, part, sandbox, stalemate)
+                       for (n, s), part in zip(chunks, parts)]
+            results = [f.result() for f in futures]
+    else:
+        results = [playGames(agentFactories, n, s, profile, timeout, part, sandbox, stalemate)
+                   for (n, s), part in zip(chunks, parts)]
+    if record is not None:
+        with open(record, 'ab') as out:
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+    seconds = time.perf_counter() - start
+
+    wins = Counter()
+    profiler = Profiler() if profile else None
+    timeouts = {} if timeout is not None and not sandbox else None
+    stalemates = Counter() if stalemate else None
+    forfeits = Counter() if sandbox else None
+    for winners, chunkProfile, chunkTimeouts, chunkStalemates, chunkForfeits in results:
+        wins.update(winners)
+        if profile:
+            profiler.merge(Profiler.fromDict(chunkProfile))
+        if chunkTimeouts is not None:
+            for name, counts in chunkTimeouts.items():
+                timeouts.setdefault(name, Counter()).update(counts)
+        if stalemate:
+            stalemates.update(chunkStalemates)
+        if sandbox:
+            forfeits.update(chunkForfeits)
+    draws = wins.pop(None, 0)
+    return TournamentResult(wins=wins, draws=draws, games=nGames, seconds=seconds,
+                            profile=profiler, timeouts=timeouts,
+                            stalemates=dict(stalemates) if stalemate else None, forfeits=forfeits)
+
+
+def printResult(result):
+    for winner, val in result.wins.most_common():
+        print(val, '\t', winner)
+    print(result.draws, '\t', 'draws')
+    for name, counts in sorted((result.timeouts or {}).items()):
+        if counts:
+            print(sum(counts.values()), '\t', 'timeouts by', name, dict(counts))
+    for name, count in sorted((result.forfeits or {}).items()):
+        print(count, '\t', 'forfeits by', name)
+    if result.stalemates is not None:
+        s = result.stalemates
+        print(s['stalemates'], '\t', 'stalemates ended early, saving', s['turnsSaved'], 'of',
+              s['turnsPlayed'] + s['turnsSaved'], 'turns')
+    print(f"{result.games} games in {result.seconds:.2f}s ({result.gamesPerSecond:.1f} games/sec)")
+
+
+def main():
+    from coup.cligame import bots
+
+    parser = argparse.ArgumentParser(description="Run a headless tournament between bots.")
+    parser.add_argument('bots', nargs='+', choices=sorted(bots),
+                        help="Bots to seat at the table (repeat a name to seat it twice).")
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Profile the agents and the engine, and write the results to PATH as JSON.")
+    parser.add_argument('--record', metavar='PATH',
+                        help="Append every game to PATH as a binary game record (see coup.records).")
+    parser.add_argument('--sandbox', action='store_true',
+                        help="Run every bot in a worker process of its own.")
+    parser.add_argument('--stalemate', action='store_true',
+                        help="End games that are stuck going round in circles early, as draws.")
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                        help="Limit every agent callback to SECONDS, playing a fallback move on timeout.")
+    args = parser.parse_args()
+
+    result = runTournament([bots[b] for b in args.bots], args.games,
+                           nWorkers=args.workers, seed=args.seed, chunkSize=args.chunk_size,
+                           profile=args.profile is not None, timeout=args.timeout,
+                           record=args.record, sandbox=args.sandbox, stalemate=args.stalemate)
+    printResult(result)
+    if args.profile:
+        result.profile.dump(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+'''Vectorized simulator that plays thousands of games in lockstep with NumPy.
+Every game is a row in a set of arrays, and each step advances all unfinished
+games by one turn. Only agents with a batched policy (BaseAgent.selectActions)
+can play, e.g.
+
+    result = simulate([MrtBot(), BayBot(), MrtBot()], 100000, seed=0)
+
+Actions follow the rules of coup.py, with these simplifications so that every
+decision except the action itself is a function of the hand:
+    - a player blocks whenever they hold the blocking card,
+    - lost cards and exchanges are chosen by the agent's card_preferences
+      (best first, by Role name); agents without one keep cards in Role order.
+'''
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from coup import coup
+from coup.coup import Role, Action
+from coup.agents.agent import BaseAgent
+from coup.tournament import TournamentResult
+
+# Cards are Role values, with 0 for an empty slot, as in coup.compact.
+EMPTY = 0
+NUM_ROLES = len(Role)
+NUM_ACTIONS = len(Action)
+NO_TARGET = -1
+
+# BatchView is the batched equivalent of PlayerView, for the B games in which an agent is to act.
+# Coins is (B,) and cards is (B, 2), with the player's cards first and empty slots last.
+# OppCoins and oppCards (the number of cards) are (B, P-1), with live opponents first, in the
+# same order as PlayerView.opponents, and padded with zeros.
+# Eligible is a (B, NUM_ACTIONS + 1) boolean mask indexed by Action value,
+# the batched equivalent of findEligibleActions.
+BatchView = namedtuple('BatchView', ['coins', 'cards', 'oppCoins', 'oppCards', 'eligible'])
+
+
+def _eligibleTable():
+    '''eligible[card0, card1, coins] is the action mask for that hand, built from coup.eligible_actions.'''
+    roles = (None,) + tuple(Role)
+    table = np.zeros((NUM_ROLES + 1, NUM_ROLES + 1, coup.max_coins + 1, NUM_ACTIONS + 1), dtype=bool)
+    for c0 in range(NUM_ROLES + 1):
+        for c1 in range(NUM_ROLES + 1):
+            hand = tuple(roles[c] for c in (c0, c1) if c)
+            for coins in range(coup.max_coins + 1):
+                for action in coup.eligible_actions[hand, coins]:
+                    table[c0, c1, coins, action.value] = True
+    return table
+
+ELIGIBLE = _eligibleTable()
+
+
+def cardRanks(agent):
+    '''Rank of each card value for an agent (lower is better), with empty slots ranked last.'''
+    preferences = getattr(agent, 'card_preferences', [role.name for role in Role])
+    ranks = np.full(NUM_ROLES + 1, NUM_ROLES + 1, dtype=np.int64)
+    for rank, name in enumerate(preferences):
+        ranks[Role[name].value] = rank
+    return ranks
+
+
+def firstIndex(mask, default=0):
+    '''Index of the first True in each row of mask, or default for rows without one.'''
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), default)
+
+
+def holds(cards, role):
+    return (cards == role.value).any(axis=-1)
+
+
+def drawCards(deck, rows, rng):
+    '''Draw one card per row in rows from the deck counts, in place.
+    Each card in a deck is equally likely, as with shuffling a list of cards.
+    '''
+    counts = deck[rows]
+    r = rng.integers(0, counts.sum(axis=1))
+    drawn = (counts.cumsum(axis=1) <= r[:, None]).sum(axis=1)
+    deck[rows, drawn] -= 1
+    return drawn + 1
+
+
+class VectorizedGames:
+    '''N games between the same agents, with the seating permuted per game.
+    coins is (N, P), cards is (N, P, 2) and deck is (N, NUM_ROLES) role counts.
+    seatAgent[g, s] is the index in agents of the agent in seat s of game g.
+    '''
+    def __init__(self, agents, nGames, rng, shuffleSeats=True, maxTurns=1000):
+        self.agents = agents
+        self.rng = rng
+        self.maxTurns = maxTurns
+        nSeats = len(agents)
+        self.ranks = np.stack([cardRanks(a) for a in agents])
+
+        if shuffleSeats:
+            self.seatAgent = rng.permuted(np.tile(np.arange(nSeats), (nGames, 1)), axis=1)
+        else:
+            self.seatAgent = np.tile(np.arange(nSeats), (nGames, 1))
+
+        # Deal from a shuffled copy of the base deck per game.
+        baseDeck = np.repeat(np.arange(1, NUM_ROLES + 1), 3)
+        shuffled = rng.permuted(np.tile(baseDeck, (nGames, 1)), axis=1)
+        self.cards = shuffled[:, :2 * nSeats].reshape(nGames, nSeats, 2).astype(np.int64)
+        self.deck = np.zeros((nGames, NUM_ROLES), dtype=np.int64)
+        rest = shuffled[:, 2 * nSeats:]
+        for v in range(NUM_ROLES):
+            self.deck[:, v] = (rest == v + 1).sum(axis=1)
+        self.coins = np.full((nGames, nSeats), 2, dtype=np.int64)
+        self.turns = np.zeros(nGames, dtype=np.int64)
+        self.winner = np.full(nGames, -1, dtype=np.int64)
+        # Indexes of the games still being played.
+        self.running = np.arange(nGames)
+
+    def alive(self):
+        return self.cards[:, :, 0] != EMPTY
+
+    def step(self):
+        '''Play one turn in every unfinished game. Returns the number of games still running.'''
+        games = self.running
+        alive = self.cards[games, :, 0] != EMPTY
+        nAlive = alive.sum(axis=1)
+        won = nAlive == 1
+        self.winner[games[won]] = alive[won].argmax(axis=1)
+        over = won | (self.turns[games] > self.maxTurns)
+        if over.any():
+            games, alive, nAlive = games[~over], alive[~over], nAlive[~over]
+            self.running = games
+        if len(games) == 0:
+            return 0
+
+        nSeats = self.coins.shape[1]
+        # Like gameLoop, the active player is turns % the number of players left.
+        rank = np.cumsum(alive, axis=1) - 1
+        active = (alive & (rank == (self.turns[games] % nAlive)[:, None])).argmax(axis=1)
+        # Opponents in PlayerView order: live seats after the active one, wrapping round.
+        relative = (np.arange(nSeats)[None, :] - active[:, None] - 1) % nSeats
+        key = np.where(alive, relative, nSeats + relative)
+        key[np.arange(len(games)), active] = 3 * nSeats
+        oppSeats = np.argsort(key, axis=1)[:, :nSeats - 1]
+        nOpps = nAlive - 1
+
+        actions, targets = self.selectActions(games, active, oppSeats, nOpps)
+        targetSeat = oppSeats[np.arange(len(games)), np.where(targets < 0, 0, targets) % nOpps]
+        self.apply(games, active, targetSeat, actions)
+        self.turns[games] += 1
+        return len(games)
+
+    def selectActions(self, games, active, oppSeats, nOpps):
+        actions = np.zeros(len(games), dtype=np.int64)
+        targets = np.full(len(games), NO_TARGET, dtype=np.int64)
+        activeAgent = self.seatAgent[games, active]
+        for k, agent in enumerate(self.agents):
+            rows = np.flatnonzero(activeAgent == k)
+            if len(rows) == 0:
+                continue
+            g, a, opps = games[rows], active[rows], oppSeats[rows]
+            live = np.arange(opps.shape[1])[None, :] < nOpps[rows][:, None]
+            cards = self.cards[g, a]
+            coins = self.coins[g, a]
+            view = BatchView(coins=coins, cards=cards,
+                             oppCoins=np.where(live, self.coins[g[:, None], opps], 0),
+                             oppCards=np.where(live, (self.cards[g[:, None], opps] != EMPTY).sum(axis=2), 0),
+                             eligible=ELIGIBLE[cards[:, 0], cards[:, 1], np.minimum(coins, coup.max_coins)])
+            actions[rows], targets[rows] = agent.selectActions(view)
+        return actions, targets
+
+    def loseCard(self, games, seats):
+        '''Each seat loses its least preferred card.'''
+        cards = self.cards[games, seats]
+        ranks = self.ranks[self.seatAgent[games, seats]]
+        cardRank = np.take_along_axis(ranks, cards, axis=1)
+        # With a single card, the empty second slot ranks last but the card still goes.
+        lose = np.where(cards[:, 1] == EMPTY, 0, cardRank.argmax(axis=1))
+        keep = np.where(lose == 0, cards[:, 1], cards[:, 0])
+        self.cards[games, seats, 0] = keep
+        self.cards[games, seats, 1] = EMPTY
+
+    def apply(self, games, active, targets, actions):
+        coins, cards = self.coins, self.cards
+
+        rows = actions == Action.INCOME.value
+        coins[games[rows], active[rows]] += 1
+
+        rows = actions == Action.TAX.value
+        coins[games[rows], active[rows]] += 3
+
+        rows = np.flatnonzero(actions == Action.FOREIGN_AID.value)
+        g = games[rows]
+        dukes = holds(cards[g], Role.DUKE)
+        dukes[np.arange(len(rows)), active[rows]] = False
+        unblocked = ~dukes.any(axis=1)
+        coins[g[unblocked], active[rows][unblocked]] += 2
+
+        rows = np.flatnonzero(actions == Action.STEAL.value)
+        g, a, t = games[rows], active[rows], targets[rows]
+        blocked = holds(cards[g, t], Role.CAPTAIN) | holds(cards[g, t], Role.AMBASSADOR)
+        delta = np.where(blocked, 0, np.minimum(coins[g, t], 2))
+        coins[g, t] -= delta
+        coins[g, a] += delta
+
+        rows = np.flatnonzero(actions == Action.ASSASSINATE.value)
+        g, a, t = games[rows], active[rows], targets[rows]
+        coins[g, a] -= 3
+        hit = ~holds(cards[g, t], Role.CONTESSA)
+        self.loseCard(g[hit], t[hit])
+
+        rows = np.flatnonzero(actions == Action.COUP.value)
+        g, a, t = games[rows], active[rows], targets[rows]
+        coins[g, a] -= 7
+        self.loseCard(g, t)
+
+        rows = np.flatnonzero(actions == Action.EXCHANGE.value)
+        if len(rows):
+            self.exchange(games[rows], active[rows])
+
+    def exchange(self, games, seats):
+        '''Draw two cards, keep the best of those and the hand, and return the rest to the deck.'''
+        hand = self.cards[games, seats]
+        offers = np.concatenate([hand, drawCards(self.deck, games, self.rng)[:, None],
+                                 drawCards(self.deck, games, self.rng)[:, None]], axis=1)
+        ranks = np.take_along_axis(self.ranks[self.seatAgent[games, seats]], offers, axis=1)
+        order = np.argsort(ranks, axis=1, kind='stable')
+        ordered = np.take_along_axis(offers, order, axis=1)
+        nHand = (hand != EMPTY).sum(axis=1)
+        self.cards[games, seats, 0] = ordered[:, 0]
+        self.cards[games, seats, 1] = np.where(nHand == 2, ordered[:, 1], EMPTY)
+        returned = np.where(np.arange(4)[None, :] >= nHand[:, None], ordered, EMPTY)
+        for v in range(1, NUM_ROLES + 1):
+            self.deck[games, v - 1] += (returned == v).sum(axis=1)
+
+
+def simulate(agents, nGames, seed=None, shuffleSeats=True, maxTurns=1000):
+    '''Play nGames between agents in lockstep and return a TournamentResult.
+    Winners are named by agent type, as gameLoop does.
+    '''
+    for agent in agents:
+        if type(agent).selectActions is BaseAgent.selectActions:
+            raise ValueError(f"{type(agent).__name__} has no batched policy (selectActions)")
+    start = time.perf_counter()
+    games = VectorizedGames(agents, nGames, np.random.default_rng(seed),
+                            shuffleSeats=shuffleSeats, maxTurns=maxTurns)
+    while games.step():
+        pass
+    names = np.array([type(a).__name__ for a in agents] + [None], dtype=object)
+    winners = games.seatAgent[np.arange(nGames), games.winner]
+    wins = Counter(names[np.where(games.winner >= 0, winners, len(agents))])
+    draws = wins.pop(None, 0)
+    return TournamentResult(wins=wins, draws=draws, games=nGames, seconds=time.perf_counter() - start)
@@ -0,0 +1,140 @@
+'''Zobrist hashing of game positions.
+A position is everything in a GameState that decides the rest of the game:
+the seat order, each seat's coins and hand (as a multiset), the deck multiset,
+and whose turn it is (gameLoop's turns % the number of players). Agents and
+names aren't part of it.
+
+The hash is built from a fingerprint per player, the XOR of a random 64-bit
+key per (role, copy) in their hand and one for their coins, and a base for the
+deck (a key per role and count) and the number of players. hashState computes
+them from scratch; updateHash updates them after a turn by XORing out the old
+keys and in the new ones for just the players and deck counts the turn
+changed, so it costs O(1) per change, except when a player is knocked out
+(at most once per player per game), when it's recomputed.
+
+Fingerprints don't depend on the seat, so the seats are mixed in when a hash
+is read: each fingerprint is multiplied by a key for its seat. absoluteHash
+numbers the seats as they are, and canonicalHash from the player to move, so
+that a position is the same wherever the table starts. Both cost O(n):
+
+    hashes = hashState(before)
+    after, turnSummary = coup.applyAction(before, mover, action, target, rng)
+    hashes = updateHash(hashes, before, after, turnSummary)
+    key = canonicalHash(hashes, turns + 1)
+
+infosetHash hashes only what one player can see of a position (everyone's
+coins and card counts, and their own hand), for searches over information sets.
+'''
+import random
+
+from coup.coup import Role
+
+MAX_SEATS = 8
+MAX_COINS = 63
+MAX_COPIES = 3
+
+_keys = random.Random(0x5eed)
+
+def _key():
+    return _keys.getrandbits(64)
+
+MASK = (1 << 64) - 1
+
+# hand_keys[role.value][k] is XORed in for the k-th copy (from 0) of role in a hand.
+hand_keys = [[_key() for _ in range(MAX_COPIES)] for _ in range(len(Role) + 1)]
+coin_keys = [_key() for _ in range(MAX_COINS + 1)]
+# seat_keys[seat] multiplies the fingerprint of the player in seat (odd, so it loses no bits of it).
+seat_keys = [_key() | 1 for _ in range(MAX_SEATS)]
+# card_count_keys[n] is XORed in for a player holding n cards, in an information set.
+card_count_keys = [_key() for _ in range(2 * MAX_COPIES + 1)]
+# deck_keys[role.value][n] is XORed in when the deck holds n copies of role.
+deck_keys = [[_key() for _ in range(3 * MAX_COPIES + 1)] for _ in range(len(Role) + 1)]
+player_count_keys = [_key() for _ in range(MAX_SEATS + 1)]
+# pointer_keys[n][i] marks player i to move of n, in the absolute (unrotated) hash.
+pointer_keys = [[_key() for _ in range(n)] for n in range(MAX_SEATS + 1)]
+
+
+def handHash(cards):
+    '''The XOR of the hand keys for cards, in any order.'''
+    if len(cards) == 2 and cards[0] == cards[1]:
+        return hand_keys[cards[0].value][0] ^ hand_keys[cards[0].value][1]
+    h = 0
+    if len(cards) <= 2:
+        for card in cards:
+            h ^= hand_keys[card.value][0]
+        return h
+    previous, copy = None, 0
+    for card in sorted(cards, key=lambda c: c.value):
+        copy = copy + 1 if card == previous else 0
+        h ^= hand_keys[card.value][copy]
+        previous = card
+    return h
+
+def playerHash(playerState):
+    '''A player's fingerprint, whatever their seat.'''
+    return coin_keys[min(playerState.coins, MAX_COINS)] ^ handHash(playerState.cards)
+
+def deckHash(deck):
+    h = 0
+    for i, count in enumerate(deck):
+        h ^= deck_keys[i + 1][count]
+    return h
+
+def hashState(gameState):
+    '''The position's hashes: the base for the deck and number of players,
+    then each player's fingerprint, in seat order.
+    '''
+    players = gameState.players
+    return (deckHash(gameState.deck) ^ player_count_keys[len(players)],) + tuple(playerHash(p) for p in players)
+
+def updateHash(hashes, before, after, turnSummary):
+    '''The hashes after a turn, from the hashes before it.
+    before and after are the gameStates either side of the turn, and turnSummary
+    is what applyAction returned for it.
+    '''
+    if len(after.players) != len(before.players):
+        return hashState(after)
+    hashes = list(hashes)
+    if before.deck != after.deck:
+        for i, (old, new) in enumerate(zip(before.deck, after.deck)):
+            if old != new:
+                hashes[0] ^= deck_keys[i + 1][old] ^ deck_keys[i + 1][new]
+    # Only the active player and the target can change in a turn.
+    for i in {turnSummary.activePlayer, getattr(turnSummary, 'targetPlayer', turnSummary.activePlayer)}:
+        old, new = before.players[i], after.players[i]
+        if old.coins != new.coins or old.cards != new.cards:
+            hashes[i + 1] = playerHash(new)
+    return tuple(hashes)
+
+def seatedHash(hashes, first):
+    '''The hash with player first in seat 0.'''
+    n = len(hashes) - 1
+    h = hashes[0]
+    for i in range(n):
+        h ^= (hashes[i + 1] * seat_keys[(i - first) % n]) & MASK
+    return h
+
+def absoluteHash(hashes, turns):
+    '''The hash of the position with the seats as they are.'''
+    n = len(hashes) - 1
+    return seatedHash(hashes, 0) ^ pointer_keys[n][turns % n]
+
+def canonicalHash(hashes, turns):
+    '''The hash of the position rotated so the player to move is in seat 0.
+    Positions that differ only by a rotation of the table have the same canonical hash.
+    '''
+    return seatedHash(hashes, turns % (len(hashes) - 1))
+
+def infosetHash(gameState, mover):
+    '''The hash of what players[mover] knows of the position: the number of
+    players, each one's coins and number of cards, seated from the mover, and
+    the mover's own hand. Positions that differ only in the other players'
+    hands and the deck have the same infoset hash. It's computed from scratch, in O(n).
+    '''
+    players = gameState.players
+    n = len(players)
+    h = player_count_keys[n] ^ handHash(players[mover].cards)
+    for i, p in enumerate(players):
+        public = coin_keys[min(p.coins, MAX_COINS)] ^ card_count_keys[len(p.cards)]
+        h ^= (public * seat_keys[(i - mover) % n]) & MASK
+    return h
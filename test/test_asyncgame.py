@@ -0,0 +1,51 @@
+import asyncio
+
+from coup import coup, asyncgame
+from coup.coup import Action
+from coup.asyncgame import SyncAgentAdapter
+from coup.agents.agent import AsyncBaseAgent
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def adapted(agents):
+    return [SyncAgentAdapter(a) for a in agents]
+
+
+def test_async_game_matches_sync_game():
+    for seed in range(10):
+        expected = coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=seed)
+        assert asyncio.run(asyncgame.gameLoop(adapted([MrtBot(), BayBot(), SeanAgent()]), seed=seed)) == expected
+
+
+def test_interleaved_games_match_sync_games():
+    async def playAll():
+        return await asyncio.gather(*(asyncgame.gameLoop(adapted([SeanAgent(), MrtBot()]), seed=s)
+                                      for s in range(50)))
+    assert asyncio.run(playAll()) == [coup.gameLoop([SeanAgent(), MrtBot()], seed=s) for s in range(50)]
+
+
+class SlowBlocker(AsyncBaseAgent):
+    '''Takes foreign aid every turn, and waits on a pretend backend before declining to block it.'''
+    inFlight = 0
+    maxInFlight = 0
+
+    async def selectAction(self, playerView):
+        if Action.FOREIGN_AID in coup.findEligibleActions(playerView.selfstate):
+            return (Action.FOREIGN_AID, None)
+        return (Action.COUP, 0)
+
+    async def selectReaction(self, playerView, actionInfo):
+        SlowBlocker.inFlight += 1
+        SlowBlocker.maxInFlight = max(SlowBlocker.maxInFlight, SlowBlocker.inFlight)
+        await asyncio.sleep(0.001)
+        SlowBlocker.inFlight -= 1
+        return False
+
+    async def selectKilledCard(self, playerView):
+        return playerView.selfstate.cards[0]
+
+
+def test_foreign_aid_reactions_are_gathered():
+    winner = asyncio.run(asyncgame.gameLoop([SlowBlocker() for _ in range(4)], seed=0))
+    assert winner == 'SlowBlocker'
+    assert SlowBlocker.maxInFlight == 3
@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+from coup import coup
+from coup.coup import Role, Action, PlayerState, PlayerView, Summary, SummaryWTargetSuccess
+from coup.agents.belief import BeliefTracker
+from coup.agents.bots import RandomAgent, MrtBot, BayBot, SeanAgent
+
+
+def view(cards, opponents):
+    return PlayerView(PlayerState(tuple(cards), 2, None, 'me'),
+                      tuple(PlayerState(n, 2, None, name) for name, n in opponents))
+
+
+def test_prior_is_the_deal():
+    belief = BeliefTracker()
+    belief.see(view([Role.DUKE, Role.DUKE], [('a', 2)]))
+    # One DUKE left among the 13 cards we can't see.
+    assert belief.probability('a', Role.DUKE) == pytest.approx(1 - math.comb(12, 2) / math.comb(13, 2))
+    assert sum(belief.hand('a').values()) == pytest.approx(1)
+
+
+def test_claims_and_lost_cards():
+    belief = BeliefTracker()
+    start = view([Role.DUKE, Role.CONTESSA], [('a', 2), ('b', 2)])
+    belief.update(start, Summary(Action.TAX, 0, 'a'))
+    assert belief.probability('a', Role.DUKE) == pytest.approx(1)
+    belief.update(start, SummaryWTargetSuccess(Action.STEAL, 0, 'a', 1, 'b', False))
+    assert belief.probability('b', Role.CAPTAIN) + belief.probability('b', Role.AMBASSADOR) >= 1
+    assert belief.probability('b', Role.DUKE) < belief.probability('b', Role.CAPTAIN)
+    # a is assassinated, losing either card with equal chance.
+    before = belief.hand('a')
+    belief.update(view([Role.DUKE, Role.CONTESSA], [('a', 1), ('b', 2)]),
+                  SummaryWTargetSuccess(Action.ASSASSINATE, 1, 'b', 0, 'a', True))
+    assert all(len(hand) == 1 for hand in belief.hand('a'))
+    assert belief.probability('a', Role.DUKE) == pytest.approx(
+        sum(p * (1 if hand == (Role.DUKE, Role.DUKE) else 0.5) for hand, p in before.items()))
+    assert belief.probability('b', Role.ASSASSIN) == pytest.approx(1)
+    # And an exchange deals b a fresh hand.
+    belief.update(view([Role.DUKE, Role.CONTESSA], [('a', 1), ('b', 2)]), Summary(Action.EXCHANGE, 1, 'b'))
+    assert belief.probability('b', Role.ASSASSIN) < 1
+
+
+class TrackingAgent(RandomAgent):
+    def newGame(self, rng):
+        super().newGame(rng)
+        self.belief = BeliefTracker()
+
+    def turnSummary(self, playerView, actionInfo):
+        self.belief.update(playerView, actionInfo)
+
+    def selectExchangeCards(self, playerView, cards):
+        kept = super().selectExchangeCards(playerView, cards)
+        self.belief.exchanged(cards, kept)
+        return kept
+
+
+class TrueHands:
+    '''A recorder that checks the tracker never rules out an opponent's real hand.'''
+    def wrap(self, agent):
+        return agent
+
+    def startGame(self, seed, gameState, rng):
+        pass
+
+    def endGame(self, gameState, winner):
+        pass
+
+    def recordTurn(self, before, after, turnSummary, rng):
+        for player in after.players:
+            if isinstance(player.agent, TrackingAgent):
+                for opp in after.players:
+                    if opp is not player:
+                        hand = tuple(sorted(opp.cards, key=lambda c: c.value))
+                        assert player.agent.belief.hand(opp.name).get(hand, 0) > 0
+
+
+def test_real_hands_are_never_ruled_out():
+    for seed in range(50):
+        coup.gameLoop([TrackingAgent(), MrtBot(), BayBot(), SeanAgent()], seed=seed, recorder=TrueHands())
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from coup import coup, asyncgame
+from coup.asyncgame import SyncAgentAdapter
+from coup.broker import InferenceBroker, MLPPolicy, PolicyAgent, AsyncPolicyAgent, obsSize
+from coup.agents.bots import MrtBot, BayBot
+
+
+policy = MLPPolicy.random(obsSize(2), 2, hidden=(32,), seed=0)
+
+
+def test_batched_decisions_match_the_policy():
+    rng = np.random.default_rng(1)
+    obs = rng.random((200, obsSize(2))).astype(np.float32)
+    mask = rng.random((200, policy.layers[-1][0].shape[1])) < 0.5
+    mask[:, 0] = True
+    with InferenceBroker(policy, maxBatch=16, maxWait=0.01) as broker:
+        with ThreadPoolExecutor(32) as pool:
+            actions = list(pool.map(broker.decide, obs, mask))
+    assert actions == list(policy.act(obs, mask))
+    stats = broker.stats()
+    assert stats['decisions'] == 200
+    assert stats['meanBatch'] > 1
+    assert max(n for n, count in enumerate(broker.batchSizes) if count) <= 16
+
+
+def test_threaded_games_play_the_policy():
+    def game(seed):
+        return coup.gameLoop([PolicyAgent(broker), MrtBot(), BayBot()], seed=seed)
+
+    with InferenceBroker(policy, maxBatch=8, maxWait=0.001) as broker:
+        with ThreadPoolExecutor(8) as pool:
+            threaded = list(pool.map(game, range(16)))
+    with InferenceBroker(policy, maxBatch=1, maxWait=0) as broker:
+        serial = [game(seed) for seed in range(16)]
+    assert threaded == serial
+
+
+def test_async_games_play_the_policy():
+    async def games(broker):
+        return await asyncio.gather(*(asyncgame.gameLoop([AsyncPolicyAgent(broker), SyncAgentAdapter(MrtBot()),
+                                                          SyncAgentAdapter(BayBot())], seed=seed)
+                                      for seed in range(16)))
+
+    with InferenceBroker(policy, maxBatch=8, maxWait=0.001) as broker:
+        winners = asyncio.run(games(broker))
+        assert broker.stats()['meanBatch'] > 1
+    with InferenceBroker(policy, maxBatch=1, maxWait=0) as broker:
+        serial = [coup.gameLoop([PolicyAgent(broker), MrtBot(), BayBot()], seed=seed) for seed in range(16)]
+    assert winners == serial
+
+
+def test_policy_errors_reach_the_callers():
+    # A policy for three opponents, at a table with two.
+    wrong = MLPPolicy.random(obsSize(3), 3, seed=0)
+    obs = np.zeros(obsSize(2), dtype=np.float32)
+    mask = np.ones(wrong.layers[-1][0].shape[1], dtype=bool)
+    with InferenceBroker(wrong, maxBatch=4, maxWait=0.001) as broker:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                broker.decide(obs, mask)
+        with pytest.raises(ValueError):
+            asyncio.run(broker.decideAsync(obs, mask))
+        # Still serving.
+        assert broker.decide(np.zeros(obsSize(3), dtype=np.float32), mask) >= 0
+        with pytest.raises(TypeError):
+            PolicyAgent(broker, maxbatch=8)
+
+
+def test_cancelled_decisions_are_skipped():
+    obs = np.zeros(obsSize(2), dtype=np.float32)
+    mask = np.ones(policy.layers[-1][0].shape[1], dtype=bool)
+    with InferenceBroker(policy, maxBatch=4, maxWait=0.01) as broker:
+        futures = [broker.submit(obs, mask) for _ in range(8)]
+        for future in futures[::2]:
+            future.cancel()
+        # Cancelled before the broker got to it, or decided.
+        assert all(f.cancelled() or f.result() >= 0 for f in futures)
+        cancelled = Future()
+        cancelled.cancel()
+        broker.run([(cancelled, obs, mask, 0.0)])
+        # Still serving.
+        assert broker.decide(obs, mask) >= 0
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from coup import coup, tournament
+from coup.coup import Action
+from coup.budget import BudgetedAgent
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+class HungAgent(SeanAgent):
+    '''Hangs on every selectAction until released.'''
+    def __init__(self):
+        self.release = threading.Event()
+
+    def selectAction(self, playerView):
+        self.release.wait()
+        return super().selectAction(playerView)
+
+
+def test_budget_does_not_change_a_fast_game():
+    agents = [BudgetedAgent(a, timeout=5.0) for a in [MrtBot(), BayBot(), SeanAgent()]]
+    assert coup.gameLoop(agents, seed=2) == coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=2)
+    for agent in agents:
+        agent.close()
+        assert sum(agent.timeouts.values()) == 0
+    assert agents[0].timeoutStats()['selectAction']['calls'] > 0
+
+
+def test_hung_agent_falls_back_and_game_finishes():
+    hung = HungAgent()
+    budgeted = BudgetedAgent(hung, timeout=0.01)
+    winner = coup.gameLoop([budgeted, MrtBot()], seed=0)
+    hung.release.set()
+    budgeted.close()
+    assert winner in {'HungAgent', 'MrtBot'}
+    stats = budgeted.timeoutStats()['selectAction']
+    assert stats['timeouts'] == stats['calls'] > 0
+
+
+class SlowOnceAgent(SeanAgent):
+    '''Overruns its first selectAction, and counts the calls it gets.'''
+    def __init__(self):
+        self.actions = 0
+
+    def selectAction(self, playerView):
+        self.actions += 1
+        if self.actions == 1:
+            time.sleep(0.3)
+        return super().selectAction(playerView)
+
+
+def test_agent_is_not_called_again_after_a_timeout():
+    slow = SlowOnceAgent()
+    budgeted = BudgetedAgent(slow, timeout=0.05)
+    coup.gameLoop([budgeted, MrtBot()], seed=0)
+    stats = budgeted.timeoutStats()
+    # The stuck call is left alone with the agent for the rest of the game.
+    assert slow.actions == 1
+    assert stats['selectAction']['timeouts'] == 1 and stats['selectAction']['skipped'] > 0
+    assert budgeted.skipped['turnSummary'] > 0
+
+    # Once it's finished, the next game uses the agent again.
+    time.sleep(0.5)
+    coup.gameLoop([budgeted, MrtBot()], seed=1)
+    budgeted.close()
+    assert slow.actions > 1
+
+
+def test_fallback_action_coups_when_forced():
+    game = coup.dealGame([coup.Role.DUKE] * 15, [SeanAgent(), SeanAgent()])
+    rich = game.players[0]._replace(coins=10)
+    view = coup.getPlayerView(game._replace(players=[rich, game.players[1]]), 0)
+    hung = HungAgent()
+    budgeted = BudgetedAgent(hung, budgets=dict(selectAction=0.01))
+    assert budgeted.selectAction(view) == (Action.COUP, 0)
+    hung.release.set()
+    budgeted.close()
+
+
+def test_tournament_reports_timeouts():
+    result = tournament.runTournament([MrtBot, BayBot], 4, seed=0, timeout=5.0)
+    assert sum(result.wins.values()) + result.draws == 4
+    assert set(result.timeouts) == {'MrtBot', 'BayBot'}
+    assert all(sum(counts.values()) == 0 for counts in result.timeouts.values())
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from coup import coup, compact
+from coup.coup import Role, Action
+from coup.agents.bots import RandomAgent, MrtBot, BayBot, SeanAgent
+
+baseDeck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+
+
+def test_round_trip():
+    game = coup.dealGame(baseDeck[:], [BayBot(), MrtBot(), SeanAgent()])
+    state = compact.fromGameState(game)
+    decoded = compact.toGameState(state)
+    assert decoded.players == game.players
+    assert decoded.deck == game.deck
+
+
+def test_views_match_namedtuple_engine():
+    game = coup.dealGame(baseDeck[:], [BayBot(), MrtBot(), SeanAgent(), RandomAgent()])
+    state = compact.fromGameState(game)
+    for i in range(4):
+        assert compact.getPlayerView(state, i) == coup.getPlayerView(game, i)
+
+
+def test_copy_is_independent():
+    state = compact.fromGameState(coup.dealGame(baseDeck[:], [BayBot(), MrtBot()]))
+    before = state.copy()
+    compact.applyAction(state, 0, Action.INCOME)
+    assert compact.getPlayerView(before, 0).selfstate.coins == 2
+    assert compact.getPlayerView(state, 0).selfstate.coins == 3
+
+
+@pytest.mark.parametrize("action,target", [
+            (Action.INCOME, None), (Action.FOREIGN_AID, None), (Action.TAX, None),
+            (Action.STEAL, 2), (Action.ASSASSINATE, 2), (Action.COUP, 2)])
+def test_actions_match_namedtuple_engine(action, target):
+    game = coup.GameState(players=[
+        coup.PlayerState(cards=[Role.CAPTAIN], coins=9, agent=MrtBot(), name='0th'),
+        coup.PlayerState(cards=[Role.ASSASSIN, Role.CAPTAIN], coins=9, agent=MrtBot(), name='1st'),
+        coup.PlayerState(cards=[Role.DUKE, Role.AMBASSADOR], coins=5, agent=MrtBot(), name='2nd')
+        ], deck=coup.makeDeck([Role.DUKE, Role.CONTESSA]))
+    applied, summary = coup.applyAction(game, 1, action, target)
+    state, compactSummary = compact.applyAction(compact.fromGameState(game), 1, action, target)
+    assert compactSummary == summary
+    assert compact.toGameState(state).players == applied.players
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_games_conserve_cards(seed):
+    random.seed(seed)
+    agents = [RandomAgent(), MrtBot(), BayBot(), SeanAgent()]
+    state = compact.dealGame(baseDeck[:], agents)
+    turns = 0
+    while len(state.order) > 1 and turns < 1000:
+        i = turns % len(state.order)
+        action, relativeTarget = state.agents[state.order[i]].selectAction(compact.getPlayerView(state, i))
+        target = None if relativeTarget is None else (i + relativeTarget + 1) % len(state.order)
+        state, summary = compact.applyAction(state, i, action, target)
+        # Exchanges always return as many cards as they draw.
+        game = compact.toGameState(state)
+        assert sum(game.deck) == 15 - 2 * len(agents)
+        assert all(1 <= len(p.cards) <= 2 for p in game.players)
+        turns += 1
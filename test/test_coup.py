@@ -1,3 +1,7 @@
+import itertools
+import random
+from collections import Counter
+
 import pytest
 
 from coup import coup
@@ -66,6 +70,33 @@ def test_eligible_captain_actions():
     assert coup.findEligibleActions(player) == {Action.COUP}
 
 
+@pytest.mark.parametrize("cards,expected", [
+            ([], set()),
+            ([Role.DUKE], {Reaction.BLOCK_FOREIGN_AID}),
+            ([Role.ASSASSIN], set()),
+            ([Role.CONTESSA], {Reaction.BLOCK_ASSASSINATION}),
+            ([Role.AMBASSADOR], {Reaction.BLOCK_STEAL}),
+            ([Role.CAPTAIN, Role.AMBASSADOR], {Reaction.BLOCK_STEAL}),
+            ([Role.DUKE, Role.CONTESSA], {Reaction.BLOCK_FOREIGN_AID, Reaction.BLOCK_ASSASSINATION})])
+def test_eligible_reactions(cards, expected):
+    player = coup.PlayerState(cards=cards, coins=0, agent=None, name=None)
+    assert coup.findEligibleReactions(player) == expected
+
+
+def test_eligible_action_table_matches_rules():
+    # Check the precomputed table against the rules for every hand, past the coin cap.
+    for hand in coup.all_hands:
+        for coins in range(13):
+            player = coup.PlayerState(cards=list(hand), coins=coins, agent=None, name=None)
+            if coins >= 10:
+                expected = {Action.COUP}
+            else:
+                expected = {act for card in hand for act in coup.available_actions[card]
+                            if isinstance(act, Action) and coup.action_expense[act] <= coins}
+            assert coup.findEligibleActions(player) == expected
+            assert all(coup.canAffordAction(player, act) for act in expected)
+
+
 def test_get_player_view():
     game = coup.GameState(players = [coup.PlayerState(cards=[Role.CAPTAIN],
                                                       coins=0, agent=None, name='0th'),
@@ -73,23 +104,64 @@ def test_get_player_view():
                                                       coins=9, agent=None, name='1st'),
                                      coup.PlayerState(cards=[Role.DUKE, Role.DUKE],
                                                       coins=5, agent=None, name='2nd')],
-                         deck=[]) 
-    view0 = coup.PlayerView(selfstate=game.players[0],
-                            opponents=[coup.PlayerState(cards=2, coins=9, agent=None, name='1st'),
-                                       coup.PlayerState(cards=2, coins=5, agent=None, name='2nd')])
+                         deck=coup.makeDeck([])) 
+    view0 = coup.PlayerView(selfstate=game.players[0]._replace(cards=(Role.CAPTAIN,)),
+                            opponents=(coup.PlayerState(cards=2, coins=9, agent=None, name='1st'),
+                                       coup.PlayerState(cards=2, coins=5, agent=None, name='2nd')))
     assert coup.getPlayerView(game, 0) == view0 
 
-    view1 = coup.PlayerView(selfstate=game.players[1],
-                            opponents=[coup.PlayerState(cards=2, coins=5, agent=None, name='2nd'),
-                                       coup.PlayerState(cards=1, coins=0, agent=None, name='0th')])
+    view1 = coup.PlayerView(selfstate=game.players[1]._replace(cards=(Role.ASSASSIN, Role.CAPTAIN)),
+                            opponents=(coup.PlayerState(cards=2, coins=5, agent=None, name='2nd'),
+                                       coup.PlayerState(cards=1, coins=0, agent=None, name='0th')))
     assert coup.getPlayerView(game, 1) == view1 
 
-    view2 = coup.PlayerView(selfstate=game.players[2],
-                            opponents=[coup.PlayerState(cards=1, coins=0, agent=None, name='0th'),
-                                       coup.PlayerState(cards=2, coins=9, agent=None, name='1st')])
+    view2 = coup.PlayerView(selfstate=game.players[2]._replace(cards=(Role.DUKE, Role.DUKE)),
+                            opponents=(coup.PlayerState(cards=1, coins=0, agent=None, name='0th'),
+                                       coup.PlayerState(cards=2, coins=9, agent=None, name='1st')))
     assert coup.getPlayerView(game, 2) == view2
 
 
+def test_player_view_is_cached_per_state():
+    game = coup.GameState(players = [coup.PlayerState(cards=[Role.CAPTAIN], coins=0, agent=None, name='0th'),
+                                     coup.PlayerState(cards=[Role.DUKE], coins=3, agent=None, name='1st')],
+                          deck=coup.makeDeck([]))
+    view = coup.getPlayerView(game, 0)
+    assert coup.getPlayerView(game, 0) is view
+    assert coup.getPlayerView(game, 1) is not view
+
+    # An equal but distinct state gets its own views.
+    other = game._replace(players=game.players[:])
+    assert coup.getPlayerView(other, 0) is not view
+    assert coup.getPlayerView(other, 0) == view
+
+
+def test_player_view_cache_survives_interleaved_games():
+    # Games interleaved on an event loop ask for views of each other's states in turn.
+    games = [coup.dealGame([Role.DUKE, Role.CAPTAIN] * 3, [MrtBot(), MrtBot()]) for _ in range(10)]
+    views = [coup.getPlayerView(game, 0) for game in games]
+    assert all(coup.getPlayerView(game, 0) is view for game, view in zip(games, views))
+
+
+def test_player_view_is_immutable():
+    game = coup.GameState(players = [coup.PlayerState(cards=[Role.CAPTAIN, Role.DUKE], coins=0,
+                                                      agent=None, name='0th'),
+                                     coup.PlayerState(cards=[Role.DUKE], coins=3, agent=None, name='1st')],
+                          deck=coup.makeDeck([]))
+    view = coup.getPlayerView(game, 0)
+    with pytest.raises(AttributeError):
+        view.opponents.append(view.opponents[0])
+    with pytest.raises(AttributeError):
+        view.selfstate.cards.remove(Role.DUKE)
+    with pytest.raises(AttributeError):
+        view.opponents[0].coins = 10
+    assert game.players[0].cards == [Role.CAPTAIN, Role.DUKE]
+
+    # Applying an action makes a new state, leaving earlier views untouched.
+    applied, _ = coup.applyIncome(game, 1)
+    assert view.opponents[0].coins == 3
+    assert coup.getPlayerView(applied, 0).opponents[0].coins == 4
+
+
 @pytest.mark.parametrize("coins,action,expected", [
             (0, Action.INCOME, True),
             (0, Action.FOREIGN_AID, True),
@@ -151,6 +223,15 @@ def test_remove_missing_card():
 
 
 
+@pytest.mark.parametrize("nPlayers", [2, 3, 4, 5, 6])
+def test_deal_game_conserves_cards(nPlayers):
+    baseDeck = [Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3
+    game = coup.dealGame(baseDeck[:], [None] * nPlayers)
+    dealt = [card for player in game.players for card in player.cards] + coup.deckCards(game.deck)
+    assert all(len(player.cards) == 2 for player in game.players)
+    assert sorted(dealt, key=lambda x: x.value) == sorted(baseDeck, key=lambda x: x.value)
+
+
 ###  TEST APPLYING EACH ACTION ###
 
 # This needs a super easy MockAgent that turns down all Reactions/etc.
@@ -170,7 +251,7 @@ game = coup.GameState(players = [
     coup.PlayerState(cards=[Role.CAPTAIN], coins=0, agent=MockAgent(), name='0th'),
     coup.PlayerState(cards=[Role.ASSASSIN, Role.CAPTAIN], coins=9, agent=MockAgent(), name='1st'),
     coup.PlayerState(cards=[Role.DUKE, Role.AMBASSADOR], coins=5, agent=MockAgent(), name='2nd')
-    ], deck = [Role.DUKE, Role.CONTESSA])
+    ], deck = coup.makeDeck([Role.DUKE, Role.CONTESSA]))
 
 def test_apply_income():
     new0th = game.players[0]._replace(coins=1)
@@ -259,3 +340,148 @@ def test_apply_coup():
     assert applied[0].players[2] == new2nd
     assert applied[1] == summary
 
+
+
+def test_enums_have_one_definition():
+    from coup import enums
+    from coup.agents import bots
+    assert Role is enums.Role and Action is enums.Action and Reaction is enums.Reaction
+    assert bots.coup.Role is enums.Role
+
+
+def test_apply_exchange():
+    # MockAgent keeps the two drawn cards, so its hand and the deck swap.
+    summary = coup.Summary(Action.EXCHANGE, 2, '2nd')
+    for seed in range(5):
+        applied = coup.applyExchange(game, 2, random.Random(seed))
+        assert sorted(applied[0].players[2].cards, key=lambda x: x.value) == [Role.DUKE, Role.CONTESSA]
+        assert applied[0].deck == coup.makeDeck([Role.DUKE, Role.AMBASSADOR])
+        assert applied[1] == summary
+
+
+# The same positions as above, with no agents to ask.
+agentless = game._replace(players=[p._replace(agent=None) for p in game.players])
+
+def test_resolve_matches_apply():
+    assert coup.resolveForeignAid(agentless, 0, False)[0].players[0] == agentless.players[0]._replace(coins=2)
+    assert coup.resolveForeignAid(agentless, 0, True)[1].success is False
+    assert coup.resolveSteal(agentless, 0, 2, False)[1] == coup.applySteal(game, 0, 2)[1]
+    assert coup.resolveAssassinate(agentless, 1, 2, False, Role.AMBASSADOR)[0].players[2].cards == [Role.DUKE]
+    assert coup.resolveCoup(agentless, 1, 2, Role.AMBASSADOR)[0].players[2].cards == [Role.DUKE]
+
+
+def test_resolve_blocked_actions():
+    blocked, summary = coup.resolveAssassinate(agentless, 1, 2, True)
+    assert blocked.players[1].coins == 6 and blocked.players[2] == agentless.players[2]
+    assert summary.success is False
+    blocked, summary = coup.resolveSteal(agentless, 0, 2, True)
+    assert blocked.players == agentless.players
+
+
+def test_resolve_coup_knocks_out():
+    after, summary = coup.resolveAction(agentless, 1, Action.COUP, 0, killedCard=Role.CAPTAIN)
+    assert [p.name for p in after.players] == ['1st', '2nd']
+    assert summary.targetName == '0th'
+
+
+def test_resolve_exchange():
+    drawn = [Role.CONTESSA, Role.DUKE]
+    after, summary = coup.resolveAction(agentless, 2, Action.EXCHANGE, drawn=drawn,
+                                        selected=[Role.CONTESSA, Role.AMBASSADOR])
+    assert after.players[2].cards == [Role.CONTESSA, Role.AMBASSADOR]
+    # The deck loses the drawn cards and gets back the ones not kept.
+    assert after.deck == coup.makeDeck([Role.DUKE, Role.DUKE])
+    # Cards that weren't offered are swapped for ones that were.
+    after, _ = coup.resolveExchange(agentless, 2, drawn, [Role.ASSASSIN, Role.ASSASSIN])
+    cards = after.players[2].cards + coup.deckCards(after.deck)
+    assert sorted(cards, key=lambda x: x.value) == sorted(drawn + [Role.DUKE, Role.AMBASSADOR], key=lambda x: x.value)
+
+
+###  TEST THE DECK ###
+
+# Chi-squared critical values at p=0.001, by degrees of freedom.
+chi2_critical = {3: 16.27, 7: 24.32}
+
+def chi2(observed, expected):
+    return sum((observed[k] - expected[k]) ** 2 / expected[k] for k in expected)
+
+
+def test_deck_round_trip():
+    cards = [Role.DUKE, Role.DUKE, Role.CAPTAIN, Role.ASSASSIN]
+    deck = coup.makeDeck(cards)
+    assert deck == (2, 1, 0, 0, 1)
+    assert sorted(coup.deckCards(deck), key=lambda x: x.value) == sorted(cards, key=lambda x: x.value)
+    assert coup.returnToDeck(deck, [Role.CONTESSA]) == (2, 1, 1, 0, 1)
+
+
+def test_draw_matches_shuffled_deck_distribution():
+    # Each card in the deck is equally likely to be drawn.
+    cards = [Role.DUKE] * 3 + [Role.ASSASSIN] + [Role.CONTESSA] * 2 + [Role.CAPTAIN]
+    deck = coup.makeDeck(cards)
+    rng = random.Random(0)
+    n = 14000
+    observed = Counter(coup.drawFromDeck(deck, rng)[0] for _ in range(n))
+    expected = {role: n * cards.count(role) / len(cards) for role in set(cards)}
+    assert set(observed) == set(expected)
+    assert chi2(observed, expected) < chi2_critical[len(expected) - 1]
+
+
+def test_two_card_draw_matches_sampling_without_replacement():
+    cards = [Role.DUKE] * 3 + [Role.ASSASSIN] + [Role.CONTESSA] * 2 + [Role.CAPTAIN]
+    game = coup.GameState(players=[], deck=coup.makeDeck(cards))
+    rng = random.Random(1)
+    n = 20000
+    observed = Counter()
+    for _ in range(n):
+        drawn, after = coup.getCardsFromDeck(game, 2, rng)
+        assert coup.returnToDeck(after.deck, drawn) == game.deck
+        observed[frozenset(drawn), drawn[0] == drawn[1]] += 1
+
+    # Exact probabilities of each unordered pair when drawing 2 of the 7 cards.
+    expected = {}
+    for a, b in itertools.combinations_with_replacement(set(cards), 2):
+        if a == b:
+            p = cards.count(a) * (cards.count(a) - 1) / (7 * 6)
+        else:
+            p = 2 * cards.count(a) * cards.count(b) / (7 * 6)
+        if p:
+            expected[frozenset([a, b]), a == b] = n * p
+    assert set(observed) == set(expected)
+    assert chi2(observed, expected) < chi2_critical[len(expected) - 1]
+
+
+###  TEST SEEDED GAMES ###
+
+from coup.agents.bots import RandomAgent, SeanAgent, MrtBot, BayBot
+
+class RecordingAgent(SeanAgent):
+    '''Remembers every summary it's shown.'''
+    def newGame(self, rng):
+        super().newGame(rng)
+        self.summaries = []
+
+    def turnSummary(self, playerView, summary):
+        # Drop the agent, which differs between otherwise identical games.
+        self.summaries.append((playerView._replace(selfstate=playerView.selfstate._replace(agent=None)),
+                               summary))
+
+
+def playSeeded(seed):
+    agents = [RecordingAgent(), RandomAgent(), MrtBot(), BayBot()]
+    winner = coup.gameLoop(agents, seed=seed)
+    return winner, agents[0].summaries
+
+
+def test_seeded_game_replays_exactly():
+    for seed in range(20):
+        assert playSeeded(seed) == playSeeded(seed)
+
+
+def test_seeds_give_different_games():
+    assert len({str(playSeeded(seed)) for seed in range(20)}) > 1
+
+
+def test_seeded_game_leaves_global_random_alone():
+    state = random.getstate()
+    playSeeded(0)
+    assert random.getstate() == state
@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from coup import coup
+from coup.coup import Action
+from coup.env import VectorEnv, actionIndex, decodeAction, OBS_SIZE
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def randomActions(rng, mask):
+    return np.where(mask, rng.random(mask.shape), -1.0).argmax(axis=1)
+
+
+def test_action_indexes_round_trip():
+    for action in Action:
+        for target in (range(3) if action in (Action.STEAL, Action.ASSASSINATE, Action.COUP) else (None,)):
+            assert decodeAction(actionIndex(action, target, 3), 3) == (action, target)
+
+
+def test_obs_and_mask_describe_the_learners_turn():
+    env = VectorEnv([MrtBot, BayBot], nEnvs=8, seed=1)
+    obs, mask = env.reset()
+    assert obs.shape == (8, OBS_SIZE + 6) and mask.shape == (8, len(Action) * 2)
+    for k in range(8):
+        i = env.learnerIndex(k)
+        assert env.turns[k] % len(env.states[k].players) == i
+        view = coup.getPlayerView(env.states[k], i)
+        assert obs[k, 0] == pytest.approx(view.selfstate.coins / 10)
+        legal = {decodeAction(a, 2)[0] for a in np.flatnonzero(mask[k])}
+        assert legal == coup.findEligibleActions(view.selfstate)
+
+
+def test_games_finish_and_reset_in_place():
+    env = VectorEnv([MrtBot, BayBot, SeanAgent], nEnvs=16, seed=2)
+    obs, mask = env.reset()
+    rng = np.random.default_rng(0)
+    buffers = (obs, mask)
+    finished = 0
+    for _ in range(100):
+        obs, mask, rewards, dones = env.step(randomActions(rng, mask))
+        assert obs is buffers[0] and mask is buffers[1]
+        assert set(rewards[dones]) <= {1.0, -1.0, 0.0} and not rewards[~dones].any()
+        assert mask.any(axis=1).all()
+        finished += dones.sum()
+    assert finished == sum(env.results) > 0
+
+
+def test_illegal_action_is_refused():
+    env = VectorEnv([MrtBot], nEnvs=1, seed=3)
+    obs, mask = env.reset()
+    with pytest.raises(ValueError):
+        env.step([int(np.flatnonzero(~mask[0])[0])])
+
+
+def test_illegal_action_leaves_every_game_unstepped():
+    env = VectorEnv([MrtBot], nEnvs=2, seed=3)
+    obs, mask = env.reset()
+    before = obs.copy(), mask.copy()
+    actions = [int(np.flatnonzero(mask[0])[0]), int(np.flatnonzero(~mask[1])[0])]
+    with pytest.raises(ValueError):
+        env.step(actions)
+    assert (obs == before[0]).all() and (mask == before[1]).all()
+    env.step(randomActions(np.random.default_rng(0), mask))
@@ -0,0 +1,51 @@
+import json
+
+from coup import coup, tournament
+from coup.instrument import Profiler, LatencyStats, ENGINE
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def test_profiled_game_counts_every_call():
+    profiler = Profiler()
+    winner = coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=0, profiler=profiler)
+    assert winner in {'MrtBot', 'BayBot', 'SeanAgent'}
+
+    engine = profiler.stats[ENGINE]
+    turns = engine['turn'].count
+    assert engine['applyAction'].count == turns
+    assert engine['bookkeeping'].count == turns
+    assert sum(profiler.stats[name]['selectAction'].count for name in ['MrtBot', 'BayBot', 'SeanAgent']) == turns
+    for phases in profiler.stats.values():
+        for stats in phases.values():
+            assert sum(stats.histogram) == stats.count
+            assert stats.minSeconds <= stats.maxSeconds
+
+
+def test_profiling_does_not_change_the_game():
+    assert coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=4) == \
+            coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=4, profiler=Profiler())
+
+
+def test_profile_round_trips_through_json():
+    profiler = Profiler()
+    coup.gameLoop([MrtBot(), BayBot()], seed=1, profiler=profiler)
+    copy = Profiler.fromDict(json.loads(json.dumps(profiler.toDict())))
+    assert copy.toDict() == profiler.toDict()
+    assert copy.agentSeconds == profiler.agentSeconds > 0
+
+
+def test_merge_adds_up():
+    a, b = LatencyStats(), LatencyStats()
+    for seconds in [1e-7, 3e-6, 5e-3]:
+        a.add(seconds)
+    b.add(2e-6)
+    a.merge(b)
+    assert a.count == 4
+    assert a.histogram[0] == 1 and a.histogram[2] == 2
+    assert a.maxSeconds == 5e-3 and a.minSeconds == 1e-7
+
+
+def test_tournament_merges_profiles():
+    result = tournament.runTournament([MrtBot, BayBot], 20, seed=0, chunkSize=5, profile=True)
+    assert sum(s['newGame'].count for name, s in result.profile.stats.items() if name != ENGINE) == 40
+    assert result.profile.agentSeconds > 0
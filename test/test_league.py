@@ -0,0 +1,35 @@
+from coup import league
+from coup.agents.bots import MrtBot, BayBot, SeanAgent, RandomAgent
+
+
+registry = {'mrt': MrtBot, 'bay': BayBot, 'sean': SeanAgent, 'random': RandomAgent}
+
+
+def test_block_plays_every_seating():
+    winners = league.playBlock((MrtBot, BayBot, SeanAgent), seed=1)
+    assert len(winners) == 6
+    assert set(winners) <= {0, 1, 2, None}
+
+
+def test_winner_gains_rating():
+    ratings = {name: league.initial_rating for name in 'abc'}
+    league.updateRatings(ratings, ('a', 'b', 'c'), 1)
+    assert ratings['b'].rating > 1500 > ratings['a'].rating
+    assert ratings['a'].rating == ratings['c'].rating
+    assert all(r.deviation < league.initial_rating.deviation and r.games == 1 for r in ratings.values())
+    assert ratings['b'].wins == 1
+
+
+def test_seeded_league_is_independent_of_workers():
+    serial = league.runLeague(registry, tableSize=3, nWorkers=1, seed=4, maxBlocks=5)
+    parallel = league.runLeague(registry, tableSize=3, nWorkers=2, seed=4, maxBlocks=5)
+    assert serial.ratings == parallel.ratings
+    assert serial.blocks == parallel.blocks
+    assert serial.games == sum(serial.blocks.values()) * 6
+
+
+def test_settled_tables_stop_early():
+    result = league.runLeague(registry, tableSize=2, seed=2, precision=1000.0, maxBlocks=50)
+    assert all(blocks < 50 for blocks in result.blocks.values())
+    swiss = league.runLeague(registry, tableSize=2, seed=2, schedule='swiss', rounds=3)
+    assert all(r.games > 0 for r in swiss.ratings.values())
@@ -0,0 +1,59 @@
+from collections import Counter
+
+from coup import coup, tournament
+from coup.coup import Action
+from coup.records import GameRecordWriter, GameRecordReader, unpackHand, NONE
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+class ExchangingMrtBot(MrtBot):
+    def selectAction(self, playerView):
+        if Action.EXCHANGE in coup.findEligibleActions(playerView.selfstate):
+            return (Action.EXCHANGE, None)
+        return super().selectAction(playerView)
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / 'games.rec'
+    winners = []
+    with GameRecordWriter(path) as writer:
+        for seed in range(20):
+            winners.append(coup.gameLoop([ExchangingMrtBot(), BayBot(), SeanAgent()], seed=seed, recorder=writer))
+
+    with GameRecordReader(path) as games:
+        records = list(games)
+        assert [r.seed for r in records] == list(range(20))
+        for record, winner in zip(records, winners):
+            assert record.nPlayers == 3
+            names = record.names()
+            assert sorted(n.split('-')[0] for n in names) == ['BayBot', 'ExchangingMrtBot', 'SeanAgent']
+            assert (record.winner() or '').split('-')[0] == (winner or '')
+            hands = [len(h) for h in record.deal()]
+            assert hands == [2, 2, 2]
+            for turn in record.turns():
+                action, active, target, success, drawn = turn[:5]
+                assert active < 3 and (target == NONE or target < 3)
+                assert (drawn != 0) == (Action(action) == Action.EXCHANGE)
+                if Action(action) == Action.EXCHANGE:
+                    assert len(unpackHand(drawn)) == 2
+                # No-one holds more than their two cards.
+                assert all(len(unpackHand(h)) <= 2 for h in turn[5:8])
+            if record.winnerSeat != NONE:
+                final = record.turn(record.nTurns - 1)
+                assert [bool(h) for h in final[5:8]] == [s == record.winnerSeat for s in range(3)]
+
+
+def test_recording_does_not_change_the_game(tmp_path):
+    with GameRecordWriter(tmp_path / 'games.rec') as writer:
+        assert coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=5, recorder=writer) == \
+                coup.gameLoop([MrtBot(), BayBot(), SeanAgent()], seed=5)
+
+
+def test_tournament_records_every_game_in_order(tmp_path):
+    serial, parallel = tmp_path / 'serial.rec', tmp_path / 'parallel.rec'
+    result = tournament.runTournament([MrtBot, BayBot], 30, seed=2, chunkSize=7, record=str(serial))
+    tournament.runTournament([MrtBot, BayBot], 30, nWorkers=2, seed=2, chunkSize=7, record=str(parallel))
+    assert serial.read_bytes() == parallel.read_bytes()
+    with GameRecordReader(serial) as games:
+        wins = Counter(game.winner().split('-')[0] for game in games if game.winnerSeat != NONE)
+    assert wins == result.wins
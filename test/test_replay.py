@@ -0,0 +1,59 @@
+import pickle
+
+import pytest
+
+from coup import coup
+from coup.replay import DecisionLog, ReplayDivergence, replay, replayTurns, restore, stateKey
+from coup.agents.bots import MrtBot, BayBot, SeanAgent, RandomAgent
+
+
+def loggedGame(seed, snapshotEvery=5):
+    log = DecisionLog(snapshotEvery=snapshotEvery)
+    winner = coup.gameLoop([MrtBot(), BayBot(), SeanAgent(), RandomAgent()], seed=seed, recorder=log)
+    return log, winner
+
+
+def test_replay_reaches_the_logged_end():
+    for seed in range(10):
+        log, winner = loggedGame(seed)
+        final = replay(log)
+        assert stateKey(final) == log.states[-1]
+        if winner is not None:
+            assert final.players[0].name.split('-')[0] == winner == log.winner.split('-')[0]
+
+
+def test_jump_to_turn_starts_from_a_snapshot():
+    log, _ = loggedGame(3)
+    assert log.turns > 12
+    _, _, turn = restore(log, 12)
+    assert turn == 10
+    assert stateKey(replay(log, toTurn=12)) == log.states[12]
+    turns = [turn for turn, _, _ in replayTurns(log, fromTurn=12)]
+    assert turns == list(range(13, log.turns + 1))
+
+
+def test_replay_detects_a_changed_decision():
+    log, _ = loggedGame(1)
+    i = next(k for k, d in enumerate(log.decisions) if d.method == 'selectAction' and d.result[0] == coup.Action.INCOME and k > 0)
+    log.decisions[i] = log.decisions[i]._replace(result=(coup.Action.TAX, None))
+    with pytest.raises(ReplayDivergence):
+        for _ in replayTurns(log):
+            pass
+
+
+def test_log_pickles():
+    log, _ = loggedGame(2)
+    assert stateKey(replay(pickle.loads(pickle.dumps(log)))) == log.states[-1]
+
+
+def test_log_is_reusable_after_a_game_raises():
+    class Crashing(MrtBot):
+        def selectAction(self, playerView):
+            raise RuntimeError('crash')
+
+    log = DecisionLog()
+    with pytest.raises(RuntimeError):
+        coup.gameLoop([Crashing(), BayBot()], seed=0, recorder=log)
+    coup.gameLoop([MrtBot(), BayBot(), SeanAgent(), RandomAgent()], seed=3, recorder=log)
+    assert {d.seat for d in log.decisions} <= set(range(4))
+    assert stateKey(replay(log)) == log.states[-1]
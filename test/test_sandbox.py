@@ -0,0 +1,94 @@
+import functools
+import random
+import time
+from array import array
+
+import pytest
+
+from coup import coup, tournament
+from coup.sandbox import SandboxPool, SandboxError, TURN_SUMMARY
+from coup.agents.bots import MrtBot, BayBot, SeanAgent, RandomAgent
+
+
+class CrashingBot(SeanAgent):
+    def selectAction(self, playerView):
+        raise RuntimeError("boom")
+
+
+class HangingBot(SeanAgent):
+    def selectAction(self, playerView):
+        while True:
+            pass
+
+
+def test_sandboxed_games_match_in_process_games():
+    with SandboxPool() as pool:
+        for seed in range(10):
+            agents = [pool.agent(MrtBot), pool.agent(BayBot), SeanAgent(), pool.agent(RandomAgent)]
+            assert coup.gameLoop(agents, seed=seed) == \
+                    coup.gameLoop([MrtBot(), BayBot(), SeanAgent(), RandomAgent()], seed=seed)
+            for agent in agents:
+                if hasattr(agent, 'release'):
+                    agent.release()
+        # Workers are reused from game to game.
+        assert len(pool.workers) == 3
+        stats = agents[0].ipcStats()
+        assert stats['selectAction']['calls'] > 0
+        assert stats['selectAction']['roundTripMicros'] >= stats['selectAction']['botMicros']
+
+
+def test_crashing_bot_raises_sandbox_error():
+    with SandboxPool() as pool:
+        with pytest.raises(SandboxError, match="boom"):
+            coup.gameLoop([pool.agent(CrashingBot), MrtBot()], seed=0)
+
+
+def test_hanging_bot_is_killed_on_timeout():
+    with SandboxPool() as pool:
+        agent = pool.agent(HangingBot, timeout=0.2)
+        with pytest.raises(SandboxError, match="longer than"):
+            coup.gameLoop([agent, MrtBot()], seed=0)
+        # The hung worker was replaced.
+        assert all(w.process.is_alive() for w in pool.workers)
+        assert agent.worker in pool.workers
+
+
+def test_sandboxed_tournament_matches_in_process():
+    plain = tournament.runTournament([MrtBot, BayBot], 10, seed=4)
+    sandboxed = tournament.runTournament([MrtBot, BayBot], 10, seed=4, sandbox=True)
+    assert plain.wins == sandboxed.wins
+
+
+class SleepingBot(SeanAgent):
+    def selectAction(self, playerView):
+        time.sleep(10)
+
+
+def test_bad_bots_forfeit_without_stopping_the_tournament(tmp_path):
+    crashing = tournament.runTournament([CrashingBot, MrtBot], 3, seed=1, sandbox=True,
+                                        record=str(tmp_path / 'games.bin'))
+    assert crashing.forfeits == {'CrashingBot': 3}
+    assert crashing.draws == 3
+    sleeping = tournament.runTournament([SleepingBot, MrtBot], 2, seed=1, sandbox=True, timeout=0.2)
+    assert sleeping.forfeits == {'SleepingBot': 2}
+    assert sleeping.seconds < 5
+    fine = tournament.runTournament([MrtBot, BayBot], 3, seed=1, sandbox=True)
+    assert fine.forfeits == {} and sum(fine.wins.values()) + fine.draws == 3
+
+
+def test_factories_without_a_name():
+    with SandboxPool() as pool:
+        agent = pool.agent(functools.partial(MrtBot))
+        assert coup.gameLoop([agent, BayBot()], seed=0) in {'partial', 'BayBot', None}
+        agent.release()
+
+
+def test_bad_turn_summary_gets_no_reply():
+    game = coup.dealGame([coup.Role.DUKE, coup.Role.CAPTAIN] * 3, [MrtBot(), MrtBot()])
+    with SandboxPool() as pool:
+        agent = pool.agent(MrtBot)
+        agent.newGame(random.Random(0))
+        # Names the worker has never been sent, so it can't decode the view.
+        agent.send(bytes([TURN_SUMMARY, 0]) + array('H', [0, 40, 0, 0]).tobytes())
+        action, target = agent.selectAction(coup.getPlayerView(game, 0))
+        assert action in coup.findEligibleActions(game.players[0])
@@ -0,0 +1,54 @@
+import random
+
+from coup import coup
+from coup.coup import Role, Action
+from coup.agents.search import SearchAgent, TranspositionTable, legalMoves
+from coup.agents.bots import MrtBot, BayBot
+
+
+def test_legal_moves_target_every_opponent():
+    game = coup.dealGame([Role.ASSASSIN] * 15, [MrtBot(), MrtBot(), MrtBot()])
+    game = game._replace(players=[game.players[0]._replace(coins=3)] + game.players[1:])
+    moves = legalMoves(game, 0)
+    assert (Action.ASSASSINATE, 0) in moves and (Action.ASSASSINATE, 1) in moves
+    assert (Action.ASSASSINATE, 2) not in moves
+    assert (Action.INCOME, None) in moves
+    assert all(action != Action.COUP for action, _ in moves)
+
+
+def test_transposition_table_evicts_least_recently_used():
+    table = TranspositionTable(maxSize=2)
+    table.add('a')
+    table.add('b')
+    table.get('a')
+    table.add('c')
+    assert table.get('b') is None
+    assert table.get('a') is not None and table.get('c') is not None
+    assert table.evictions == 1
+
+
+def test_search_agent_plays_legal_seeded_games():
+    agent = SearchAgent(iterations=10, tableSize=500)
+    first = coup.gameLoop([agent, MrtBot(), BayBot()], seed=1)
+    assert first in {'SearchAgent', 'MrtBot', 'BayBot', None}
+    assert coup.gameLoop([SearchAgent(iterations=10, tableSize=500), MrtBot(), BayBot()], seed=1) == first
+    assert agent.searches > 0 and len(agent.table) <= 500
+
+
+def test_time_budget_stops_search():
+    game = coup.dealGame([Role.DUKE, Role.CAPTAIN] * 3, [MrtBot(), MrtBot()])
+    agent = SearchAgent(iterations=10 ** 9, seconds=0.05)
+    agent.newGame(random.Random(0))
+    action, target = agent.selectAction(coup.getPlayerView(game, 0))
+    assert action in coup.findEligibleActions(game.players[0])
+    assert agent.searchSeconds < 1.0
+
+
+def test_no_budget_still_picks_a_move():
+    game = coup.dealGame([Role.DUKE, Role.CAPTAIN] * 3, [MrtBot(), MrtBot()])
+    agent = SearchAgent(seconds=0.0)
+    agent.newGame(random.Random(0))
+    action, target = agent.selectAction(coup.getPlayerView(game, 0))
+    assert action in coup.findEligibleActions(game.players[0])
+    assert agent.totalIterations == 1
+    assert coup.gameLoop([SearchAgent(iterations=0), MrtBot()], seed=1) in {'SearchAgent', 'MrtBot', None}
@@ -0,0 +1,81 @@
+import multiprocessing
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from coup import coup, cligame
+from coup.selfplay import RingBuffer, SelfPlay
+from coup.agents.bots import RandomAgent, MrtBot
+from coup.agents.snapshot import snapshotBots
+
+
+def rows(start, n):
+    values = np.arange(start, start + n)
+    return (np.repeat(values[:, None], 3, axis=1).astype(np.float32), np.ones((n, 2), dtype=bool),
+            values.astype(np.int32), values.astype(np.float32))
+
+
+def test_ring_buffer_wraps_and_batches_are_views():
+    buffer = RingBuffer(8, 3, 2, multiprocessing.Lock())
+    try:
+        buffer.push(*rows(0, 5))
+        batch = buffer.consume(4)
+        assert list(batch.action) == [0, 1, 2, 3]
+        assert np.shares_memory(batch.obs, buffer.obs)
+        assert buffer.consume(4) is None
+
+        buffer.push(*rows(5, 5))
+        # Stops short at the end of the buffer, then carries on from the start.
+        assert list(buffer.consume(4).action) == [4, 5, 6, 7]
+        assert list(buffer.consume(2).reward) == [8, 9]
+
+        # Lapped: skip to the oldest transition still there.
+        buffer.push(*rows(10, 20))
+        assert list(buffer.consume(8).action) == list(range(22, 24))
+        assert buffer.overruns == 12
+        assert list(buffer.consume(6).action) == list(range(24, 30))
+        assert buffer.obs[:, 0].tolist() == [24, 25, 26, 27, 28, 29, 22, 23]
+    finally:
+        buffer.close()
+
+
+def test_self_play_saves_snapshots_as_bots(tmp_path, monkeypatch):
+    monkeypatch.setattr(cligame, 'bots', dict(cligame.bots))
+    with SelfPlay(nActors=2, table=['self', 'self', 'mikayla'], hidden=(16,), capacity=4096,
+                  batchSize=64, snapshotDir=str(tmp_path), snapshotEvery=3, seed=0) as selfplay:
+        before = [w.copy() for w, _ in selfplay.policy.layers]
+        selfplay.start()
+        selfplay.train(6)
+        assert int(selfplay.buffer.written[0]) >= 6 * 64
+    assert any((w != old).any() for (w, _), old in zip(selfplay.policy.layers, before))
+    assert sorted(snapshotBots(str(tmp_path))) == ['selfplay_3', 'selfplay_6']
+
+    bot = cligame.bots['selfplay_6']
+    for seed in range(10):
+        assert coup.gameLoop([bot(), RandomAgent(), MrtBot()], seed=seed) is not None
+    with pytest.raises(TypeError):
+        bot(nOpponents=2)
+
+
+def test_step_on_a_batch_written_over_is_dropped(tmp_path):
+    with SelfPlay(nActors=0, hidden=(8,), capacity=64, batchSize=32, snapshotDir=str(tmp_path), seed=0) as selfplay:
+        nInputs, nActions = selfplay.sizes[0], selfplay.sizes[-1]
+
+        def push(n):
+            mask = np.ones((n, nActions), dtype=bool)
+            selfplay.buffer.push(np.ones((n, nInputs), dtype=np.float32), mask,
+                                 np.zeros(n, dtype=np.int32), np.ones(n, dtype=np.float32))
+
+        push(32)
+        before = [w.copy() for w, _ in selfplay.policy.layers]
+        batch = selfplay.buffer.consume(32)
+        push(32)
+        assert selfplay.buffer.intact()
+        # The actors lap the learner mid-step.
+        push(1)
+        assert selfplay.update(batch) is None
+        assert selfplay.torn == 1
+        assert all((w == old).all() for (w, _), old in zip(selfplay.policy.layers, before))
+        assert selfplay.update(selfplay.buffer.consume(32)) == 1.0
+        assert any((w != old).any() for (w, _), old in zip(selfplay.policy.layers, before))
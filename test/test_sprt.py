@@ -0,0 +1,27 @@
+from coup import sprt
+from coup.agents.bots import SeanAgent, RandomAgent
+
+
+def test_stronger_bot_is_accepted_early():
+    result = sprt.runSPRT(SeanAgent, RandomAgent, seed=0, maxGames=2000)
+    assert result.decision == sprt.ACCEPT_H1
+    assert result.llr >= result.bounds[1]
+    assert result.wins + result.losses + result.draws < 2000
+
+
+def test_weaker_bot_is_rejected():
+    result = sprt.runSPRT(RandomAgent, SeanAgent, seed=0, maxGames=2000)
+    assert result.decision == sprt.ACCEPT_H0
+
+
+def test_seeded_test_is_independent_of_workers():
+    serial = sprt.runSPRT(SeanAgent, SeanAgent, seed=5, batchSize=50, maxGames=200)
+    parallel = sprt.runSPRT(SeanAgent, SeanAgent, seed=5, batchSize=50, maxGames=200, nWorkers=2)
+    assert serial[:5] == parallel[:5]
+    assert serial.wins + serial.losses + serial.draws <= 200
+
+
+def test_win_rate_interval():
+    low, high = sprt.winRateInterval(50, 100)
+    assert low < 0.5 < high
+    assert abs((0.5 - low) - (high - 0.5)) < 1e-9
@@ -0,0 +1,41 @@
+from coup import coup, tournament
+from coup.coup import Role, GameState, PlayerState
+from coup.stalemate import StalemateDetector, turn_limit
+from coup.agents.bots import BayBot, SeanAgent
+
+
+def table(coins, cards):
+    return GameState(players=[PlayerState(list(cards[i]), coins[i], None, f"p-{i}") for i in range(len(coins))],
+                     deck=coup.makeDeck([]))
+
+
+def test_repeated_state_is_stuck_and_lost_card_resets():
+    detector = StalemateDetector(repeats=3)
+    start = table([2, 2], [(Role.DUKE, Role.DUKE), (Role.CAPTAIN, Role.CAPTAIN)])
+    detector.startGame(start)
+    assert not detector.stuck(start, 2)
+    assert not detector.stuck(start, 4)
+    # A lost card is progress.
+    lost = table([2, 2], [(Role.DUKE,), (Role.CAPTAIN, Role.CAPTAIN)])
+    assert not detector.stuck(lost, 6)
+    assert not detector.stuck(lost, 8)
+    assert detector.stuck(lost, 10)
+    assert detector.stats() == dict(games=1, stalemates=1, turnsPlayed=5, turnsSaved=turn_limit - 10)
+
+
+def test_detection_only_cuts_draws_short():
+    detector = StalemateDetector()
+    for seed in range(200):
+        full = coup.gameLoop([BayBot(), SeanAgent()], seed=seed)
+        assert coup.gameLoop([BayBot(), SeanAgent()], seed=seed, stalemate=detector) == full
+    stats = detector.stats()
+    assert stats['games'] == 200
+    assert stats['stalemates'] > 0
+    assert stats['turnsSaved'] > stats['stalemates'] * 500
+
+
+def test_tournament_reports_turns_saved():
+    result = tournament.runTournament([BayBot, SeanAgent], 100, seed=2, chunkSize=50, stalemate=True)
+    assert result.stalemates['games'] == 100
+    assert result.stalemates['stalemates'] <= result.draws
+    assert tournament.runTournament([BayBot, SeanAgent], 10, seed=2).stalemates is None
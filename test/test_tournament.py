@@ -0,0 +1,15 @@
+from coup import tournament
+from coup.agents.bots import MrtBot, BayBot, SeanAgent
+
+
+def test_tournament_counts_every_game():
+    result = tournament.runTournament([MrtBot, BayBot, SeanAgent], 50, seed=1, chunkSize=20)
+    assert sum(result.wins.values()) + result.draws == 50
+    assert set(result.wins) <= {'MrtBot', 'BayBot', 'SeanAgent'}
+
+
+def test_seeded_tournament_is_independent_of_workers():
+    serial = tournament.runTournament([MrtBot, BayBot, SeanAgent], 40, nWorkers=1, seed=3, chunkSize=10)
+    parallel = tournament.runTournament([MrtBot, BayBot, SeanAgent], 40, nWorkers=2, seed=3, chunkSize=10)
+    assert serial.wins == parallel.wins
+    assert serial.draws == parallel.draws
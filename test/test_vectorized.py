@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from coup import coup, vectorized
+from coup.coup import Role, Action
+from coup.agents.bots import MrtBot, BayBot, RandomAgent
+
+
+def randomView(rng, nOpps):
+    cards = [rng.choice(list(Role)) for _ in range(rng.randint(1, 2))]
+    selfstate = coup.PlayerState(cards=tuple(cards), coins=rng.randint(0, 12), agent=None, name='me')
+    opponents = tuple(coup.PlayerState(cards=rng.randint(1, 2), coins=rng.randint(0, 12),
+                                       agent=None, name=str(i)) for i in range(nOpps))
+    return coup.PlayerView(selfstate, opponents)
+
+
+def batch(views, nSeats):
+    pad = nSeats - 1
+    rows = [(v.selfstate.coins, [c.value for c in v.selfstate.cards] + [0] * (2 - len(v.selfstate.cards)),
+             [o.coins for o in v.opponents] + [0] * (pad - len(v.opponents)),
+             [o.cards for o in v.opponents] + [0] * (pad - len(v.opponents))) for v in views]
+    coins = np.array([r[0] for r in rows])
+    cards = np.array([r[1] for r in rows])
+    return vectorized.BatchView(coins=coins, cards=cards,
+                                oppCoins=np.array([r[2] for r in rows]),
+                                oppCards=np.array([r[3] for r in rows]),
+                                eligible=vectorized.ELIGIBLE[cards[:, 0], cards[:, 1], np.minimum(coins, 10)])
+
+
+@pytest.mark.parametrize("agent", [MrtBot(), BayBot()])
+def test_batched_policy_matches_select_action(agent):
+    rng = random.Random(0)
+    views = [randomView(rng, rng.randint(1, 4)) for _ in range(500)]
+    actions, targets = agent.selectActions(batch(views, 5))
+    for view, action, target in zip(views, actions, targets):
+        expected, expectedTarget = agent.selectAction(view)
+        assert action == expected.value
+        assert target == (-1 if expectedTarget is None else expectedTarget)
+
+
+def test_eligible_mask_matches_find_eligible_actions():
+    rng = random.Random(1)
+    views = [randomView(rng, 1) for _ in range(200)]
+    eligible = batch(views, 2).eligible
+    for view, mask in zip(views, eligible):
+        assert {a for a in Action if mask[a.value]} == coup.findEligibleActions(view.selfstate)
+
+
+@pytest.mark.parametrize("nSeats", [2, 3, 6])
+def test_simulated_games_keep_the_rules(nSeats):
+    agents = [MrtBot(), BayBot()] * 3
+    games = vectorized.VectorizedGames(agents[:nSeats], 500, np.random.default_rng(nSeats))
+    while games.step():
+        # Exchanges always return as many cards as they draw, and nobody goes into debt.
+        assert (games.deck.sum(axis=1) == 15 - 2 * nSeats).all()
+        assert (games.coins >= 0).all()
+        # Empty card slots are always last.
+        assert not ((games.cards[:, :, 0] == 0) & (games.cards[:, :, 1] != 0)).any()
+    finished = games.winner >= 0
+    assert (games.alive()[finished].sum(axis=1) == 1).all()
+    assert (finished | (games.turns > 1000)).all()
+
+
+def test_simulate_counts_every_game():
+    result = vectorized.simulate([MrtBot(), BayBot(), MrtBot()], 300, seed=0)
+    assert sum(result.wins.values()) + result.draws == 300
+    assert set(result.wins) <= {'MrtBot', 'BayBot'}
+
+
+def test_simulate_needs_batched_policies():
+    with pytest.raises(ValueError):
+        vectorized.simulate([MrtBot(), RandomAgent()], 10)
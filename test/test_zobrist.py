@@ -0,0 +1,70 @@
+import random
+
+from coup import coup
+from coup.coup import Role
+from coup.zobrist import hashState, updateHash, canonicalHash, absoluteHash, infosetHash
+from coup.agents.bots import MrtBot, BayBot, SeanAgent, RandomAgent
+
+
+def playTurns(agents, seed):
+    '''Every (before, after, turnSummary, turns) of a game, played as gameLoop does.'''
+    rng = coup.newGameRandom(agents, seed)
+    gameState = coup.dealGame([Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3,
+                              agents, rng)
+    turns = 0
+    while len(gameState.players) > 1 and turns < 1000:
+        i = turns % len(gameState.players)
+        action, relativeTarget = gameState.players[i].agent.selectAction(coup.getPlayerView(gameState, i))
+        target = None if relativeTarget is None else (i + relativeTarget + 1) % len(gameState.players)
+        after, turnSummary = coup.applyAction(gameState, i, action, target, rng)
+        yield gameState, after, turnSummary, turns
+        gameState = after
+        turns += 1
+
+
+def test_incremental_hash_matches_full_hash():
+    for seed in range(20):
+        agents = [MrtBot(), BayBot(), SeanAgent(), RandomAgent()]
+        hashes = None
+        for before, after, turnSummary, turns in playTurns(agents, seed):
+            if hashes is None:
+                hashes = hashState(before)
+            hashes = updateHash(hashes, before, after, turnSummary)
+            assert hashes == hashState(after)
+
+
+def test_hash_ignores_hand_order_and_names():
+    game = coup.dealGame([Role.DUKE, Role.CAPTAIN] * 3, [MrtBot(), BayBot()])
+    swapped = game._replace(players=[game.players[0]._replace(cards=game.players[0].cards[::-1], name='x')]
+                                    + game.players[1:])
+    assert hashState(game) == hashState(swapped)
+    richer = game._replace(players=[game.players[0]._replace(coins=3)] + game.players[1:])
+    assert hashState(game) != hashState(richer)
+
+
+def test_canonical_hash_is_rotation_invariant():
+    rng = random.Random(0)
+    for _ in range(20):
+        game = coup.dealGame([Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3,
+                             [MrtBot() for _ in range(4)], rng)
+        game = game._replace(players=[p._replace(coins=rng.randrange(12)) for p in game.players])
+        turns = rng.randrange(100)
+        shift = rng.randrange(1, 4)
+        rotated = game._replace(players=game.players[shift:] + game.players[:shift])
+        # The same player is to move at turns - shift in the rotated table.
+        assert canonicalHash(hashState(game), turns) == canonicalHash(hashState(rotated), turns - shift)
+        assert absoluteHash(hashState(game), turns) != absoluteHash(hashState(rotated), turns - shift)
+
+
+def test_infoset_hash_ignores_what_the_mover_cannot_see():
+    game = coup.dealGame([Role.DUKE, Role.ASSASSIN, Role.CONTESSA, Role.AMBASSADOR, Role.CAPTAIN] * 3,
+                         [MrtBot() for _ in range(3)], random.Random(0))
+    players = game.players
+    hidden = game._replace(players=[players[0], players[1]._replace(cards=[Role.DUKE, Role.DUKE]), players[2]],
+                           deck=coup.makeDeck([Role.CAPTAIN] * 9))
+    assert infosetHash(game, 0) == infosetHash(hidden, 0)
+    assert infosetHash(game, 1) != infosetHash(hidden, 1)
+    rotated = game._replace(players=players[1:] + players[:1])
+    assert infosetHash(game, 1) == infosetHash(rotated, 0)
+    poorer = game._replace(players=[players[0], players[1]._replace(coins=0), players[2]])
+    assert infosetHash(game, 0) != infosetHash(poorer, 0)